@@ -1,4 +1,5 @@
 import os
+import time
 from dotenv import load_dotenv
 from typing import Any
 from pathlib import Path
@@ -6,6 +7,22 @@ from azure.identity import DefaultAzureCredential
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import FunctionTool, ToolSet
 from function_calling_functions import user_functions
+from tool_executor import ToolExecutor
+
+
+def run_with_tools(agents_client: AgentsClient, thread_id: str, agent_id: str, executor: ToolExecutor):
+    """Run the agent, executing all tool calls of each turn concurrently."""
+    run = agents_client.runs.create(thread_id=thread_id, agent_id=agent_id)
+    while run.status in ["queued", "in_progress", "requires_action"]:
+        if run.status == "requires_action":
+            tool_calls = run.required_action.submit_tool_outputs.tool_calls
+            tool_outputs = executor.execute_tool_calls(tool_calls)
+            run = agents_client.runs.submit_tool_outputs(thread_id=thread_id, run_id=run.id, tool_outputs=tool_outputs)
+            continue
+        time.sleep(1)
+        run = agents_client.runs.get(thread_id=thread_id, run_id=run.id)
+    return run
+
 
 def main(): 
 
@@ -39,9 +56,14 @@ def main():
         functions = FunctionTool(user_functions)
         toolset = ToolSet()
         toolset.add(functions)
-        
-        # Enable automatic function calling
-        agents_client.enable_auto_function_calls(toolset)
+
+        # Execute tool calls ourselves: independent calls of one turn run concurrently.
+        # The input() tools must not prompt at the same time and wait for the user without a timeout.
+        executor = ToolExecutor(
+            user_functions,
+            timeouts={"get_user_email": None, "get_issue_description": None, "submit_support_ticket": 10},
+            serial={"get_user_email", "get_issue_description"},
+        )
                 
         try:
             agent = agents_client.create_agent(
@@ -50,9 +72,10 @@ def main():
                 instructions="""You are a technical support agent.
                                 When a user has a technical issue, you get their email address and a description of the issue.
                                 Then you use those values to submit a support ticket using the function available to you.
-                                If a file is saved, tell the user the file name.
+                                Always tell the user the ticket ID.
+                                Users can also ask about existing tickets by ticket ID or email address.
                             """,
-                description="Demonstrates custom Function Calling with user-defined Python functions to create support tickets and save data to files.",
+                description="Demonstrates custom Function Calling with user-defined Python functions to create, store and look up support tickets.",
                 toolset=toolset
             )
         except Exception as e:
@@ -71,7 +94,7 @@ def main():
                     role="user",
                     content=auto_test_prompt
                 )
-                run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+                run = run_with_tools(agents_client, thread.id, agent.id, executor)
             except Exception as e:
                 print(f"ERROR during run: {e}")
                 return 1
@@ -93,6 +116,7 @@ def main():
                 "Examples:\n"
                 " - My email is alice@contoso.com and I cannot access the portal.\n"
                 " - user@contoso.com: VS Code extension crashes on startup.\n"
+                " - Which tickets did alice@contoso.com submit?\n"
                 "Describe the technical issue (include an email) so I can file a ticket.\n> "
             )
             try:
@@ -111,7 +135,7 @@ def main():
                             role="user",
                             content=user_prompt
                         )
-                        run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+                        run = run_with_tools(agents_client, thread.id, agent.id, executor)
                     except Exception as e:
                         print(f"ERROR during run: {e}")
                         break
@@ -150,6 +174,7 @@ def main():
         else:
             print(f"Agent {agent.id} preserved for examination in Azure AI Foundry")
         agents_client.threads.delete(thread.id)
+        executor.shutdown()
     
 
 if __name__ == '__main__': 
@@ -1,11 +1,16 @@
 import os
 import json
-from datetime import datetime
+import sqlite3
 from dotenv import load_dotenv
 
+from ticket_store import TicketStore
+
 # Load environment variables
 load_dotenv()
 
+# Tickets live in one indexed SQLite database under the output path
+ticket_store = TicketStore(os.path.join(os.getenv("OUTPUT_PATH", "./output"), "support_tickets.db"))
+
 def get_user_email() -> str:
     """Get the user's email address."""
     return input("Please enter your email address: ")
@@ -25,35 +30,71 @@ def submit_support_ticket(email: str, issue: str) -> str:
     Returns:
         A JSON string with ticket details
     """
-    timestamp = datetime.now().isoformat()
-    ticket_id = f"TICKET-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    ticket_data = {
-        "ticket_id": ticket_id,
-        "email": email,
-        "issue": issue,
-        "timestamp": timestamp,
-        "status": "submitted"
-    }
-    
-    # Get output path from environment or use default
-    output_path = os.getenv("OUTPUT_PATH", "./output")
-    tickets_dir = os.path.join(output_path, "support_tickets")
-    os.makedirs(tickets_dir, exist_ok=True)
-    
-    filename = os.path.join(tickets_dir, f"{ticket_id}.json")
-    with open(filename, "w") as f:
-        json.dump(ticket_data, f, indent=2)
+    # Commit before confirming, so the user is never told about a ticket that was not stored
+    try:
+        ticket = ticket_store.submit(email, issue, wait=True)
+    except sqlite3.Error as e:
+        return json.dumps({"success": False, "message": f"The ticket could not be stored, please try again later ({e})"})
     
     return json.dumps({
         "success": True,
-        "ticket_id": ticket_id,
-        "message": f"Support ticket submitted successfully. File saved: {filename}",
-        "filename": filename
+        "ticket_id": ticket["ticket_id"],
+        "message": f"Support ticket submitted successfully. Stored in: {ticket_store.db_path}",
+        "timestamp": ticket["created_at"]
     })
 
+def get_ticket_status(ticket_id: str) -> str:
+    """
+    Look up a support ticket by its ID.
+    
+    Args:
+        ticket_id: The ticket ID, e.g. TICKET-20250101120000-3F9A1C2B7D41
+        
+    Returns:
+        A JSON string with the ticket, or an error if it does not exist
+    """
+    ticket = ticket_store.get(ticket_id)
+    if ticket is None:
+        return json.dumps({"success": False, "message": f"Ticket {ticket_id} not found"})
+    return json.dumps({"success": True, "ticket": ticket})
+
+def list_tickets_by_email(email: str, limit: int = 10) -> str:
+    """
+    List the most recent support tickets submitted with an email address.
+    
+    Args:
+        email: The user's email address
+        limit: Maximum number of tickets to return
+        
+    Returns:
+        A JSON string with the tickets, newest first
+    """
+    tickets = ticket_store.find_by_email(email, limit=limit)
+    return json.dumps({"success": True, "count": len(tickets), "tickets": tickets})
+
+def list_recent_tickets(hours: int = 24, limit: int = 20) -> str:
+    """
+    List support tickets submitted in the last hours.
+    
+    Args:
+        hours: How many hours to look back
+        limit: Maximum number of tickets to return
+        
+    Returns:
+        A JSON string with the tickets, newest first
+    """
+    tickets = ticket_store.find_recent(hours=hours, limit=limit)
+    return json.dumps({"success": True, "count": len(tickets), "tickets": tickets})
+
 # Export the functions for use by the agent
-user_functions = {get_user_email, get_issue_description, submit_support_ticket}
+user_functions = {
+    get_user_email,
+    get_issue_description,
+    submit_support_ticket,
+    get_ticket_status,
+    list_tickets_by_email,
+    list_recent_tickets,
+}
 
 
 def _demo_non_interactive(prompt: str) -> None:
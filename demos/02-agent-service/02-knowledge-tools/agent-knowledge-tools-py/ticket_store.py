@@ -0,0 +1,193 @@
+"""
+Ticket Store
+
+SQLite-backed store for support tickets, replacing one JSON file per ticket.
+
+- Collision-free IDs: `TICKET-<timestamp>-<random suffix>`, so two tickets in
+  the same second no longer overwrite each other.
+- Indexed by email and creation time, so lookups do not scan a directory.
+- Batched commits: new tickets are queued and written by a background
+  thread in one transaction per batch (`batch_size` tickets or every
+  `flush_interval_s` seconds). Reads flush the queue first, so a ticket is
+  visible as soon as it is submitted. Pending tickets are flushed on close()
+  and at interpreter exit. A batch that fails to commit goes back on the
+  queue and is retried; interactive callers can pass `wait=True` to commit
+  before the ticket is reported as created.
+
+Usage:
+    store = TicketStore("output/support_tickets.db")
+    ticket = store.submit("alice@contoso.com", "Cannot access the portal")
+    store.find_by_email("alice@contoso.com")
+"""
+
+import atexit
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id  TEXT PRIMARY KEY,
+    email      TEXT NOT NULL,
+    issue      TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_email ON tickets (email, created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets (created_at);
+"""
+
+_COLUMNS = ("ticket_id", "email", "issue", "status", "created_at")
+
+
+def new_ticket_id(now: Optional[datetime] = None) -> str:
+    """Readable, sortable and unique: TICKET-20250101120000-3F9A1C2B7D41."""
+    now = now or datetime.now()
+    return f"TICKET-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12].upper()}"
+
+
+class TicketStore:
+    """Support tickets in SQLite with indexed lookups and batched writes."""
+
+    def __init__(self, db_path: str | Path, batch_size: int = 50, flush_interval_s: float = 0.5):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+        self._db_lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._wakeup = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="ticket-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def submit(self, email: str, issue: str, status: str = "submitted", wait: bool = False) -> dict:
+        """
+        Queue a new ticket and return it.
+
+        It is committed with the next batch, or before returning when `wait` is
+        True. A failed commit then raises and the ticket is discarded, while the
+        other queued tickets stay queued for the next attempt.
+        """
+        now = datetime.now()
+        ticket = {
+            "ticket_id": new_ticket_id(now),
+            "email": email.strip().lower(),
+            "issue": issue,
+            "status": status,
+            "created_at": now.isoformat(),
+        }
+        row = tuple(ticket[c] for c in _COLUMNS)
+        with self._wakeup:
+            if self._closed:
+                raise RuntimeError("Ticket store is closed")
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.notify()
+        if wait:
+            try:
+                self.flush()
+            except Exception:
+                with self._wakeup:
+                    if row in self._pending:
+                        self._pending.remove(row)
+                raise
+        return ticket
+
+    def update_status(self, ticket_id: str, status: str) -> bool:
+        self.flush()
+        with self._db_lock:
+            cursor = self._db.execute("UPDATE tickets SET status = ? WHERE ticket_id = ?", (status, ticket_id))
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def flush(self):
+        """Commit all queued tickets in one transaction."""
+        # Take the batch while holding the db lock, so a read after flush() sees every earlier submit
+        with self._db_lock:
+            with self._wakeup:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                with self._db:
+                    self._db.executemany(
+                        f"INSERT INTO tickets ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                        batch,
+                    )
+            except Exception:
+                # The transaction was rolled back; keep the tickets (in order) for the next flush
+                with self._wakeup:
+                    self._pending[:0] = batch
+                raise
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                if self._closed:
+                    return
+                self._wakeup.wait(self.flush_interval_s)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Ticket store: failed to write batch, will retry - {e}")
+
+    def close(self):
+        with self._wakeup:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        self.flush()
+        with self._db_lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def get(self, ticket_id: str) -> Optional[dict]:
+        rows = self._query("SELECT * FROM tickets WHERE ticket_id = ?", (ticket_id.strip(),))
+        return rows[0] if rows else None
+
+    def find_by_email(self, email: str, limit: int = 20) -> List[dict]:
+        """Newest tickets first for one email address."""
+        return self._query(
+            "SELECT * FROM tickets WHERE email = ? ORDER BY created_at DESC LIMIT ?",
+            (email.strip().lower(), limit),
+        )
+
+    def find_recent(self, hours: float = 24, limit: int = 50) -> List[dict]:
+        """Tickets created in the last `hours`, newest first."""
+        since = (datetime.now() - timedelta(hours=hours)).isoformat()
+        return self._query(
+            "SELECT * FROM tickets WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?",
+            (since, limit),
+        )
+
+    def count(self) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
@@ -0,0 +1,134 @@
+"""
+Tool Executor
+
+Runs the independent tool calls of one model turn concurrently, so a turn
+with several tool calls costs max(tool latency) instead of the sum.
+
+- async tools are awaited together with asyncio.gather
+- sync tools run in a bounded thread pool and never block the event loop
+- outputs keep the order of the tool calls
+- every call has a timeout (default or per tool); a timed-out or failing
+  call returns a JSON error output instead of failing the whole turn
+- sync tools listed in `serial` (e.g. tools that prompt with input()) run
+  one at a time on a dedicated worker thread
+
+Usage with a manual Azure AI Agents run loop:
+    executor = ToolExecutor(user_functions, timeouts={"submit_support_ticket": 10})
+    if run.status == "requires_action":
+        tool_outputs = executor.execute_tool_calls(run.required_action.submit_tool_outputs.tool_calls)
+        agents_client.runs.submit_tool_outputs(thread_id=thread.id, run_id=run.id, tool_outputs=tool_outputs)
+
+Use `await executor.aexecute_tool_calls(...)` when already inside an event loop.
+
+Frameworks that already invoke the tool calls of a turn concurrently (e.g.
+Agent Framework) only need sync tools moved off the event loop:
+    @executor.offload(timeout=15)
+    def get_todos(...) -> str: ...
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_NO_TIMEOUT = object()
+
+
+class ToolExecutor:
+    """Executes batches of tool calls concurrently with ordered outputs and per-tool timeouts."""
+
+    def __init__(
+        self,
+        functions: Iterable[Callable] | Dict[str, Callable],
+        max_workers: int = 8,
+        default_timeout: Optional[float] = 30,
+        timeouts: Optional[Dict[str, Optional[float]]] = None,
+        serial: Iterable[str] = (),
+    ):
+        if isinstance(functions, dict):
+            self.functions = dict(functions)
+        else:
+            self.functions = {func.__name__: func for func in functions}
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.serial = set(serial)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._serial_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool-serial")
+
+    def timeout_for(self, name: str) -> Optional[float]:
+        """Timeout in seconds for a tool (None = wait forever)."""
+        timeout = self.timeouts.get(name, _NO_TIMEOUT)
+        return self.default_timeout if timeout is _NO_TIMEOUT else timeout
+
+    async def call(self, name: str, arguments: Dict[str, Any] | str | None = None) -> Any:
+        """Run one tool: awaited if async, in the thread pool if sync. Raises on error or timeout."""
+        func = self.functions.get(name)
+        if func is None:
+            raise ValueError(f"Unknown function: {name}")
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        arguments = arguments or {}
+
+        if inspect.iscoroutinefunction(func):
+            awaitable = func(**arguments)
+        else:
+            pool = self._serial_pool if name in self.serial else self._pool
+            awaitable = asyncio.get_running_loop().run_in_executor(pool, functools.partial(func, **arguments))
+
+        # A sync tool that times out keeps its worker thread until it returns; its result is discarded
+        return await asyncio.wait_for(awaitable, self.timeout_for(name))
+
+    def offload(self, func: Optional[Callable] = None, *, timeout: Any = _NO_TIMEOUT):
+        """Decorator turning a sync tool into an async one that runs in the thread pool with a timeout.
+
+        Name, docstring and signature are kept, so the tool schema does not change.
+        """
+        def decorate(func: Callable):
+            name = func.__name__
+            self.functions[name] = func
+            if timeout is not _NO_TIMEOUT:
+                self.timeouts[name] = timeout
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs)),
+                    self.timeout_for(name),
+                )
+
+            return wrapper
+
+        return decorate(func) if func is not None else decorate
+
+    async def _output(self, name: str, arguments) -> str:
+        try:
+            result = await self.call(name, arguments)
+        except asyncio.TimeoutError:
+            return json.dumps({"error": f"{name} timed out after {self.timeout_for(name)}s"})
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+        if isinstance(result, str):
+            return result
+        if hasattr(result, "model_dump"):
+            result = result.model_dump()
+        return json.dumps(result, default=str)
+
+    async def run(self, calls: Iterable[tuple[str, Dict[str, Any] | str | None]]) -> List[str]:
+        """Run (name, arguments) pairs concurrently; outputs are returned in the same order."""
+        return list(await asyncio.gather(*(self._output(name, arguments) for name, arguments in calls)))
+
+    async def aexecute_tool_calls(self, tool_calls) -> List[dict]:
+        """Execute Azure AI Agents function tool calls and build the `tool_outputs` to submit."""
+        outputs = await self.run((call.function.name, call.function.arguments) for call in tool_calls)
+        return [{"tool_call_id": call.id, "output": output} for call, output in zip(tool_calls, outputs)]
+
+    def execute_tool_calls(self, tool_calls) -> List[dict]:
+        """Blocking variant of `aexecute_tool_calls` for synchronous run loops."""
+        return asyncio.run(self.aexecute_tool_calls(tool_calls))
+
+    def shutdown(self):
+        for pool in (self._pool, self._serial_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
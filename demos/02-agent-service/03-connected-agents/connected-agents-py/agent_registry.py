@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+__all__ = ["AgentRegistry", "definition_hash"]
+
+HASH_METADATA_KEY = "definition_hash"
+
+
+def _plain(value: Any) -> Any:
+    """Convert SDK models (tool definitions etc.) into JSON-serializable data."""
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def definition_hash(model: str, instructions: str, tools: Optional[List[Any]] = None, **settings: Any) -> str:
+    """Stable hash of everything that defines an agent's behavior."""
+    definition = {
+        "model": model,
+        "instructions": instructions.strip(),
+        "tools": _plain(tools or []),
+        "settings": _plain(settings),
+    }
+    canonical = json.dumps(definition, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AgentRegistry:
+    """
+    Reuses agents on the Azure AI Agent Service across runs instead of creating them every time.
+
+    Each agent definition (model, instructions, tools, settings) is hashed. The
+    name -> (id, hash) mapping is cached in a local JSON file and the hash is
+    stored in the agent's metadata:
+    - same name and hash: the existing agent is reused (one get_agent call to verify it still exists)
+    - same name, different hash: the existing agent is updated in place
+    - unknown name: an existing remote agent with that name is adopted, otherwise one is created
+
+    The remote agent list is fetched at most once per registry, and only when the
+    local cache misses.
+    """
+
+    def __init__(self, agents_client, cache_path: str, verify_remote: bool = True):
+        """
+        Initialize the registry.
+
+        Args:
+            agents_client: Synchronous azure.ai.agents AgentsClient
+            cache_path: JSON file that stores the name -> id/hash mapping
+            verify_remote: Check with get_agent() that a cached agent still exists
+        """
+        self.agents_client = agents_client
+        self.cache_path = cache_path
+        self.verify_remote = verify_remote
+        self.stats = {"reused": 0, "updated": 0, "created": 0, "adopted": 0}
+        self._lock = threading.Lock()
+        self._remote_by_name = None
+        self._cache = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self._cache, file, indent=2)
+        os.replace(temp_path, self.cache_path)
+
+    def _remember(self, name: str, agent, digest: str) -> None:
+        self._cache[name] = {"id": agent.id, "hash": digest, "updated_at": datetime.now().isoformat(timespec="seconds")}
+        self._save()
+
+    def _find_remote(self, name: str):
+        if self._remote_by_name is None:
+            self._remote_by_name = {}
+            for agent in self.agents_client.list_agents():
+                self._remote_by_name.setdefault(agent.name, agent)
+        return self._remote_by_name.get(name)
+
+    def ensure_agent(self, name: str, model: str, instructions: str, tools: Optional[List[Any]] = None,
+                     **settings: Any):
+        """Return an agent with this definition, reusing, updating or creating it as needed."""
+        digest = definition_hash(model, instructions, tools, **settings)
+        with self._lock:
+            cached = self._cache.get(name)
+            agent = None
+            if cached is not None:
+                if not self.verify_remote and cached["hash"] == digest:
+                    self.stats["reused"] += 1
+                    return _CachedAgent(cached["id"], name)
+                try:
+                    agent = self.agents_client.get_agent(cached["id"])
+                except Exception:
+                    logging.info(f"Cached agent {name} ({cached['id']}) no longer exists.")
+                    agent = None
+            if agent is None:
+                agent = self._find_remote(name)
+                if agent is not None:
+                    self.stats["adopted"] += 1
+
+            if agent is not None and (agent.metadata or {}).get(HASH_METADATA_KEY) == digest:
+                logging.info(f"Reusing agent {name}: id={agent.id}")
+                self.stats["reused"] += 1
+            elif agent is not None:
+                logging.info(f"Definition of agent {name} changed, updating id={agent.id} ...")
+                agent = self.agents_client.update_agent(
+                    agent.id,
+                    model=model,
+                    instructions=instructions,
+                    tools=tools,
+                    metadata={**(agent.metadata or {}), HASH_METADATA_KEY: digest},
+                    **settings
+                )
+                self.stats["updated"] += 1
+            else:
+                logging.info(f"Creating agent {name} ...")
+                agent = self.agents_client.create_agent(
+                    model=model,
+                    name=name,
+                    instructions=instructions,
+                    tools=tools,
+                    metadata={HASH_METADATA_KEY: digest},
+                    **settings
+                )
+                self.stats["created"] += 1
+            self._remember(name, agent, digest)
+            return agent
+
+    def delete(self, name: str) -> None:
+        """Delete an agent on the service and forget it."""
+        with self._lock:
+            cached = self._cache.pop(name, None)
+            if cached is not None:
+                self.agents_client.delete_agent(cached["id"])
+                self._save()
+
+    def delete_all(self) -> None:
+        for name in list(self._cache):
+            self.delete(name)
+
+
+class _CachedAgent:
+    """Agent reference taken from the local cache without asking the service."""
+
+    def __init__(self, agent_id: str, name: str):
+        self.id = agent_id
+        self.name = name
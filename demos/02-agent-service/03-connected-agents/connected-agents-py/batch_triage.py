@@ -0,0 +1,226 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+__all__ = ["Ticket", "BatchStats", "BatchTriage", "load_tickets"]
+
+# Column / key names accepted for the ticket id and text
+ID_KEYS = ("id", "ticket_id", "key")
+TEXT_KEYS = ("text", "description", "ticket", "prompt", "summary")
+
+
+@dataclass
+class Ticket:
+    """One ticket read from the batch input."""
+    id: str
+    text: str
+
+
+def _ticket_from_row(row: Dict[str, object], row_number: int) -> Optional[Ticket]:
+    fields = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    text = next((str(fields[k]).strip() for k in TEXT_KEYS if fields.get(k)), "")
+    if not text:
+        logging.warning(f"Skipping row {row_number}: no ticket text (expected one of {', '.join(TEXT_KEYS)})")
+        return None
+    ticket_id = next((str(fields[k]).strip() for k in ID_KEYS if fields.get(k)), f"row-{row_number}")
+    return Ticket(id=ticket_id, text=text)
+
+
+def load_tickets(path: str) -> List[Ticket]:
+    """
+    Read tickets from a CSV file (header row required) or a JSONL file (one object per line).
+
+    The text comes from the first of the columns/keys text, description, ticket, prompt, summary;
+    the id from id, ticket_id or key, falling back to the row number.
+    """
+    tickets = []
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8-sig") as file:
+            for row_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logging.warning(f"Skipping line {row_number}: invalid JSON ({e})")
+                    continue
+                ticket = _ticket_from_row(row, row_number)
+                if ticket:
+                    tickets.append(ticket)
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as file:
+            for row_number, row in enumerate(csv.DictReader(file), start=2):
+                ticket = _ticket_from_row(row, row_number)
+                if ticket:
+                    tickets.append(ticket)
+
+    seen: Set[str] = set()
+    unique = []
+    for ticket in tickets:
+        if ticket.id in seen:
+            logging.warning(f"Skipping duplicate ticket id {ticket.id}")
+            continue
+        seen.add(ticket.id)
+        unique.append(ticket)
+    return unique
+
+
+@dataclass
+class BatchStats:
+    """Throughput, latency and token usage of one batch run."""
+    total: int = 0
+    resumed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    token_usage_in: int = 0
+    token_usage_out: int = 0
+    elapsed_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def report(self) -> str:
+        minutes = self.elapsed_seconds / 60 or 1e-9
+        tokens = self.token_usage_in + self.token_usage_out
+        per_ticket = tokens / self.succeeded if self.succeeded else 0
+        return "\n".join([
+            "=" * 60,
+            "BATCH TRIAGE",
+            "=" * 60,
+            f"Tickets: {self.total} total, {self.resumed} already done, "
+            f"{self.succeeded} triaged, {self.failed} failed",
+            f"Elapsed: {self.elapsed_seconds:.1f}s, throughput {self.processed / minutes:.1f} tickets/min",
+            f"Latency per ticket: p50 {self.percentile(50):.1f}s, p95 {self.percentile(95):.1f}s, "
+            f"max {max(self.latencies, default=0.0):.1f}s",
+            f"Tokens: in={self.token_usage_in} out={self.token_usage_out} ({per_ticket:.0f} per ticket)",
+        ])
+
+
+class BatchTriage:
+    """
+    Triage a queue of tickets through a bounded pool of async workers.
+
+    Every result is appended to a JSONL file as soon as it is available, and
+    that file doubles as the checkpoint: on start, tickets that already have
+    a successful result are skipped, so a crashed or interrupted run resumes
+    where it left off. Failed tickets are recorded too and retried on the
+    next run.
+    """
+
+    def __init__(self, triage: Callable[[str], Awaitable[object]], output_path: str, workers: int = 8,
+                 progress_every: int = 25):
+        """
+        Initialize the batch.
+
+        Args:
+            triage: Async function that triages one ticket text and returns a TriageResult
+            output_path: JSONL file results are appended to (also the checkpoint)
+            workers: Number of tickets triaged concurrently
+            progress_every: Log progress after this many processed tickets
+        """
+        self.triage = triage
+        self.output_path = output_path
+        self.workers = max(1, workers)
+        self.progress_every = progress_every
+        self.stats = BatchStats()
+
+    def completed_ids(self) -> Set[str]:
+        """Ids of tickets that already have a successful result in the output file."""
+        done: Set[str] = set()
+        try:
+            # errors="replace": a crash may have cut the last record inside a multibyte character
+            with open(self.output_path, "r", encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partially written line from an interrupted run
+                    if isinstance(record, dict) and record.get("status") == "ok" and record.get("id"):
+                        done.add(record["id"])
+        except FileNotFoundError:
+            pass
+        return done
+
+    def _open_output(self):
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        # Terminate a line cut off by a crash, so the next record starts on its own line.
+        # Checked in binary mode: the cut may be inside a multibyte character.
+        with open(self.output_path, "ab+") as file:
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+        return open(self.output_path, "a", encoding="utf-8")
+
+    async def _triage_one(self, ticket: Ticket) -> dict:
+        start = time.perf_counter()
+        record = {"id": ticket.id, "ticket": ticket.text}
+        try:
+            result = await self.triage(ticket.text)
+            record.update(status="ok" if result.resolution else "failed", resolution=result.resolution,
+                          token_usage_in=result.token_usage_in, token_usage_out=result.token_usage_out)
+        except Exception as e:
+            logging.error(f"Ticket {ticket.id} failed: {e}")
+            record.update(status="failed", error=str(e))
+        record["seconds"] = round(time.perf_counter() - start, 2)
+        record["timestamp"] = datetime.now().isoformat(timespec="seconds")
+        return record
+
+    def _account(self, record: dict) -> None:
+        stats = self.stats
+        if record["status"] == "ok":
+            stats.succeeded += 1
+            stats.latencies.append(record["seconds"])
+        else:
+            stats.failed += 1
+        stats.token_usage_in += record.get("token_usage_in", 0)
+        stats.token_usage_out += record.get("token_usage_out", 0)
+        if self.progress_every and stats.processed % self.progress_every == 0:
+            elapsed = time.perf_counter() - self._start
+            logging.info(f"Batch progress: {stats.processed}/{stats.total - stats.resumed} "
+                         f"({stats.processed / elapsed * 60:.1f} tickets/min, {stats.failed} failed)")
+
+    async def run(self, tickets: List[Ticket]) -> BatchStats:
+        """Triage all tickets without a successful result yet and return the batch statistics."""
+        done = self.completed_ids()
+        pending = [t for t in tickets if t.id not in done]
+        self.stats = BatchStats(total=len(tickets), resumed=len(tickets) - len(pending))
+        if self.stats.resumed:
+            logging.info(f"Resuming: {self.stats.resumed} of {len(tickets)} tickets already triaged")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for ticket in pending:
+            queue.put_nowait(ticket)
+        self._start = time.perf_counter()
+
+        with self._open_output() as output:
+            async def worker() -> None:
+                while True:
+                    try:
+                        ticket = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._triage_one(ticket)
+                    # Written from the event loop thread only, one complete line per ticket
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    self._account(record)
+
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(pending)))))
+
+        self.stats.elapsed_seconds = time.perf_counter() - self._start
+        return self.stats
@@ -2,8 +2,13 @@
 import logging
 from dotenv import load_dotenv
 from datetime import datetime
+import asyncio
 import io
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
 
 # Add references
 from azure.ai.agents import AgentsClient
@@ -16,9 +21,23 @@ from log_util import LogUtil, vdebug
 # Import diagram generator
 from diagram_generator import MermaidDiagramGenerator
 
+# Import agent registry (reuses agents across runs)
+from agent_registry import AgentRegistry
+
+# Import batch triage (queue of tickets from CSV/JSONL)
+from batch_triage import BatchStats, BatchTriage, load_tickets
+
 """Connected Agents triage demo using Azure AI AgentsClient.
 Applies migration guidance from upgrade.md: standalone AgentsClient, updated env handling,
 Windows UTF-8 console configuration, and ticket folder nested under output path.
+
+TRIAGE_MODE selects how the specialist agents are used:
+- connected: the orchestrator calls them as ConnectedAgentTools (usually one after another)
+- parallel:  the three specialists run concurrently and a synthesis agent merges their answers
+- compare:   both modes, with per-agent and total latency side by side
+
+When TICKETS_FILE points to a CSV or JSONL file, all its tickets are triaged
+by a pool of BATCH_WORKERS workers instead of the single sample prompt.
 """
 
 # Load environment variables early
@@ -36,6 +55,12 @@ except Exception:
 # Read logging configuration from environment
 verbose_output = os.getenv("VERBOSE_OUTPUT", "false") == "true"
 create_mermaid_diagram = os.getenv("CREATE_MERMAID_DIAGRAM", "false") == "true"
+triage_mode = os.getenv("TRIAGE_MODE", "connected").lower()
+delete_agents_on_exit = os.getenv("DELETE_AGENTS_ON_EXIT", "false") == "true"
+
+# Batch triage settings (batch mode is used when a tickets file is given)
+tickets_file = os.getenv("TICKETS_FILE")
+batch_workers = int(os.getenv("BATCH_WORKERS", "8"))
 
 # Derive ticket folder path nested under output path per requirement
 output_path = os.getenv("OUTPUT_PATH", "./output")
@@ -45,6 +70,12 @@ ticket_folder = os.path.join(output_path, ticket_folder_name)
 # Ensure base output directory exists early (ticket subfolder created later by generator)
 os.makedirs(output_path, exist_ok=True)
 
+# Local cache of agent name -> id/definition hash, so warm runs reuse the agents
+agent_registry_path = os.path.join(output_path, "agent_registry.json")
+
+# Batch results, appended per ticket; also the checkpoint a restarted batch resumes from
+batch_output_path = os.getenv("BATCH_OUTPUT", os.path.join(output_path, "triage-results.jsonl"))
+
 # Setup logging with explicit parameters
 logging_config = LogUtil()
 logging_config.setup_logging(verbose=verbose_output)
@@ -59,6 +90,14 @@ else:
     logging.info(f"Using project endpoint: {project_endpoint}")
     logging.info(f"Using model deployment: {model_deployment}")
 
+if triage_mode not in ("connected", "parallel", "compare"):
+    logging.warning(f"Unknown TRIAGE_MODE '{triage_mode}', using 'connected'.")
+    triage_mode = "connected"
+
+if tickets_file and triage_mode == "compare":
+    logging.warning("TRIAGE_MODE 'compare' is not supported for batches, using 'connected'.")
+    triage_mode = "connected"
+
 # Priority agent definition
 priority_agent_name = "priority_agent"
 priority_agent_instructions = """
@@ -101,93 +140,58 @@ Base your estimate on the complexity implied by the ticket. Respond with the eff
 
 # Instructions for the orchestrator agent
 orchestrator_agent_instructions = """
-Triage the given ticket. Use the connected tools to determine the ticket's priority, 
+Triage the given ticket. Use the connected tools to determine the ticket's priority,
 which team it should be assigned to, and how much effort it may take.
 """
 
-# Connect to the agents client
-logging.info("Initializing AgentsClient ...")
-agents_client = AgentsClient(
-    endpoint=project_endpoint,
-    credential=DefaultAzureCredential(
-        exclude_environment_credential=True,
-        exclude_managed_identity_credential=True
-    ),
-)
-logging.info("AgentsClient initialized.")
+# Synthesis agent definition (parallel mode: merges the specialist answers in one call)
+synthesis_agent_name = "synthesis_agent"
+synthesis_agent_instructions = """
+Combine the assessments of the priority, team and effort specialists into one ticket triage.
+Respond with the priority, the owning team and the effort, each with a one-line reason.
+"""
 
-with agents_client:
 
-    # Create the priority agent on the Azure AI agent service
-    logging.info("Creating priority agent ...")
-    priority_agent = agents_client.create_agent(
-        model=model_deployment,
-        name=priority_agent_name,
-        instructions=priority_agent_instructions
-    )
-    logging.info(f"Priority agent created: id={priority_agent.id}")
+@dataclass
+class TriageResult:
+    """Outcome of triaging one ticket in one mode."""
+    mode: str
+    resolution: str = ""
+    latency: Dict[str, float] = field(default_factory=dict)  # seconds per agent run
+    total_seconds: float = 0.0
+    token_usage_in: int = 0
+    token_usage_out: int = 0
 
-    # Create a connected agent tool for the priority agent
-    priority_agent_tool = ConnectedAgentTool(
-        id=priority_agent.id, 
-        name=priority_agent_name, 
-        description="Assess the priority of a ticket"
-    )
+    def add_usage(self, run) -> None:
+        usage = getattr(run, "usage", None)
+        self.token_usage_in += getattr(usage, "prompt_tokens", 0) or 0
+        self.token_usage_out += getattr(usage, "completion_tokens", 0) or 0
 
-    # Create the team agent and connected tool
-    logging.info("Creating team agent ...")
-    team_agent = agents_client.create_agent(
-        model=model_deployment,
-        name=team_agent_name,
-        instructions=team_agent_instructions
-    )
-    logging.info(f"Team agent created: id={team_agent.id}")
-    
-    team_agent_tool = ConnectedAgentTool(
-        id=team_agent.id, 
-        name=team_agent_name, 
-        description="Determines which team should take the ticket"
-    )
-    
-    # Create the effort agent and connected tool
-    logging.info("Creating effort agent ...")
-    effort_agent = agents_client.create_agent(
-        model=model_deployment,
-        name=effort_agent_name,
-        instructions=effort_agent_instructions
-    )
-    logging.info(f"Effort agent created: id={effort_agent.id}")
-    
-    effort_agent_tool = ConnectedAgentTool(
-        id=effort_agent.id, 
-        name=effort_agent_name, 
-        description="Determines the effort required to complete the ticket"
-    )
 
-    # Create a main agent with the Connected Agent tools
-    logging.info("Creating triage agent with connected tools ...")
-    agent = agents_client.create_agent(
-        model=model_deployment,
-        name="orchestrator-agent",
-        instructions=orchestrator_agent_instructions,
-        tools=[
-            priority_agent_tool.definitions[0],
-            team_agent_tool.definitions[0],
-            effort_agent_tool.definitions[0]
-        ]
-    )
-    logging.info(f"Triage agent created: id={agent.id}")
-    logging.debug(f"Tool definitions: {[t for t in agent.tools]}")
-    
+def run_agent(agent_id: str, content: str) -> Tuple[str, object, float]:
+    """Run an agent on a new thread; returns (response text, run, elapsed seconds)."""
+    start = time.perf_counter()
+    thread = agents_client.threads.create()
+    agents_client.messages.create(thread_id=thread.id, role=MessageRole.USER, content=content)
+    run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent_id)
+    elapsed = time.perf_counter() - start
+    if run.status == "failed":
+        logging.error(f"Run {run.id} of agent {agent_id} failed: {run.last_error}")
+        return "", run, elapsed
+    last_msg = agents_client.messages.get_last_message_text_by_role(thread_id=thread.id, role=MessageRole.AGENT)
+    return (last_msg.text.value.strip() if last_msg else ""), run, elapsed
+
+
+def triage_connected(orchestrator_id: str, prompt: str) -> TriageResult:
+    """Current mode: the orchestrator decides when to call the connected agents."""
+    result = TriageResult(mode="connected")
+    start = time.perf_counter()
+
     # Create thread for the chat session
     logging.info("Creating a new thread for the triage session ...")
     thread = agents_client.threads.create()
     logging.info(f"Thread created: id={thread.id}")
 
-    # Create the ticket prompt
-    prompt = "Users can't reset their password from the mobile app."
-    logging.info(f"Prompt prepared: {prompt}")
-
     # Send a prompt to the agent
     logging.info("Sending user message to thread ...")
     message = agents_client.messages.create(
@@ -196,13 +200,13 @@ with agents_client:
         content=prompt,
     )
     logging.info(f"Message sent: id={message.id}, role={message.role}")
-    
+
     # Create and process Agent run in thread with tools
     logging.info("Starting run (create_and_process) ...")
-    run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+    run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=orchestrator_id)
     logging.info(f"Run finished: id={run.id}, status={run.status}")
     logging.debug(f"Run raw object: {run}")
-    
+
     if run.status == "failed":
         logging.error(f"Run failed: {run.last_error}")
     else:
@@ -210,7 +214,6 @@ with agents_client:
 
     # Fetch and log all messages
     messages = agents_client.messages.list(thread_id=thread.id, order=ListSortOrder.ASCENDING)
-    resolution = ""
     for message in messages:
         if message.text_messages:
             last_msg = message.text_messages[-1]
@@ -219,32 +222,206 @@ with agents_client:
             logging.debug(f"Full message object: {message}")
             # Capture the assistant's final response as resolution
             if message.role == MessageRole.AGENT:
-                resolution = last_msg.text.value.strip()
-    
-    # Extract token usage from run
-    token_usage_in = getattr(run.usage, 'prompt_tokens', 0) if hasattr(run, 'usage') else 0
-    token_usage_out = getattr(run.usage, 'completion_tokens', 0) if hasattr(run, 'usage') else 0
-    
-    # Generate diagram if enabled
-    if create_mermaid_diagram:
-        logging.info("Generating Mermaid diagram ...")
-        diagram_generator = MermaidDiagramGenerator(ticket_folder_path=ticket_folder)
-        diagram_generator.save_diagram_file(
-            ticket_prompt=prompt,
-            resolution=resolution,
-            token_usage_in=token_usage_in,
-            token_usage_out=token_usage_out
-        )
-    
-    # Delete the agent when done
-    logging.info("Cleaning up agents ...")
-    agents_client.delete_agent(agent.id)
-    logging.info("Deleted triage agent.")
-
-    # Delete the connected agents when done
-    agents_client.delete_agent(priority_agent.id)
-    logging.info("Deleted priority agent.")
-    agents_client.delete_agent(team_agent.id)
-    logging.info("Deleted team agent.")
-    agents_client.delete_agent(effort_agent.id)
-    logging.info("Deleted effort agent.")
+                result.resolution = last_msg.text.value.strip()
+
+    result.total_seconds = time.perf_counter() - start
+    result.latency["orchestrator (incl. connected agents)"] = result.total_seconds
+    result.add_usage(run)
+    return result
+
+
+async def triage_parallel(specialists: List[Tuple[str, str]], synthesis_id: str, prompt: str) -> TriageResult:
+    """Run the specialist agents concurrently, then merge their answers in one synthesis run."""
+    result = TriageResult(mode="parallel")
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    logging.info(f"Running {len(specialists)} specialist agents concurrently ...")
+    outputs = await asyncio.gather(
+        *(loop.run_in_executor(None, run_agent, agent_id, prompt) for _, agent_id in specialists)
+    )
+    assessments = []
+    for (name, _), (text, run, elapsed) in zip(specialists, outputs):
+        logging.info(f"Message ({name}, {elapsed:.1f}s): {text}")
+        result.latency[name] = elapsed
+        result.add_usage(run)
+        assessments.append(f"{name}:\n{text or '(no answer)'}")
+
+    logging.info("Running synthesis agent ...")
+    synthesis_prompt = f"Ticket: {prompt}\n\nSpecialist assessments:\n\n" + "\n\n".join(assessments)
+    text, run, elapsed = await loop.run_in_executor(None, run_agent, synthesis_id, synthesis_prompt)
+    logging.info(f"Message (synthesis): {text}")
+    result.latency[synthesis_agent_name] = elapsed
+    result.add_usage(run)
+
+    result.resolution = text
+    result.total_seconds = time.perf_counter() - start
+    return result
+
+
+def print_latency_report(results: List[TriageResult]) -> None:
+    """Print per-agent and total latency of each triage mode that ran."""
+    print("\n" + "=" * 60)
+    print("TRIAGE LATENCY")
+    print("=" * 60)
+    for result in results:
+        print(f"{result.mode} mode: total {result.total_seconds:.1f}s, "
+              f"tokens in={result.token_usage_in} out={result.token_usage_out}")
+        for name, seconds in result.latency.items():
+            print(f"   {name:<40} {seconds:>6.1f}s")
+    if len(results) > 1 and results[-1].total_seconds:
+        print(f"Parallel speed-up: {results[0].total_seconds / results[-1].total_seconds:.1f}x")
+    print()
+
+
+async def triage_batch(tickets, specialists: List[Tuple[str, str]], orchestrator_id: str = None,
+                       synthesis_id: str = None) -> BatchStats:
+    """Triage a list of tickets with a bounded worker pool, reusing the same agents for every ticket."""
+    loop = asyncio.get_running_loop()
+    # Each worker blocks a thread per agent run (three concurrent runs per ticket in parallel mode)
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=batch_workers * (len(specialists) if synthesis_id else 1)))
+
+    if synthesis_id:
+        def triage(text):
+            return triage_parallel(specialists, synthesis_id, text)
+    else:
+        def triage(text):
+            return loop.run_in_executor(None, triage_connected, orchestrator_id, text)
+
+    logging.info(f"Triaging {len(tickets)} tickets in {triage_mode} mode with {batch_workers} workers "
+                 f"-> {batch_output_path}")
+    batch = BatchTriage(triage, output_path=batch_output_path, workers=batch_workers)
+    return await batch.run(tickets)
+
+
+# Connect to the agents client
+logging.info("Initializing AgentsClient ...")
+agents_client = AgentsClient(
+    endpoint=project_endpoint,
+    credential=DefaultAzureCredential(
+        exclude_environment_credential=True,
+        exclude_managed_identity_credential=True
+    ),
+)
+logging.info("AgentsClient initialized.")
+
+with agents_client:
+
+    # Agents are only created (or updated) when their definition changed since the last run
+    registry = AgentRegistry(agents_client, cache_path=agent_registry_path)
+    setup_start = time.perf_counter()
+
+    # Get the priority agent on the Azure AI agent service
+    priority_agent = registry.ensure_agent(
+        name=priority_agent_name,
+        model=model_deployment,
+        instructions=priority_agent_instructions
+    )
+    logging.info(f"Priority agent ready: id={priority_agent.id}")
+
+    # Get the team agent
+    team_agent = registry.ensure_agent(
+        name=team_agent_name,
+        model=model_deployment,
+        instructions=team_agent_instructions
+    )
+    logging.info(f"Team agent ready: id={team_agent.id}")
+
+    # Get the effort agent
+    effort_agent = registry.ensure_agent(
+        name=effort_agent_name,
+        model=model_deployment,
+        instructions=effort_agent_instructions
+    )
+    logging.info(f"Effort agent ready: id={effort_agent.id}")
+
+    specialists = [
+        (priority_agent_name, priority_agent.id),
+        (team_agent_name, team_agent.id),
+        (effort_agent_name, effort_agent.id),
+    ]
+
+    try:
+        if triage_mode in ("connected", "compare"):
+            # Create connected agent tools for the specialists
+            priority_agent_tool = ConnectedAgentTool(
+                id=priority_agent.id,
+                name=priority_agent_name,
+                description="Assess the priority of a ticket"
+            )
+            team_agent_tool = ConnectedAgentTool(
+                id=team_agent.id,
+                name=team_agent_name,
+                description="Determines which team should take the ticket"
+            )
+            effort_agent_tool = ConnectedAgentTool(
+                id=effort_agent.id,
+                name=effort_agent_name,
+                description="Determines the effort required to complete the ticket"
+            )
+
+            # Get a main agent with the Connected Agent tools
+            agent = registry.ensure_agent(
+                name="orchestrator-agent",
+                model=model_deployment,
+                instructions=orchestrator_agent_instructions,
+                tools=[
+                    priority_agent_tool.definitions[0],
+                    team_agent_tool.definitions[0],
+                    effort_agent_tool.definitions[0]
+                ]
+            )
+            logging.info(f"Triage agent ready: id={agent.id}")
+
+        if triage_mode in ("parallel", "compare"):
+            # Get the synthesis agent that merges the specialist answers
+            synthesis_agent = registry.ensure_agent(
+                name=synthesis_agent_name,
+                model=model_deployment,
+                instructions=synthesis_agent_instructions
+            )
+            logging.info(f"Synthesis agent ready: id={synthesis_agent.id}")
+
+        logging.info(f"Agents ready in {time.perf_counter() - setup_start:.1f}s: {registry.stats}")
+
+        if tickets_file:
+            tickets = load_tickets(tickets_file)
+            stats = asyncio.run(triage_batch(
+                tickets,
+                specialists,
+                orchestrator_id=agent.id if triage_mode == "connected" else None,
+                synthesis_id=synthesis_agent.id if triage_mode == "parallel" else None,
+            ))
+            print("\n" + stats.report() + "\n")
+            sys.exit(1 if stats.failed else 0)
+
+        # Create the ticket prompt
+        prompt = "Users can't reset their password from the mobile app."
+        logging.info(f"Prompt prepared: {prompt}")
+
+        results = []
+        if triage_mode in ("connected", "compare"):
+            results.append(triage_connected(agent.id, prompt))
+        if triage_mode in ("parallel", "compare"):
+            results.append(asyncio.run(triage_parallel(specialists, synthesis_agent.id, prompt)))
+
+        for result in results:
+            print(f"\n[{result.mode}] {result.resolution}")
+        print_latency_report(results)
+
+        # Generate diagram if enabled
+        if create_mermaid_diagram:
+            logging.info("Generating Mermaid diagram ...")
+            diagram_generator = MermaidDiagramGenerator(ticket_folder_path=ticket_folder)
+            diagram_generator.save_diagram_file(
+                ticket_prompt=prompt,
+                resolution=results[-1].resolution,
+                token_usage_in=sum(r.token_usage_in for r in results),
+                token_usage_out=sum(r.token_usage_out for r in results)
+            )
+    finally:
+        # Agents are kept for the next run unless cleanup is requested
+        if delete_agents_on_exit:
+            logging.info("Cleaning up agents ...")
+            registry.delete_all()
+            logging.info("Deleted all registered agents.")
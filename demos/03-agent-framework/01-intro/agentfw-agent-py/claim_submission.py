@@ -13,6 +13,9 @@ from log_util import LogUtil, vdebug
 # Import diagram generator
 from diagram_generator import MermaidDiagramGenerator
 
+# Import response cache middleware
+from response_cache import ResponseCache
+
 # Load environment variables early
 load_dotenv()
 
@@ -21,6 +24,7 @@ verbose_output = os.getenv("VERBOSE_OUTPUT", "false") == "true"
 create_mermaid_diagram = os.getenv("CREATE_MERMAID_DIAGRAM", "false") == "true"
 output_folder = os.getenv("OUTPUT_PATH", "./output")
 data_folder = os.getenv("DATA_PATH", "./data")
+use_response_cache = os.getenv("RESPONSE_CACHE", "true") == "true"
 
 # Setup logging with explicit parameters
 logging_config = LogUtil()
@@ -56,6 +60,16 @@ async def create_expense_claim(expenses_data):
     logging.info(f"Using project endpoint: {project_endpoint}")
     logging.info(f"Using model deployment: {model_deployment}")
 
+    # Identical expense prompts are answered from the on-disk cache without a model call
+    middleware = []
+    if use_response_cache:
+        response_cache = ResponseCache(
+            disk_path=os.path.join(output_folder, "response_cache.db"),
+            ttl_seconds=24 * 3600,
+            verbose=verbose_output,
+        )
+        middleware.append(response_cache.chat_middleware)
+
     # Create the Azure AI agent using Microsoft Agent Framework
     logging.info("Initializing Azure AI Agent with Agent Framework...")
     async with (
@@ -71,7 +85,8 @@ async def create_expense_claim(expenses_data):
             instructions="""You are an AI assistant for expense claim submission.
                             When a user submits expenses data and requests an expense claim, summarize the expenses with an itemized list and a total.
                             Then respond confirming the formatted claim.""",
-            name="expenses_agent"
+            name="expenses_agent",
+            middleware=middleware
         ) as agent,
     ):
         logging.info("Agent created successfully.")
@@ -85,6 +100,8 @@ async def create_expense_claim(expenses_data):
             result = await agent.run(prompt)
             
             logging.info("Agent response received.")
+            if use_response_cache:
+                logging.info(f"Response cache: {response_cache.stats()}")
             resolution = result.text
             logging.info(f"\n# Expense Agent:\n{resolution}")
             print(f"\n# Expense Agent:\n{resolution}")
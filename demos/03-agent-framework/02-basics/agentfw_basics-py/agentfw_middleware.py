@@ -8,12 +8,17 @@ from agent_framework.azure import AzureOpenAIChatClient
 from agent_framework import (
     AgentRunContext,
     FunctionInvocationContext,
-    ChatContext,
     agent_middleware,
     function_middleware,
-    chat_middleware
 )
 
+from utils.content_filter import ContentFilter
+from utils.latency_metrics import LatencyMetrics
+from utils.response_cache import ResponseCache
+from utils.safe_calculator import ExpressionError, SafeCalculator
+from utils.tool_cache import ToolCache
+from utils.token_accounting import TokenAccountant
+
 load_dotenv('.env')
 
 ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -23,27 +28,26 @@ API_VERSION = "2024-10-21"
 
 
 # ============================================================================
-# MIDDLEWARE 1: TIMING (Agent Middleware)
+# MIDDLEWARE 1: TIMING (Agent + Chat + Function Middleware)
 # ============================================================================
 
-@agent_middleware
-async def timing_middleware(
-    context: AgentRunContext,
-    next: Callable[[AgentRunContext], Awaitable[None]],
-) -> None:
-    """Tracks execution time for entire agent run."""
-    start_time = datetime.now()
-    print(f"\n[TIMING] Started at {start_time.strftime('%H:%M:%S')}")
-    await next(context)
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
-    print(f"[TIMING] Completed in {duration:.2f} seconds")
+# Records perf_counter_ns timings for the agent, chat and function layers into
+# preallocated histograms (total time and time-to-first-token for streams).
+latency_metrics = LatencyMetrics()
 
 
 # ============================================================================
 # MIDDLEWARE 2: SECURITY (Agent Middleware)
 # ============================================================================
 
+# Compiled once: a single trie-based regex instead of one `in` check per keyword.
+# Substring matching keeps variants like "hacking" or "passwords" blocked.
+blocked_keywords = ContentFilter(
+    ["password", "secret", "hack", "exploit", "bypass"],
+    whole_words=False,
+)
+
+
 @agent_middleware
 async def security_middleware(
     context: AgentRunContext,
@@ -55,14 +59,12 @@ async def security_middleware(
         if hasattr(last_message, 'contents'):
             for content in last_message.contents:
                 if hasattr(content, 'text'):
-                    text = str(content.text).lower()
-                    blocked_keywords = ["password", "secret", "hack", "exploit", "bypass"]
-                    for keyword in blocked_keywords:
-                        if keyword in text:
-                            print(f"\n[SECURITY] Request BLOCKED! Detected: '{keyword}'")
-                            print(f"[SECURITY] This request contains sensitive content and cannot be processed.")
-                            context.terminate = True
-                            return
+                    keyword = blocked_keywords.first_match(str(content.text))
+                    if keyword:
+                        print(f"\n[SECURITY] Request BLOCKED! Detected: '{keyword}'")
+                        print(f"[SECURITY] This request contains sensitive content and cannot be processed.")
+                        context.terminate = True
+                        return
     await next(context)
 
 
@@ -83,34 +85,57 @@ async def function_logger_middleware(
 
 
 # ============================================================================
-# MIDDLEWARE 4: TOKEN COUNTER (Chat Middleware)
+# MIDDLEWARE 4: TOKEN ACCOUNTING (Agent + Chat Middleware)
 # ============================================================================
 
-@chat_middleware
-async def token_counter_middleware(
-    context: ChatContext,
-    next: Callable[[ChatContext], Awaitable[None]],
-) -> None:
-    """Estimates and logs token usage for AI calls."""
-    total_chars = sum(len(str(msg)) for msg in context.messages)
-    estimated_input_tokens = total_chars // 4
-    print(f"\n[AI CALL] Sending request to GPT-4o")
-    print(f"[AI CALL] Messages: {len(context.messages)}")
-    print(f"[AI CALL] Estimated input tokens: ~{estimated_input_tokens}")
-    await next(context)
-    if context.result and hasattr(context.result, 'choices'):
-        if hasattr(context.result.choices[0].message, 'content'):
-            response_text = str(context.result.choices[0].message.content)
-            estimated_output_tokens = len(response_text) // 4
-            total_tokens = estimated_input_tokens + estimated_output_tokens
-            print(f"[AI CALL] Estimated output tokens: ~{estimated_output_tokens}")
-            print(f"[AI CALL] Total estimated tokens: ~{total_tokens}")
+# Uses the provider-reported usage when present, otherwise a cached tokenizer
+# count; handles streamed responses and aggregates per agent, thread and model.
+token_accountant = TokenAccountant(default_model=DEPLOYMENT)
+
+
+# ============================================================================
+# MIDDLEWARE 5: RESPONSE CACHE (Chat Middleware)
+# ============================================================================
+
+def build_embedder():
+    """Embedding function for the semantic cache tier (only if a deployment is configured)."""
+    embedding_deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "").strip()
+    if not embedding_deployment:
+        return None
+    from openai import AsyncAzureOpenAI
+    client = AsyncAzureOpenAI(azure_endpoint=ENDPOINT, api_key=API_KEY, api_version=API_VERSION)
+
+    async def embed(text: str) -> list[float]:
+        result = await client.embeddings.create(model=embedding_deployment, input=text)
+        return result.data[0].embedding
+
+    return embed
+
+
+# Exact-match cache (memory + SQLite on disk) with an optional semantic tier.
+# Hits skip the model call and replay the answer as a stream.
+response_cache = ResponseCache(
+    ttl_seconds=3600,
+    disk_path=os.path.join(os.getenv("OUTPUT_PATH", "./output").strip(), "response_cache.db"),
+    embed=build_embedder(),
+    similarity_threshold=0.95,
+)
+
+
+# ============================================================================
+# MIDDLEWARE 6: TOOL CACHE (Function Middleware)
+# ============================================================================
+
+# Tools declare themselves pure or give a TTL; identical calls are memoized
+# and concurrent identical calls are coalesced into one execution.
+tool_cache = ToolCache()
 
 
 # ============================================================================
 # DEMO TOOLS/FUNCTIONS
 # ============================================================================
 
+@tool_cache.cacheable(pure=True, normalize=str.lower)
 def get_weather(city: str) -> str:
     """Get current weather for a city."""
     weather_data = {
@@ -124,21 +149,26 @@ def get_weather(city: str) -> str:
     return weather_data.get(city.lower(), f"Weather data not available for {city}")
 
 
+calculator = SafeCalculator()
+
+
+@tool_cache.cacheable(pure=True)
 def calculate(expression: str) -> str:
     """Calculate a mathematical expression safely."""
     try:
-        allowed_names = {}
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        result = calculator.evaluate(expression)
         return f"Result: {result}"
-    except Exception as e:
+    except ExpressionError as e:
         return f"Calculation error: {str(e)}"
 
 
+@tool_cache.cacheable(ttl=1)
 def get_time() -> str:
     """Get the current time."""
     return f"Current time: {datetime.now().strftime('%I:%M:%S %p')}"
 
 
+@tool_cache.cacheable(ttl=60, normalize=str.lower)
 def search_database(query: str) -> str:
     """Simulate searching a database."""
     results = {
@@ -149,26 +179,48 @@ def search_database(query: str) -> str:
     return results.get(query.lower(), f"No results found for: {query}")
 
 
+def print_usage_summary():
+    """Print aggregated token usage and latencies and save them to OUTPUT_PATH."""
+    overall = token_accountant.snapshot()["overall"]
+    print(f"\n[TOKENS] Total: {overall['total_tokens']} tokens in {overall['calls']} calls "
+          f"(${overall['cost_usd']:.4f}, {overall['estimated_calls']} estimated)")
+    output_path = os.getenv("OUTPUT_PATH", "./output").strip()
+    saved = token_accountant.save_json(os.path.join(output_path, "token_usage.json"))
+    print(f"[TOKENS] Per agent/thread/model usage saved to {saved}")
+
+    print("\n[TIMING] Latency percentiles:")
+    for key, stats in latency_metrics.snapshot().items():
+        print(f"[TIMING]   {key:<40} n={stats['count']:<4} p50={stats['p50_ms']:.0f}ms "
+              f"p95={stats['p95_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms")
+    saved = latency_metrics.save_prometheus(os.path.join(output_path, "latency_metrics.prom"))
+    print(f"[TIMING] Prometheus snapshot saved to {saved}")
+
+    print(f"\n[CACHE] {response_cache.stats()}")
+    print(f"[TOOL CACHE] {tool_cache.stats()}")
+
+
 # ============================================================================
 # MAIN INTERACTIVE DEMO
 # ============================================================================
 
 async def main():
     print("\n" + "="*75)
-    print("COMPLETE MIDDLEWARE DEMO - All 4 Types Working Together")
+    print("COMPLETE MIDDLEWARE DEMO - All 6 Types Working Together")
     print("="*75)
     print("""
-This demo shows 4 middleware working simultaneously:
+This demo shows 6 middleware working simultaneously:
 
-1.  TIMING MIDDLEWARE (Agent)      → Tracks how long each request takes
+1.  TIMING MIDDLEWARE (All layers) → Latency histograms for runs, model calls and tools
 2.  SECURITY MIDDLEWARE (Agent)    → Blocks sensitive content
 3.  FUNCTION LOGGER (Function)     → Logs all tool calls
-4.  TOKEN COUNTER (Chat)           → Counts tokens sent to AI
+4.  TOKEN ACCOUNTING (Chat)        → Counts tokens and cost per agent, thread and model
+5.  RESPONSE CACHE (Chat)          → Serves repeated prompts without calling the model
+6.  TOOL CACHE (Function)          → Reuses results of pure/TTL tools for identical arguments
 
 Watch how they all work together in a real conversation!
 """)
     print("="*75)
-    print("\nCreating agent with all 4 middleware...\n")
+    print("\nCreating agent with all 6 middleware...\n")
     agent = AzureOpenAIChatClient(
         endpoint=ENDPOINT,
         deployment_name=DEPLOYMENT,
@@ -180,13 +232,18 @@ Watch how they all work together in a real conversation!
         Be friendly, concise, and helpful in your responses.""",
         tools=[get_weather, calculate, get_time, search_database],
         middleware=[
-            timing_middleware,
+            latency_metrics.agent_middleware,
+            latency_metrics.chat_middleware,
+            latency_metrics.function_middleware,
             security_middleware,
             function_logger_middleware,
-            token_counter_middleware,
+            tool_cache.function_middleware,
+            token_accountant.agent_middleware,
+            response_cache.chat_middleware,
+            token_accountant.chat_middleware,
         ]
     )
-    print("Agent created with 4 middleware layers.")
+    print("Agent created with 6 middleware layers.")
     print("\n" + "="*75)
     print("SUGGESTED TEST PROMPTS:")
     print("="*75)
@@ -194,15 +251,15 @@ Watch how they all work together in a real conversation!
 To see all middleware in action, try these prompts:
 
 PROMPT 1: "tell me a joke"
-   → Triggers: Timing + Token Counter
+   → Triggers: Timing + Token Accounting
    → Simple request, no functions
 
 PROMPT 2: "what's the weather in Tokyo?"
-   → Triggers: Timing + Function Logger + Token Counter
+   → Triggers: Timing + Function Logger + Token Accounting
    → Calls the get_weather function
 
 PROMPT 3: "what time is it and calculate 15 * 8"
-   → Triggers: Timing + Function Logger (2 calls) + Token Counter
+   → Triggers: Timing + Function Logger (2 calls) + Token Accounting
    → Multiple function calls
 
 PROMPT 4: "what is my password?"
@@ -210,9 +267,16 @@ PROMPT 4: "what is my password?"
    → Security middleware blocks this request!
 
 PROMPT 5: "search for users and get weather in Paris"
-   → Triggers: ALL 4 middleware
+   → Triggers: ALL 6 middleware
    → Multiple functions, shows complete flow
 
+PROMPT 6: type "new", then "tell me a joke" again
+   → Triggers: Response Cache (HIT) + Timing
+   → Same prompt on a fresh thread is served from cache
+
+PROMPT 7: "compare the weather in Tokyo and tokyo"
+   → Triggers: Tool Cache (second call reuses the first result)
+
 Type 'quit' to exit
 """)
     print("="*75 + "\n")
@@ -224,7 +288,12 @@ Type 'quit' to exit
                 continue
             if user_input.lower() in ['quit', 'exit', 'bye']:
                 print("\nDemo ended. Thanks for testing all the middleware.")
+                print_usage_summary()
                 break
+            if user_input.lower() == 'new':
+                thread = agent.get_new_thread()
+                print("\nStarted a new thread.\n")
+                continue
             print("\n" + "-"*75)
             print("PROCESSING YOUR REQUEST...")
             print("-"*75)
@@ -1,7 +1,6 @@
 import asyncio
 import os
 import json
-from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from agent_framework.azure import AzureOpenAIChatClient
@@ -12,7 +11,10 @@ from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from utils.telemetry_exporter import StreamingSpanExporter
+from utils.telemetry_analytics import SpanAnalytics, write_report
+from utils.safe_calculator import ExpressionError, SafeCalculator
 
 load_dotenv('.env')
 
@@ -20,301 +22,53 @@ ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 DEPLOYMENT = "gpt-4o"
 API_VERSION = "2024-10-21"
+OUTPUT_PATH = os.getenv("OUTPUT_PATH", "./output").strip()
 
 
-class CompleteTelemetryCollector(SpanExporter):
-    """Collects EVERYTHING from telemetry"""
-    
-    def __init__(self):
-        self.all_data = []
+# Styles for the per-span detail sections appended to the analytics report
+DETAIL_STYLE = """
+.trace-container{margin:12px 0;background:#fff;border-radius:10px;padding:12px;border-left:4px solid #667eea}
+.trace-title{font-weight:bold;color:#667eea}
+.trace-meta{display:flex;flex-wrap:wrap;gap:12px;font-size:.85em;color:#666;margin:6px 0}
+.section{margin-top:8px}.section-title{font-weight:bold;color:#667eea}
+.data-row{display:grid;grid-template-columns:250px 1fr;gap:10px;padding:4px;background:#f8f9fa}
+.data-key{font-weight:600}.data-value{word-break:break-word}
+.conversation{background:#e3f2fd;padding:8px;margin:4px 0;border-left:3px solid #2196f3}
+.role{font-weight:bold;color:#1976d2}
+.tool-call{background:#fff3e0;padding:8px;margin:4px 0;border-left:3px solid #ff9800}
+.tool-result{background:#e8f5e9;padding:8px;margin:4px 0;border-left:3px solid #4caf50}
+pre{background:#263238;color:#aed581;padding:8px;overflow-x:auto}
+.highlight{background:#fff59d;padding:0 4px}
+.badge{padding:2px 8px;border-radius:10px;font-size:.8em;color:#fff}
+.badge-success{background:#4caf50}.badge-info{background:#2196f3}
+"""
+
+
+class CompleteTelemetryCollector(StreamingSpanExporter):
+    """Collects EVERYTHING from telemetry, streamed to rotating JSONL files.
+
+    Spans are written to OUTPUT_PATH/telemetry as they arrive and only the
+    most recent ones stay in memory. JSON attributes are parsed when the
+    report is generated, not on the export path.
+    """
     
-    def export(self, spans):
-        for span in spans:
-            self.all_data.append(self._extract_everything(span))
-        return SpanExportResult.SUCCESS
-    
-    def _extract_everything(self, span):
-        """Extract ALL available data"""
-        duration_ms = (span.end_time - span.start_time) / 1_000_000
-        
-        attrs = dict(span.attributes) if span.attributes else {}
-        
-        # Parse JSON strings in attributes
-        parsed_attrs = {}
-        for key, value in attrs.items():
-            if isinstance(value, str) and (value.startswith('[') or value.startswith('{')):
-                try:
-                    parsed_attrs[key] = json.loads(value)
-                except:
-                    parsed_attrs[key] = value
-            else:
-                parsed_attrs[key] = value
-        
-        return {
-            'span_name': span.name,
-            'duration_ms': round(duration_ms, 2),
-            'start_time': datetime.fromtimestamp(span.start_time / 1_000_000_000).isoformat(),
-            'end_time': datetime.fromtimestamp(span.end_time / 1_000_000_000).isoformat(),
-            'status': span.status.status_code.name,
-            'trace_id': format(span.context.trace_id, '032x'),
-            'span_id': format(span.context.span_id, '016x'),
-            'attributes': parsed_attrs,
-            'events': [{'name': e.name, 'attributes': dict(e.attributes)} for e in span.events] if span.events else []
-        }
+    def __init__(self, output_dir=None, **kwargs):
+        super().__init__(output_dir=output_dir or Path(OUTPUT_PATH) / "telemetry", **kwargs)
     
     def generate_complete_html(self, output_file='complete_telemetry_report.html'):
-        """Generate comprehensive HTML report with EVERYTHING"""
-        
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Complete Agent Telemetry Report</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-            color: #333;
-        }}
-        .container {{
-            max-width: 1600px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            padding: 40px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-        }}
-        h1 {{
-            color: #667eea;
-            margin-bottom: 10px;
-            font-size: 2.5em;
-        }}
-        h2 {{
-            color: #667eea;
-            margin: 30px 0 15px 0;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-        }}
-        .timestamp {{
-            color: #666;
-            margin-bottom: 30px;
-        }}
-        .summary {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-bottom: 40px;
-        }}
-        .stat-card {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-            border-radius: 15px;
-            color: white;
-            text-align: center;
-        }}
-        .stat-value {{
-            font-size: 2em;
-            font-weight: bold;
-            margin: 10px 0;
-        }}
-        .stat-label {{
-            font-size: 0.9em;
-            opacity: 0.9;
-        }}
-        .trace-container {{
-            margin-bottom: 30px;
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 20px;
-            border-left: 5px solid #667eea;
-        }}
-        .trace-header {{
-            background: white;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 15px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        }}
-        .trace-title {{
-            font-size: 1.3em;
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 10px;
-        }}
-        .trace-meta {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 10px;
-            font-size: 0.9em;
-            color: #666;
-        }}
-        .section {{
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 15px;
-        }}
-        .section-title {{
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 10px;
-            font-size: 1.1em;
-        }}
-        .data-grid {{
-            display: grid;
-            gap: 8px;
-        }}
-        .data-row {{
-            display: grid;
-            grid-template-columns: 250px 1fr;
-            gap: 15px;
-            padding: 8px;
-            background: #f8f9fa;
-            border-radius: 5px;
-        }}
-        .data-key {{
-            font-weight: 600;
-            color: #555;
-        }}
-        .data-value {{
-            color: #333;
-            word-break: break-word;
-        }}
-        .conversation {{
-            background: #e3f2fd;
-            padding: 15px;
-            border-radius: 8px;
-            margin: 10px 0;
-            border-left: 4px solid #2196f3;
-        }}
-        .message {{
-            margin-bottom: 10px;
-        }}
-        .role {{
-            font-weight: bold;
-            color: #1976d2;
-            display: inline-block;
-            min-width: 80px;
-        }}
-        .tool-call {{
-            background: #fff3e0;
-            padding: 10px;
-            border-radius: 5px;
-            margin: 5px 0;
-            border-left: 4px solid #ff9800;
-        }}
-        .tool-result {{
-            background: #e8f5e9;
-            padding: 10px;
-            border-radius: 5px;
-            margin: 5px 0;
-            border-left: 4px solid #4caf50;
-        }}
-        pre {{
-            background: #263238;
-            color: #aed581;
-            padding: 15px;
-            border-radius: 8px;
-            overflow-x: auto;
-            margin: 10px 0;
-        }}
-        .highlight {{
-            background: #fff59d;
-            padding: 2px 5px;
-            border-radius: 3px;
-        }}
-        .badge {{
-            display: inline-block;
-            padding: 3px 10px;
-            border-radius: 12px;
-            font-size: 0.85em;
-            font-weight: 600;
-            margin-right: 5px;
-        }}
-        .badge-success {{ background: #4caf50; color: white; }}
-        .badge-info {{ background: #2196f3; color: white; }}
-        .badge-warning {{ background: #ff9800; color: white; }}
-        .chart-container {{
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 10px;
-            margin: 20px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🔍 Complete Agent Telemetry Report</h1>
-        <div class="timestamp">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
-        
-        {self._generate_summary_html()}
-        {self._generate_traces_html()}
-    </div>
-    
-    <script>
-        // Add syntax highlighting to JSON
-        document.querySelectorAll('pre').forEach(block => {{
-            if (block.textContent.trim().startsWith('{{') || block.textContent.trim().startsWith('[')) {{
-                try {{
-                    const json = JSON.parse(block.textContent);
-                    block.textContent = JSON.stringify(json, null, 2);
-                }} catch(e) {{}}
-            }}
-        }});
-    </script>
-</body>
-</html>"""
-        
-        Path(output_file).write_text(html, encoding='utf-8')
+        """Generate a compact, self-contained report: latency percentiles plus recent span details"""
+        analytics = SpanAnalytics().add_all(self.iter_spans())
+        recent = self.recent_spans(parse=True)
+        details = f"<style>{DETAIL_STYLE}</style>" + self._generate_traces_html(recent)
+        write_report(analytics, output_file, title="Complete Agent Telemetry Report", extra_html=details)
+        self.analytics = analytics
         return output_file
     
-    def _generate_summary_html(self):
-        """Generate summary statistics"""
-        total_duration = sum(d['duration_ms'] for d in self.all_data)
-        total_input_tokens = sum(d['attributes'].get('gen_ai.usage.input_tokens', 0) for d in self.all_data)
-        total_output_tokens = sum(d['attributes'].get('gen_ai.usage.output_tokens', 0) for d in self.all_data)
-        
-        agent_calls = len([d for d in self.all_data if 'invoke_agent' in d['span_name']])
-        model_calls = len([d for d in self.all_data if d['span_name'].startswith('chat')])
-        tool_calls = len([d for d in self.all_data if 'execute_tool' in d['span_name']])
-        
-        return f"""
-        <h2>📊 Summary Statistics</h2>
-        <div class="summary">
-            <div class="stat-card">
-                <div class="stat-label">Total Operations</div>
-                <div class="stat-value">{len(self.all_data)}</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-label">Agent Invocations</div>
-                <div class="stat-value">{agent_calls}</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-label">AI Model Calls</div>
-                <div class="stat-value">{model_calls}</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-label">Tool Executions</div>
-                <div class="stat-value">{tool_calls}</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-label">Total Tokens</div>
-                <div class="stat-value">{total_input_tokens + total_output_tokens:,}</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-label">Total Duration</div>
-                <div class="stat-value">{total_duration:.0f}ms</div>
-            </div>
-        </div>
-        """
-    
-    def _generate_traces_html(self):
+    def _generate_traces_html(self, spans):
         """Generate detailed trace information"""
-        html = "<h2>🔬 Detailed Traces (Everything Captured)</h2>"
+        html = f"<h2>🔬 Most Recent Spans (last {len(spans)})</h2>"
         
-        for i, trace in enumerate(self.all_data, 1):
+        for i, trace in enumerate(spans, 1):
             attrs = trace['attributes']
             
             html += f"""
@@ -481,9 +235,6 @@ class CompleteTelemetryCollector(SpanExporter):
         
         html += "</div>"
         return html
-    
-    def shutdown(self):
-        pass
 
 
 # Tools
@@ -492,12 +243,15 @@ def get_weather(city: str) -> str:
     return f"Weather in {city}: 22°C, Sunny"
 
 
+calculator = SafeCalculator()
+
+
 def calculate(expression: str) -> str:
     """Calculate a math expression."""
     try:
-        result = eval(expression, {'__builtins__': {}}, {})
+        result = calculator.evaluate(expression)
         return f"= {result}"
-    except Exception as e:
+    except ExpressionError as e:
         return f"Error: {str(e)}"
 
 
@@ -596,7 +350,13 @@ This shows EVERY piece of data OpenTelemetry captures:
     html_file = collector.generate_complete_html()
     
     print(f"✅ Complete Report: {html_file}")
-    print(f"📊 Total Operations: {len(collector.all_data)}")
+    print(f"📊 Total Operations: {collector.total_spans}")
+    print(f"🗂️  Span files: {collector.output_dir}")
+    
+    print("\n🔥 Hot paths (by total time):")
+    for name, stats in collector.analytics.hot_paths():
+        print(f"   {name:<20} count={stats.count:<5} p50={stats.percentile(50):.0f}ms "
+              f"p95={stats.percentile(95):.0f}ms p99={stats.percentile(99):.0f}ms")
     
     print(f"\n🌐 Opening report in browser...")
     
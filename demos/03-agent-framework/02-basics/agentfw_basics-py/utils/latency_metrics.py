@@ -0,0 +1,250 @@
+"""
+Latency Metrics
+
+Low-overhead latency histograms for the agent, chat and function middleware
+layers.
+
+- Timings are taken with `time.perf_counter_ns` and recorded into
+  preallocated HDR-style (log-linear) histograms: recording is a couple of
+  integer operations and one array increment, no allocation.
+- Streaming runs record time-to-first-token separately from total time.
+- `to_prometheus()` exports a snapshot in the Prometheus text exposition
+  format; `snapshot()` returns percentiles as plain dicts.
+
+Usage:
+    metrics = LatencyMetrics()
+    agent = client.create_agent(..., middleware=[metrics.agent_middleware,
+                                                 metrics.chat_middleware,
+                                                 metrics.function_middleware])
+"""
+
+import time
+from array import array
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Tuple
+
+from agent_framework import (
+    AgentRunContext,
+    ChatContext,
+    FunctionInvocationContext,
+    agent_middleware,
+    chat_middleware,
+    function_middleware,
+)
+
+# Log-linear buckets over microseconds: exact below 64us, then 32 sub-buckets
+# per power of two (~3% relative error) up to 2^40us (~12 days).
+_SUB_BITS = 6
+_SUB_COUNT = 1 << _SUB_BITS
+_HALF_COUNT = _SUB_COUNT // 2
+_MAX_SHIFT = 34
+_BUCKET_COUNT = _SUB_COUNT + _MAX_SHIFT * _HALF_COUNT
+
+# Bucket boundaries (seconds) used for the Prometheus export
+PROMETHEUS_BOUNDS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _SUB_COUNT:
+        return max(value_us, 0)
+    shift = min(value_us.bit_length() - _SUB_BITS, _MAX_SHIFT)
+    return _SUB_COUNT + (shift - 1) * _HALF_COUNT + min((value_us >> shift) - _HALF_COUNT, _HALF_COUNT - 1)
+
+
+def _bucket_upper_us(index: int) -> int:
+    """Largest value (in microseconds) that maps to a bucket."""
+    if index < _SUB_COUNT:
+        return index
+    shift, sub = divmod(index - _SUB_COUNT, _HALF_COUNT)
+    shift += 1
+    return ((sub + _HALF_COUNT + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Preallocated HDR-style histogram of durations."""
+
+    __slots__ = ("counts", "count", "sum_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * _BUCKET_COUNT))
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns: int):
+        self.counts[_bucket_index(duration_ns // 1000)] += 1
+        self.count += 1
+        self.sum_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile_ms(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, int(self.count * p / 100 + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_bucket_upper_us(index) / 1000, self.max_ns / 1_000_000)
+        return self.max_ns / 1_000_000
+
+    def cumulative_counts(self, bounds_s=PROMETHEUS_BOUNDS_S):
+        """Cumulative counts for each upper bound (seconds), as used by Prometheus `le` buckets."""
+        results = []
+        seen = 0
+        index = 0
+        for bound in bounds_s:
+            bound_us = int(bound * 1_000_000)
+            while index < _BUCKET_COUNT and _bucket_upper_us(index) <= bound_us:
+                seen += self.counts[index]
+                index += 1
+            results.append(seen)
+        return results
+
+
+class LatencyMetrics:
+    """Agent, chat and function middleware that record latencies into histograms."""
+
+    LAYERS = ("agent", "chat", "function")
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.agent_middleware = self._build_agent_middleware()
+        self.chat_middleware = self._build_chat_middleware()
+        self.function_middleware = self._build_function_middleware()
+
+    def histogram(self, layer: str, name: str, phase: str = "total") -> LatencyHistogram:
+        key = (layer, name, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    def _record_error(self, layer: str, name: str):
+        self.errors[(layer, name)] = self.errors.get((layer, name), 0) + 1
+
+    # ------------------------------------------------------------------
+    # Middleware
+    # ------------------------------------------------------------------
+
+    async def _timed_stream(self, stream, layer: str, name: str, start_ns: int):
+        """Pass a streamed result through, recording first-chunk and total time."""
+        first_ns = None
+        try:
+            async for update in stream:
+                if first_ns is None:
+                    first_ns = time.perf_counter_ns()
+                    self.histogram(layer, name, "ttft").record(first_ns - start_ns)
+                yield update
+        except Exception:
+            self._record_error(layer, name)
+            raise
+        finally:
+            total_ns = time.perf_counter_ns() - start_ns
+            self.histogram(layer, name, "total").record(total_ns)
+            if self.verbose and layer == "agent":
+                ttft = f", first token after {(first_ns - start_ns) / 1e6:.0f}ms" if first_ns else ""
+                print(f"\n[TIMING] Completed in {total_ns / 1e9:.2f} seconds{ttft}")
+
+    async def _timed(self, context, next, layer: str, name: str):
+        start_ns = time.perf_counter_ns()
+        try:
+            await next(context)
+        except Exception:
+            self._record_error(layer, name)
+            raise
+        if getattr(context, "is_streaming", False) and context.result is not None:
+            context.result = self._timed_stream(context.result, layer, name, start_ns)
+            return
+        total_ns = time.perf_counter_ns() - start_ns
+        self.histogram(layer, name, "total").record(total_ns)
+        if self.verbose and layer == "agent":
+            print(f"\n[TIMING] Completed in {total_ns / 1e9:.2f} seconds")
+
+    def _build_agent_middleware(self):
+        @agent_middleware
+        async def latency_agent_middleware(
+            context: AgentRunContext,
+            next: Callable[[AgentRunContext], Awaitable[None]],
+        ) -> None:
+            """Records total and time-to-first-token latency of agent runs."""
+            name = getattr(context.agent, "name", None) or "agent"
+            await self._timed(context, next, "agent", name)
+
+        return latency_agent_middleware
+
+    def _build_chat_middleware(self):
+        @chat_middleware
+        async def latency_chat_middleware(
+            context: ChatContext,
+            next: Callable[[ChatContext], Awaitable[None]],
+        ) -> None:
+            """Records total and time-to-first-token latency of model calls."""
+            client = getattr(context, "chat_client", None)
+            name = getattr(client, "deployment_name", None) or getattr(client, "model_id", None) or "model"
+            await self._timed(context, next, "chat", name)
+
+        return latency_chat_middleware
+
+    def _build_function_middleware(self):
+        @function_middleware
+        async def latency_function_middleware(
+            context: FunctionInvocationContext,
+            next: Callable[[FunctionInvocationContext], Awaitable[None]],
+        ) -> None:
+            """Records tool execution latency."""
+            await self._timed(context, next, "function", context.function.name)
+
+        return latency_function_middleware
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Percentiles per layer/name/phase in milliseconds."""
+        return {
+            f"{layer}/{name}/{phase}": {
+                "count": h.count,
+                "p50_ms": round(h.percentile_ms(50), 2),
+                "p95_ms": round(h.percentile_ms(95), 2),
+                "p99_ms": round(h.percentile_ms(99), 2),
+                "max_ms": round(h.max_ns / 1e6, 2),
+                "errors": self.errors.get((layer, name), 0) if phase == "total" else 0,
+            }
+            for (layer, name, phase), h in sorted(self.histograms.items())
+        }
+
+    def to_prometheus(self, prefix: str = "agent") -> str:
+        """Render all histograms in the Prometheus text exposition format."""
+        metric = f"{prefix}_latency_seconds"
+        lines = [f"# HELP {metric} Latency of agent runs, model calls and tool executions.",
+                 f"# TYPE {metric} histogram"]
+        for (layer, name, phase), h in sorted(self.histograms.items()):
+            labels = f'layer="{layer}",name="{_escape_label(name)}",phase="{phase}"'
+            for bound, cumulative in zip(PROMETHEUS_BOUNDS_S, h.cumulative_counts()):
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"{metric}_sum{{{labels}}} {h.sum_ns / 1e9:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {h.count}")
+
+        errors_metric = f"{prefix}_errors_total"
+        lines += [f"# HELP {errors_metric} Failed agent runs, model calls and tool executions.",
+                  f"# TYPE {errors_metric} counter"]
+        for (layer, name), count in sorted(self.errors.items()):
+            lines.append(f'{errors_metric}{{layer="{layer}",name="{_escape_label(name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def save_prometheus(self, file_path: str | Path, prefix: str = "agent") -> Path:
+        """Write a Prometheus text snapshot, e.g. for the node_exporter textfile collector."""
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus(prefix), encoding="utf-8")
+        return path
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
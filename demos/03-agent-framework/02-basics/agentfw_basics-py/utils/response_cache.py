@@ -0,0 +1,323 @@
+"""
+Response Cache
+
+Two-tier chat response cache middleware for repeated prompts.
+
+- Exact tier: key = hash of tenant, model, tools, options and the full message
+  list. Held in an in-memory LRU (TTL + max entries) backed by an optional
+  on-disk SQLite tier, so warm entries survive restarts.
+- Semantic tier (optional): when an `embed` function is supplied, the last
+  user message is embedded and compared (cosine similarity) with cached
+  prompts that share exactly the same preceding conversation, model and
+  tools. Hits above `similarity_threshold` are served from cache.
+
+A hit short-circuits the model call (`context.terminate = True`). If the
+caller is streaming, the cached text is replayed as a stream of updates.
+Only final text answers are cached; responses that request tool calls always
+go to the model so tools keep running.
+
+Usage:
+    cache = ResponseCache(disk_path="output/response_cache.db", ttl_seconds=3600)
+    agent = client.create_agent(..., middleware=[cache.chat_middleware])
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from agent_framework import (
+    ChatContext,
+    ChatMessage,
+    ChatResponse,
+    ChatResponseUpdate,
+    Role,
+    TextContent,
+    chat_middleware,
+)
+
+EmbedFunction = Callable[[str], Awaitable[List[float]]]
+
+
+@dataclass
+class CachedResponse:
+    """Text answer stored in the cache."""
+    text: str
+    model_id: Optional[str]
+    created_at: float
+
+
+def _content_repr(content) -> dict:
+    """Stable representation of one message content for hashing."""
+    data = {"type": type(content).__name__}
+    for attr in ("text", "name", "arguments", "call_id", "result", "uri"):
+        value = getattr(content, attr, None)
+        if value is not None:
+            data[attr] = value if isinstance(value, (str, int, float, bool)) else json.dumps(value, sort_keys=True, default=str)
+    return data
+
+
+def _message_repr(message) -> dict:
+    role = getattr(message, "role", "")
+    return {
+        "role": str(getattr(role, "value", role)),
+        "contents": [_content_repr(c) for c in getattr(message, "contents", None) or []] or getattr(message, "text", ""),
+    }
+
+
+def _hash(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """Chat middleware caching final answers per tenant, exact and (optionally) by similarity."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        disk_path: Optional[str | Path] = None,
+        embed: Optional[EmbedFunction] = None,
+        similarity_threshold: float = 0.95,
+        tenant_id: str = "default",
+        replay_chunk_chars: int = 24,
+        verbose: bool = True,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.tenant_id = tenant_id
+        self.replay_chunk_chars = replay_chunk_chars
+        self.verbose = verbose
+        self.hits = {"exact": 0, "disk": 0, "semantic": 0}
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # Semantic index: scope hash -> OrderedDict[exact key -> embedding]
+        self._vectors: dict = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, tenant TEXT, text TEXT, model_id TEXT, created_at REAL)"
+            )
+            self._db.commit()
+        self.chat_middleware = self._build_chat_middleware()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _tenant(self, context: ChatContext) -> str:
+        metadata = getattr(context, "metadata", None) or {}
+        kwargs = getattr(context, "kwargs", None) or {}
+        return str(metadata.get("tenant_id") or kwargs.get("tenant_id") or self.tenant_id)
+
+    def _scope(self, context: ChatContext, tenant: str) -> dict:
+        """Everything except the messages that changes the answer: tenant, model, tools, options."""
+        options = getattr(context, "chat_options", None)
+        client = getattr(context, "chat_client", None)
+        tools = getattr(options, "tools", None) or []
+        return {
+            "tenant": tenant,
+            "model": getattr(options, "model_id", None) or getattr(client, "deployment_name", None)
+                     or getattr(client, "model_id", None),
+            "tools": sorted(getattr(t, "name", None) or getattr(t, "__name__", str(t)) for t in tools),
+            "options": {k: getattr(options, k, None) for k in
+                        ("temperature", "top_p", "max_tokens", "response_format", "tool_choice", "instructions")},
+        }
+
+    # ------------------------------------------------------------------
+    # Storage tiers
+    # ------------------------------------------------------------------
+
+    def _expired(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.created_at > self.ttl_seconds
+
+    def _get(self, key: str) -> tuple[Optional[CachedResponse], str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry):
+                self._memory.move_to_end(key)
+                return entry, "exact"
+            if entry:
+                del self._memory[key]
+            if self._db is None:
+                return None, ""
+            row = self._db.execute(
+                "SELECT text, model_id, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None, ""
+            entry = CachedResponse(*row)
+            if self._expired(entry):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None, ""
+            self._put_memory(key, entry)
+            return entry, "disk"
+
+    def _put_memory(self, key: str, entry: CachedResponse):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _put(self, key: str, tenant: str, entry: CachedResponse):
+        with self._lock:
+            self._put_memory(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, tenant, text, model_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, tenant, entry.text, entry.model_id, entry.created_at),
+                )
+                self._db.commit()
+
+    def _semantic_lookup(self, scope_key: str, vector: List[float]) -> Optional[str]:
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            for key, candidate in self._vectors.get(scope_key, {}).items():
+                score = _cosine(vector, candidate)
+                if score >= best_score:
+                    best_key, best_score = key, score
+        return best_key
+
+    def _remember_vector(self, scope_key: str, key: str, vector: List[float]):
+        with self._lock:
+            vectors = self._vectors.setdefault(scope_key, OrderedDict())
+            vectors[key] = vector
+            while len(vectors) > self.max_entries:
+                vectors.popitem(last=False)
+
+    def clear(self, tenant: Optional[str] = None):
+        """Drop cached entries (all tenants, or just one from the disk tier)."""
+        with self._lock:
+            self._memory.clear()
+            self._vectors.clear()
+            if self._db is not None:
+                if tenant:
+                    self._db.execute("DELETE FROM responses WHERE tenant = ?", (tenant,))
+                else:
+                    self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Middleware
+    # ------------------------------------------------------------------
+
+    def _serve(self, context: ChatContext, entry: CachedResponse):
+        if context.is_streaming:
+            context.result = self._replay(entry)
+        else:
+            context.result = ChatResponse(
+                messages=[ChatMessage(role=Role.ASSISTANT, text=entry.text)],
+                model_id=entry.model_id,
+            )
+        context.terminate = True
+
+    async def _replay(self, entry: CachedResponse):
+        """Replay a cached answer as a stream of updates."""
+        step = self.replay_chunk_chars
+        for i in range(0, len(entry.text), step):
+            yield ChatResponseUpdate(
+                contents=[TextContent(text=entry.text[i:i + step])],
+                role=Role.ASSISTANT,
+                model_id=entry.model_id,
+            )
+            await asyncio.sleep(0)
+
+    async def _capture_stream(self, stream, on_complete: Callable[[str, Optional[str]], None]):
+        """Pass updates through; cache the text only if the stream finished without tool calls."""
+        parts, model_id, has_tool_call = [], None, False
+        async for update in stream:
+            for content in getattr(update, "contents", None) or []:
+                if getattr(content, "call_id", None) is not None:
+                    has_tool_call = True
+                elif getattr(content, "text", None):
+                    parts.append(content.text)
+            model_id = getattr(update, "model_id", None) or model_id
+            yield update
+        if parts and not has_tool_call:
+            on_complete("".join(parts), model_id)
+
+    def _build_chat_middleware(self):
+        @chat_middleware
+        async def response_cache_middleware(
+            context: ChatContext,
+            next: Callable[[ChatContext], Awaitable[None]],
+        ) -> None:
+            """Serves repeated prompts from cache and stores new final answers."""
+            tenant = self._tenant(context)
+            scope = self._scope(context, tenant)
+            messages = [_message_repr(m) for m in context.messages]
+            key = _hash({"scope": scope, "messages": messages})
+
+            entry, tier = self._get(key)
+            vector, scope_key, last_text = None, None, ""
+            if entry is None and self.embed and context.messages:
+                last = context.messages[-1]
+                last_text = getattr(last, "text", "") or ""
+                if _message_repr(last)["role"] == "user" and last_text:
+                    # Similar prompts only match when everything before them is identical
+                    scope_key = _hash({"scope": scope, "messages": messages[:-1]})
+                    vector = await self.embed(last_text)
+                    similar_key = self._semantic_lookup(scope_key, vector)
+                    if similar_key:
+                        entry, _ = self._get(similar_key)
+                        tier = "semantic"
+
+            if entry is not None:
+                self.hits[tier] += 1
+                if self.verbose:
+                    print(f"\n[CACHE] {tier} hit ({tenant}) - model call skipped")
+                self._serve(context, entry)
+                return
+
+            self.misses += 1
+
+            def store(text: str, model_id: Optional[str]):
+                self._put(key, tenant, CachedResponse(text, model_id, time.time()))
+                if vector is not None:
+                    self._remember_vector(scope_key, key, vector)
+
+            await next(context)
+
+            if context.is_streaming and context.result is not None:
+                context.result = self._capture_stream(context.result, store)
+            elif context.result is not None:
+                response = context.result
+                has_tool_call = any(
+                    getattr(c, "call_id", None) is not None
+                    for m in getattr(response, "messages", []) or []
+                    for c in getattr(m, "contents", None) or []
+                )
+                if response.text and not has_tool_call:
+                    store(response.text, getattr(response, "model_id", None))
+
+        return response_cache_middleware
+
+    def stats(self) -> dict:
+        total = sum(self.hits.values()) + self.misses
+        return {
+            **{f"{tier}_hits": count for tier, count in self.hits.items()},
+            "misses": self.misses,
+            "hit_rate": round(sum(self.hits.values()) / total, 3) if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
@@ -0,0 +1,230 @@
+"""
+Telemetry Analytics
+
+Offline aggregation of exported spans into per-span-type statistics.
+
+Spans are grouped by span name, model and tool. Each group keeps a fixed-size
+log-scale latency histogram (p50/p95/p99 without storing every duration),
+token totals and error counts, so memory stays constant no matter how many
+spans are analyzed. `render_html` turns the result into a compact,
+self-contained report (inline CSS/SVG, no CDN) that works offline.
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Histogram covers 0.1ms .. ~25min with ~5% relative bucket width
+_HISTOGRAM_MIN_MS = 0.1
+_HISTOGRAM_GROWTH = 1.05
+_HISTOGRAM_BUCKETS = 340
+
+
+def _bucket_index(duration_ms: float) -> int:
+    if duration_ms <= _HISTOGRAM_MIN_MS:
+        return 0
+    index = int(math.log(duration_ms / _HISTOGRAM_MIN_MS, _HISTOGRAM_GROWTH)) + 1
+    return min(index, _HISTOGRAM_BUCKETS - 1)
+
+
+def _bucket_upper_bound(index: int) -> float:
+    return _HISTOGRAM_MIN_MS * _HISTOGRAM_GROWTH ** index
+
+
+@dataclass
+class LatencyStats:
+    """Aggregated latency, token and error statistics for one group of spans."""
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * _HISTOGRAM_BUCKETS)
+
+    def add(self, duration_ms: float, is_error: bool, input_tokens: int, output_tokens: int):
+        self.count += 1
+        self.errors += int(is_error)
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.buckets[_bucket_index(duration_ms)] += 1
+
+    def percentile(self, p: float) -> float:
+        """Approximate percentile (upper bound of the matching bucket, capped at max)."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max_ms)
+        return self.max_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'p99_ms': round(self.percentile(99), 2),
+            'mean_ms': round(self.mean_ms, 2),
+            'max_ms': round(self.max_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'error_rate': round(self.error_rate, 4),
+        }
+
+
+def _span_type(span_name: str) -> str:
+    """Collapse span names like 'chat gpt-4o' or 'execute_tool get_weather' to their operation."""
+    return span_name.split(' ', 1)[0] if span_name else 'unknown'
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class SpanAnalytics:
+    """Streams span records once and aggregates them by span type, model and tool."""
+
+    DIMENSIONS = ('span', 'model', 'tool')
+
+    def __init__(self):
+        self.overall = LatencyStats()
+        self.groups: Dict[str, Dict[str, LatencyStats]] = {d: {} for d in self.DIMENSIONS}
+        self.first_start_ns = None
+        self.last_end_ns = None
+
+    def add(self, record: dict):
+        """Add one exported span record (attributes do not need to be parsed)."""
+        attrs = record.get('attributes', {})
+        duration_ms = record.get('duration_ms', 0.0)
+        is_error = record.get('status') == 'ERROR'
+        input_tokens = _as_int(attrs.get('gen_ai.usage.input_tokens'))
+        output_tokens = _as_int(attrs.get('gen_ai.usage.output_tokens'))
+
+        keys = {
+            'span': _span_type(record.get('span_name', '')),
+            'model': attrs.get('gen_ai.response.model') or attrs.get('gen_ai.request.model'),
+            'tool': attrs.get('gen_ai.tool.name'),
+        }
+        self.overall.add(duration_ms, is_error, input_tokens, output_tokens)
+        for dimension, key in keys.items():
+            if key:
+                stats = self.groups[dimension].setdefault(str(key), LatencyStats())
+                stats.add(duration_ms, is_error, input_tokens, output_tokens)
+
+        start_ns, end_ns = record.get('start_time_ns'), record.get('end_time_ns')
+        if start_ns is not None:
+            self.first_start_ns = start_ns if self.first_start_ns is None else min(self.first_start_ns, start_ns)
+        if end_ns is not None:
+            self.last_end_ns = end_ns if self.last_end_ns is None else max(self.last_end_ns, end_ns)
+
+    def add_all(self, records: Iterable[dict]) -> "SpanAnalytics":
+        for record in records:
+            self.add(record)
+        return self
+
+    def hot_paths(self, dimension: str = 'span', top: int = 5) -> List[Tuple[str, LatencyStats]]:
+        """Groups ordered by total time spent, i.e. where optimization pays off most."""
+        return sorted(self.groups[dimension].items(), key=lambda item: item[1].total_ms, reverse=True)[:top]
+
+    def to_dict(self) -> dict:
+        return {
+            'overall': self.overall.summary(),
+            **{d: {k: s.summary() for k, s in groups.items()} for d, groups in self.groups.items()},
+        }
+
+
+# ============================================================================
+# HTML rendering
+# ============================================================================
+
+_STYLE = """
+body{font-family:'Segoe UI',Tahoma,sans-serif;margin:24px;color:#333;background:#f5f6fa}
+h1{color:#667eea;margin:0 0 4px}h2{color:#667eea;margin:28px 0 8px;border-bottom:2px solid #667eea}
+.meta{color:#666;margin-bottom:16px}
+.cards{display:flex;flex-wrap:wrap;gap:12px}
+.card{background:#667eea;color:#fff;border-radius:10px;padding:12px 18px;min-width:140px}
+.card b{display:block;font-size:1.6em}
+table{border-collapse:collapse;width:100%;background:#fff;font-size:.9em}
+th,td{padding:6px 10px;border-bottom:1px solid #eee;text-align:right}
+th:first-child,td:first-child{text-align:left}
+th{background:#eef0fb}
+.err{color:#c62828;font-weight:600}
+"""
+
+
+def _bar(value: float, max_value: float, width: int = 160) -> str:
+    filled = int(width * value / max_value) if max_value else 0
+    return (f'<svg width="{width}" height="10"><rect width="{width}" height="10" fill="#eee"/>'
+            f'<rect width="{filled}" height="10" fill="#764ba2"/></svg>')
+
+
+def _render_table(title: str, groups: Dict[str, LatencyStats]) -> str:
+    if not groups:
+        return ""
+    rows = sorted(groups.items(), key=lambda item: item[1].total_ms, reverse=True)
+    max_p95 = max(stats.percentile(95) for _, stats in rows)
+    html = (f"<h2>{escape(title)}</h2><table><tr><th>Name</th><th>Count</th><th>p50 ms</th>"
+            "<th>p95 ms</th><th>p99 ms</th><th>Total ms</th><th>Tokens in/out</th><th>Errors</th><th>p95</th></tr>")
+    for name, stats in rows:
+        s = stats.summary()
+        error_class = ' class="err"' if stats.errors else ''
+        html += (f"<tr><td>{escape(name)}</td><td>{s['count']}</td><td>{s['p50_ms']:.1f}</td>"
+                 f"<td>{s['p95_ms']:.1f}</td><td>{s['p99_ms']:.1f}</td><td>{s['total_ms']:.0f}</td>"
+                 f"<td>{s['input_tokens']:,}/{s['output_tokens']:,}</td>"
+                 f"<td{error_class}>{s['error_rate']:.1%}</td><td>{_bar(stats.percentile(95), max_p95)}</td></tr>")
+    return html + "</table>"
+
+
+def render_html(analytics: SpanAnalytics, title: str = "Agent Telemetry Analytics", extra_html: str = "") -> str:
+    """Render a compact, self-contained HTML report for the aggregated spans."""
+    overall = analytics.overall.summary()
+    wall_s = ((analytics.last_end_ns - analytics.first_start_ns) / 1e9
+              if analytics.first_start_ns is not None and analytics.last_end_ns is not None else 0.0)
+    cards = [
+        ("Spans", f"{overall['count']:,}"),
+        ("Wall time", f"{wall_s:.1f}s"),
+        ("p95 span", f"{overall['p95_ms']:.0f}ms"),
+        ("Input tokens", f"{overall['input_tokens']:,}"),
+        ("Output tokens", f"{overall['output_tokens']:,}"),
+        ("Error rate", f"{overall['error_rate']:.1%}"),
+    ]
+    cards_html = "".join(f'<div class="card">{label}<b>{value}</b></div>' for label, value in cards)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{escape(title)}</title><style>{_STYLE}</style></head>
+<body>
+<h1>{escape(title)}</h1>
+<div class="meta">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
+<div class="cards">{cards_html}</div>
+{_render_table("Latency by Span Type", analytics.groups['span'])}
+{_render_table("Latency by Model", analytics.groups['model'])}
+{_render_table("Latency by Tool", analytics.groups['tool'])}
+{extra_html}
+</body></html>"""
+
+
+def write_report(analytics: SpanAnalytics, output_file: str | Path, **kwargs) -> Path:
+    """Render the report and write it to disk."""
+    path = Path(output_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(render_html(analytics, **kwargs), encoding='utf-8')
+    return path
@@ -0,0 +1,233 @@
+"""
+Streaming Span Exporter
+
+Bounded-memory OpenTelemetry span exporter for long-running agents.
+
+- Spans are appended to rotating JSONL files (or Parquet parts when pyarrow
+  is installed) as soon as the span processor hands them over.
+- Only the most recent spans are kept in memory, in a ring buffer used for
+  live views.
+- Every exporter instance (run) writes its own files, tagged with a run id;
+  readers return the spans of the current run unless asked for all runs.
+- Attribute values are stored exactly as OpenTelemetry produced them. JSON
+  strings (messages, tool arguments) are only parsed when a report reads the
+  spans back via `iter_spans(parse=True)`.
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+# Parquet output is optional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def _to_json_value(value):
+    """Convert OpenTelemetry attribute values (tuples of primitives) to JSON types."""
+    if isinstance(value, (tuple, list)):
+        return list(value)
+    return value
+
+
+def span_to_record(span) -> dict:
+    """Flatten a ReadableSpan into a JSON-serializable record without parsing attributes."""
+    return {
+        'span_name': span.name,
+        'duration_ms': round((span.end_time - span.start_time) / 1_000_000, 2),
+        'start_time_ns': span.start_time,
+        'end_time_ns': span.end_time,
+        'status': span.status.status_code.name,
+        'trace_id': format(span.context.trace_id, '032x'),
+        'span_id': format(span.context.span_id, '016x'),
+        'attributes': {k: _to_json_value(v) for k, v in (span.attributes or {}).items()},
+        'events': [
+            {'name': e.name, 'attributes': {k: _to_json_value(v) for k, v in (e.attributes or {}).items()}}
+            for e in (span.events or [])
+        ],
+    }
+
+
+def parse_attributes(attributes: dict) -> dict:
+    """Parse attribute values that hold JSON documents (e.g. gen_ai.input.messages)."""
+    parsed = {}
+    for key, value in attributes.items():
+        if isinstance(value, str) and value[:1] in ('[', '{'):
+            try:
+                parsed[key] = json.loads(value)
+                continue
+            except ValueError:
+                pass
+        parsed[key] = value
+    return parsed
+
+
+def parse_record(record: dict) -> dict:
+    """Return a report-ready copy of a record with parsed attributes and ISO timestamps."""
+    parsed = dict(record)
+    parsed['attributes'] = parse_attributes(record.get('attributes', {}))
+    parsed['start_time'] = datetime.fromtimestamp(record['start_time_ns'] / 1_000_000_000).isoformat()
+    parsed['end_time'] = datetime.fromtimestamp(record['end_time_ns'] / 1_000_000_000).isoformat()
+    return parsed
+
+
+class StreamingSpanExporter(SpanExporter):
+    """Writes spans to rotating files and keeps a bounded live buffer."""
+
+    def __init__(
+        self,
+        output_dir: str | Path = "output/telemetry",
+        file_prefix: str = "spans",
+        file_format: str = "jsonl",
+        max_file_bytes: int = 10 * 1024 * 1024,
+        max_spans_per_file: int = 5_000,
+        max_files: int = 20,
+        live_buffer_size: int = 200,
+    ):
+        if file_format not in ("jsonl", "parquet"):
+            raise ValueError(f"Unsupported file format: {file_format}")
+        if file_format == "parquet" and not PYARROW_AVAILABLE:
+            raise ImportError("Parquet output requires pyarrow. Install with: pip install pyarrow")
+
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.file_prefix = file_prefix
+        self.file_format = file_format
+        self.max_file_bytes = max_file_bytes
+        self.max_spans_per_file = max_spans_per_file
+        self.max_files = max_files
+
+        # Files of this run are named {prefix}-{run_id}-{sequence}; run ids sort by start time
+        self.run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.live_spans = deque(maxlen=live_buffer_size)
+        self.total_spans = 0
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_spans = 0
+        self._pending: List[dict] = []  # Parquet rows waiting for the next part file
+        self._sequence = 0
+
+    # ------------------------------------------------------------------
+    # SpanExporter interface
+    # ------------------------------------------------------------------
+
+    def export(self, spans):
+        try:
+            records = [span_to_record(span) for span in spans]
+            with self._lock:
+                self.live_spans.extend(records)
+                self.total_spans += len(records)
+                if self.file_format == "jsonl":
+                    self._write_jsonl(records)
+                else:
+                    self._pending.extend(records)
+                    if len(self._pending) >= self.max_spans_per_file:
+                        self._write_parquet_part()
+            return SpanExportResult.SUCCESS
+        except Exception as e:
+            print(f"⚠️  Span export failed: {e}")
+            return SpanExportResult.FAILURE
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            if self._file:
+                self._file.flush()
+            if self._pending:
+                self._write_parquet_part()
+        return True
+
+    def shutdown(self):
+        self.force_flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    def _next_path(self) -> Path:
+        path = self.output_dir / f"{self.file_prefix}-{self.run_id}-{self._sequence:05d}.{self.file_format}"
+        self._sequence += 1
+        return path
+
+    def _write_jsonl(self, records: List[dict]):
+        for record in records:
+            if self._file is None or self._needs_rotation():
+                self._open_next_file()
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._file_spans += 1
+
+    def _needs_rotation(self) -> bool:
+        return self._file_spans >= self.max_spans_per_file or self._file.tell() >= self.max_file_bytes
+
+    def _open_next_file(self):
+        if self._file:
+            self._file.close()
+        self._file = open(self._next_path(), 'a', encoding='utf-8')
+        self._file_spans = 0
+        self._enforce_retention()
+
+    def _write_parquet_part(self):
+        rows = [dict(r, attributes=json.dumps(r['attributes'], default=str),
+                     events=json.dumps(r['events'], default=str)) for r in self._pending]
+        pq.write_table(pa.Table.from_pylist(rows), self._next_path())
+        self._pending = []
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        # max_files applies to the files of all runs together, oldest run first
+        files = self.list_files(all_runs=True)
+        for old_file in files[:max(0, len(files) - self.max_files)]:
+            old_file.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def list_files(self, all_runs: bool = False) -> List[Path]:
+        """Return the span files of this run (or of all retained runs), oldest first."""
+        run = "*" if all_runs else f"{self.run_id}-*"
+        return sorted(self.output_dir.glob(f"{self.file_prefix}-{run}.{self.file_format}"))
+
+    def iter_spans(self, parse: bool = False, limit: Optional[int] = None,
+                   all_runs: bool = False) -> Iterator[dict]:
+        """Stream spans of this run (or all retained runs) back from disk. Attributes are parsed only when `parse=True`."""
+        self.force_flush()
+        count = 0
+        for path in self.list_files(all_runs=all_runs):
+            for record in self._read_file(path):
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield parse_record(record) if parse else record
+
+    def _read_file(self, path: Path) -> Iterator[dict]:
+        if self.file_format == "parquet":
+            for row in pq.read_table(path).to_pylist():
+                row['attributes'] = json.loads(row['attributes'])
+                row['events'] = json.loads(row['events'])
+                yield row
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def recent_spans(self, parse: bool = False) -> List[dict]:
+        """Return the spans currently held in the live ring buffer."""
+        with self._lock:
+            records = list(self.live_spans)
+        return [parse_record(r) for r in records] if parse else records
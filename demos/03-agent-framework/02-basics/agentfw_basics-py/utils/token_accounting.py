@@ -0,0 +1,258 @@
+"""
+Token Accounting
+
+Token and cost accounting for Agent Framework chat calls.
+
+- Uses the provider's `usage` (ChatResponse.usage_details or UsageContent in
+  streamed updates) whenever the model reports it.
+- Falls back to a tokenizer count (tiktoken when installed, otherwise a
+  ~4 chars/token heuristic), cached per text so repeated history is not
+  re-tokenized on every turn.
+- Handles streaming by wrapping the update stream and accounting once it
+  has been fully consumed, including tool-call arguments.
+- Aggregates per agent, thread and model. `snapshot()` / `save_json()` export
+  the totals.
+
+Usage:
+    accountant = TokenAccountant()
+    agent = client.create_agent(..., middleware=[accountant.agent_middleware, accountant.chat_middleware])
+"""
+
+import contextvars
+import json
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from agent_framework import AgentRunContext, ChatContext, agent_middleware, chat_middleware
+
+# Optional exact tokenizer
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# USD per 1K tokens (input, output). Override via TokenAccountant(prices=...)
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+}
+
+# Agent and thread of the run currently executing (set by the agent middleware)
+_current_run: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar(
+    "token_accounting_run", default=("unknown-agent", "no-thread")
+)
+
+
+@lru_cache(maxsize=8)
+def _encoding_for(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Count tokens for a text. Cached, so unchanged history is only counted once."""
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        return len(_encoding_for(model).encode(text))
+    return max(1, len(text) // 4)
+
+
+def _content_text(content) -> str:
+    """Text that is sent to / produced by the model for one content item."""
+    for attr in ("text", "arguments", "result"):
+        value = getattr(content, attr, None)
+        if value:
+            return value if isinstance(value, str) else json.dumps(value, default=str)
+    return ""
+
+
+def _message_text(message) -> str:
+    contents = getattr(message, "contents", None)
+    if contents:
+        name = " ".join(getattr(c, "name", "") or "" for c in contents)
+        return name + " " + " ".join(_content_text(c) for c in contents)
+    return str(getattr(message, "text", message) or "")
+
+
+def _read_usage(usage) -> Optional[Tuple[int, int]]:
+    """Return (input, output) from UsageDetails or an OpenAI-style usage object."""
+    if usage is None:
+        return None
+    input_tokens = getattr(usage, "input_token_count", None)
+    output_tokens = getattr(usage, "output_token_count", None)
+    if input_tokens is None and output_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", None)
+        output_tokens = getattr(usage, "completion_tokens", None)
+    if input_tokens is None and output_tokens is None:
+        return None
+    return int(input_tokens or 0), int(output_tokens or 0)
+
+
+@dataclass
+class UsageTotals:
+    """Aggregated token usage for one key (agent, thread or model)."""
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    estimated_calls: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class TokenAccountant:
+    """Collects token usage and cost from chat calls and aggregates it per agent, thread and model."""
+
+    def __init__(self, default_model: str = "gpt-4o", prices: Optional[Dict[str, Tuple[float, float]]] = None,
+                 verbose: bool = True):
+        self.default_model = default_model
+        self.prices = prices if prices is not None else DEFAULT_PRICES
+        self.verbose = verbose
+        self.overall = UsageTotals()
+        self.by_agent: Dict[str, UsageTotals] = defaultdict(UsageTotals)
+        self.by_thread: Dict[str, UsageTotals] = defaultdict(UsageTotals)
+        self.by_model: Dict[str, UsageTotals] = defaultdict(UsageTotals)
+        self._lock = threading.Lock()
+        self.agent_middleware = self._build_agent_middleware()
+        self.chat_middleware = self._build_chat_middleware()
+
+    # ------------------------------------------------------------------
+    # Middleware
+    # ------------------------------------------------------------------
+
+    def _build_agent_middleware(self):
+        @agent_middleware
+        async def token_accounting_agent_middleware(
+            context: AgentRunContext,
+            next: Callable[[AgentRunContext], Awaitable[None]],
+        ) -> None:
+            """Remembers which agent and thread the following chat calls belong to."""
+            agent_name = getattr(context.agent, "name", None) or getattr(context.agent, "id", "agent")
+            thread = getattr(context, "thread", None)
+            thread_id = (getattr(thread, "service_thread_id", None) or (f"local-{id(thread):x}" if thread else "no-thread"))
+            token = _current_run.set((str(agent_name), str(thread_id)))
+            try:
+                await next(context)
+            finally:
+                _current_run.reset(token)
+
+        return token_accounting_agent_middleware
+
+    def _build_chat_middleware(self):
+        @chat_middleware
+        async def token_accounting_chat_middleware(
+            context: ChatContext,
+            next: Callable[[ChatContext], Awaitable[None]],
+        ) -> None:
+            """Records provider usage (or a tokenizer count) for every model call."""
+            model = self._resolve_model(context)
+            run_key = _current_run.get()
+            await next(context)
+
+            if context.is_streaming and context.result is not None:
+                context.result = self._account_stream(context.result, context, model, run_key)
+            elif context.result is not None:
+                response = context.result
+                usage = _read_usage(getattr(response, "usage_details", None) or getattr(response, "usage", None))
+                output_text = " ".join(_message_text(m) for m in getattr(response, "messages", []) or [])
+                model = getattr(response, "model_id", None) or model
+                self._record(context, model, run_key, usage, output_text)
+
+        return token_accounting_chat_middleware
+
+    async def _account_stream(self, stream, context: ChatContext, model: str, run_key: Tuple[str, str]):
+        """Pass streamed updates through and account once the stream is complete."""
+        usage = None
+        output_parts = []
+        try:
+            async for update in stream:
+                for content in getattr(update, "contents", None) or []:
+                    details = _read_usage(getattr(content, "details", None))
+                    if details:
+                        usage = details
+                    else:
+                        output_parts.append((getattr(content, "name", "") or "") + _content_text(content))
+                model = getattr(update, "model_id", None) or model
+                yield update
+        finally:
+            self._record(context, model, run_key, usage, "".join(output_parts))
+
+    # ------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------
+
+    def _resolve_model(self, context: ChatContext) -> str:
+        options = getattr(context, "chat_options", None)
+        client = getattr(context, "chat_client", None)
+        return (getattr(options, "model_id", None) or getattr(client, "model_id", None)
+                or getattr(client, "deployment_name", None) or self.default_model)
+
+    def _record(self, context: ChatContext, model: str, run_key: Tuple[str, str],
+                usage: Optional[Tuple[int, int]], output_text: str):
+        estimated = usage is None
+        if estimated:
+            input_text = "\n".join(_message_text(m) for m in context.messages)
+            usage = (count_tokens(input_text, model), count_tokens(output_text, model))
+        input_tokens, output_tokens = usage
+        input_price, output_price = self._price_for(model)
+        cost = input_tokens / 1000 * input_price + output_tokens / 1000 * output_price
+
+        agent_name, thread_id = run_key
+        with self._lock:
+            for totals in (self.overall, self.by_agent[agent_name], self.by_thread[thread_id], self.by_model[model]):
+                totals.calls += 1
+                totals.input_tokens += input_tokens
+                totals.output_tokens += output_tokens
+                totals.estimated_calls += int(estimated)
+                totals.cost_usd += cost
+
+        if self.verbose:
+            source = "estimated" if estimated else "reported"
+            print(f"\n[TOKENS] {model} ({agent_name}): in={input_tokens} out={output_tokens} "
+                  f"({source}) cost=${cost:.5f}")
+
+    def _price_for(self, model: str) -> Tuple[float, float]:
+        if model in self.prices:
+            return self.prices[model]
+        # Deployment names often carry a suffix, e.g. 'gpt-4o-2024-08-06'
+        for name in sorted(self.prices, key=len, reverse=True):
+            if model.startswith(name):
+                return self.prices[name]
+        return (0.0, 0.0)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Return all aggregates as plain dicts."""
+        def dump(totals: UsageTotals) -> dict:
+            return {**asdict(totals), "total_tokens": totals.total_tokens, "cost_usd": round(totals.cost_usd, 6)}
+
+        with self._lock:
+            return {
+                "overall": dump(self.overall),
+                "by_agent": {k: dump(v) for k, v in self.by_agent.items()},
+                "by_thread": {k: dump(v) for k, v in self.by_thread.items()},
+                "by_model": {k: dump(v) for k, v in self.by_model.items()},
+            }
+
+    def save_json(self, file_path: str | Path) -> Path:
+        """Write the snapshot to a JSON file."""
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+        return path
@@ -0,0 +1,181 @@
+"""
+Tool Cache
+
+Memoization of function tool results for Agent Framework.
+
+Tools opt in by declaring how long their results stay valid:
+
+    tool_cache = ToolCache()
+
+    @tool_cache.cacheable(pure=True)          # same arguments -> same result, forever (LRU bounded)
+    def get_weather(city: str) -> str: ...
+
+    @tool_cache.cacheable(ttl=60, normalize=str.lower)
+    def search_database(query: str) -> str: ...
+
+    agent = client.create_agent(..., tools=[get_weather, search_database],
+                                middleware=[tool_cache.function_middleware])
+
+The decorator does not wrap the tool (its signature and schema stay the same);
+it only registers a policy. The function middleware then:
+- memoizes results on normalized arguments (sorted keys, trimmed strings,
+  optional per-tool `normalize` for string values),
+- coalesces concurrent identical calls into one execution,
+- leaves tools without a policy untouched.
+
+Results are kept in a bounded LRU; TTL expiry uses time.monotonic().
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from agent_framework import FunctionInvocationContext, function_middleware
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long a tool's result may be reused."""
+    pure: bool = False
+    ttl: Optional[float] = None
+    normalize: Optional[Callable[[str], str]] = None
+    should_cache: Optional[Callable[[Any], bool]] = None
+
+    def expires_at(self, now: float) -> float:
+        return float("inf") if self.pure else now + (self.ttl or 0)
+
+
+def _arguments_dict(arguments) -> dict:
+    if arguments is None:
+        return {}
+    if hasattr(arguments, "model_dump"):
+        return arguments.model_dump()
+    return dict(arguments)
+
+
+def _normalize(value, normalize: Optional[Callable[[str], str]]):
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return normalize(value) if normalize else value
+    if isinstance(value, dict):
+        return {k: _normalize(v, normalize) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v, normalize) for v in value]
+    return value
+
+
+class ToolCache:
+    """Function middleware memoizing tools that declared a cache policy."""
+
+    def __init__(self, max_entries: int = 1000, verbose: bool = True):
+        self.max_entries = max_entries
+        self.verbose = verbose
+        self.policies: Dict[str, CachePolicy] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self._results: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.function_middleware = self._build_function_middleware()
+
+    def cacheable(self, pure: bool = False, ttl: Optional[float] = None,
+                  normalize: Optional[Callable[[str], str]] = None,
+                  should_cache: Optional[Callable[[Any], bool]] = None, name: Optional[str] = None):
+        """Declare a tool as pure (cache forever) or cacheable for `ttl` seconds.
+
+        `should_cache` can reject results that must not be reused, e.g. error messages.
+        """
+        if not pure and not ttl:
+            raise ValueError("A cacheable tool must be pure or declare a ttl")
+
+        def register(func):
+            self.policies[name or func.__name__] = CachePolicy(pure, ttl, normalize, should_cache)
+            return func
+
+        return register
+
+    def _key(self, tool_name: str, arguments, policy: CachePolicy) -> str:
+        normalized = _normalize(_arguments_dict(arguments), policy.normalize)
+        return tool_name + ":" + json.dumps(normalized, sort_keys=True, default=str)
+
+    def _lookup(self, key: str):
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return False, None
+        self._results.move_to_end(key)
+        return True, result
+
+    def _store(self, key: str, result, policy: CachePolicy):
+        self._results[key] = (policy.expires_at(time.monotonic()), result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def _build_function_middleware(self):
+        @function_middleware
+        async def tool_cache_middleware(
+            context: FunctionInvocationContext,
+            next: Callable[[FunctionInvocationContext], Awaitable[None]],
+        ) -> None:
+            """Reuses cached tool results and coalesces identical concurrent calls."""
+            tool_name = context.function.name
+            policy = self.policies.get(tool_name)
+            if policy is None:
+                await next(context)
+                return
+
+            key = self._key(tool_name, context.arguments, policy)
+            while True:
+                found, result = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    if self.verbose:
+                        print(f"\n[TOOL CACHE] {tool_name}: cached result reused")
+                    context.result = result
+                    return
+
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    break
+                self.coalesced += 1
+                if self.verbose:
+                    print(f"\n[TOOL CACHE] {tool_name}: joined identical call in flight")
+                try:
+                    context.result = await asyncio.shield(pending)
+                    return
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise  # This run was cancelled
+                    # The run executing the call was cancelled, not this one; execute the tool here instead
+
+            self.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                await next(context)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when nobody else was waiting
+                raise
+            else:
+                if policy.should_cache is None or policy.should_cache(context.result):
+                    self._store(key, context.result, policy)
+                future.set_result(context.result)
+            finally:
+                self._in_flight.pop(key, None)
+
+        return tool_cache_middleware
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "coalesced": self.coalesced, "misses": self.misses,
+                "entries": len(self._results)}
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 from agent_framework.azure import AzureOpenAIChatClient
 
+from utils.safe_calculator import ExpressionError, SafeCalculator
+
 # Load environment variables
 load_dotenv()
 
@@ -15,28 +17,33 @@ API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-07-01-preview")
 
 
+# Sandboxed expression engine: AST whitelist, bounded exponents and time, cached compilation
+calculator = SafeCalculator()
+
+
 # Define calculator function
 def calculate(
     expression: Annotated[str, Field(description="Mathematical expression to evaluate, e.g. '2 + 2' or '10 * 5'")]
 ) -> str:
     """Evaluate a mathematical expression."""
     try:
-        # Safe evaluation with limited namespace
-        result = eval(
-            expression,
-            {"__builtins__": {}},
-            {
-                "abs": abs,
-                "round": round,
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "pow": pow,
-            }
-        )
+        result = calculator.evaluate(expression)
         return f"Result: {result}"
-    except Exception as e:
-        return f"Error: Could not calculate '{expression}'"
+    except ExpressionError as e:
+        return f"Error: Could not calculate '{expression}' ({e})"
+
+
+def calculate_many(
+    expressions: Annotated[list[str], Field(description="List of mathematical expressions to evaluate in one call")]
+) -> str:
+    """Evaluate several mathematical expressions at once, e.g. all rows of a table."""
+    lines = []
+    for expression, result in zip(expressions, calculator.evaluate_many(expressions)):
+        if isinstance(result, ExpressionError):
+            lines.append(f"{expression} -> Error: {result}")
+        else:
+            lines.append(f"{expression} = {result}")
+    return "\n".join(lines)
 
 
 async def main():
@@ -54,16 +61,17 @@ async def main():
         api_version=API_VERSION
     ).create_agent(
         instructions=(
-            "You are a math assistant. Always use the calculate tool for all math problems. "
+            "You are a math assistant. Always use the calculate tool for all math problems, "
+            "or calculate_many when several independent expressions need to be evaluated. "
             "When presenting formulas, derivations, or key results, format math using LaTeX: "
             "use display math with \\[ and \\] for multi-line or important equations, and inline math with \\( and \\) for short expressions. "
             "Keep explanations concise and avoid code fences."
         ),
         name="CalculatorBot",
-        tools=[calculate]
+        tools=[calculate, calculate_many]
     )
     
-    print("\n✅ Agent created with calculator tool")
+    print("\n✅ Agent created with calculator tools")
     print("💡 TIP: Ask math questions or calculations")
     
     print("\n" + "="*70)
@@ -5,18 +5,25 @@ Simple real example with 2 functions:
 1. create_file() - No approval needed (safe operation)
 2. delete_file() - Requires approval (dangerous operation)
 
-This uses a custom ApprovalRequiredTool wrapper (same pattern as file 11)
+This uses a custom ApprovalRequiredTool wrapper (same pattern as file 11) on top
+of an async approval queue (utils/approval_queue.py): pending approvals never
+block the event loop, several queued calls can be approved or denied at once,
+policy rules decide obvious cases, and undecided requests expire after a timeout.
 """
 
 import asyncio
 import os
-from typing import Annotated, Callable
+import sys
+import threading
+from typing import Annotated
 from pydantic import Field
 from dotenv import load_dotenv
 from pathlib import Path
 
 from agent_framework.azure import AzureOpenAIChatClient
 
+from utils.approval_queue import ApprovalQueue, ApprovalRequiredTool
+
 # Load environment variables
 load_dotenv()
 
@@ -36,111 +43,26 @@ DEMO_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # ============================================================================
-# Approval System: Wrapper for functions requiring human approval
+# Approval System: Queue of tool calls waiting for human approval
 # ============================================================================
 
-class ApprovalRequiredTool:
-    """Wrapper for a function tool that requires human approval before execution."""
-    
-    def __init__(self, func: Callable, description: str = None):
-        self.original_func = func
-        self.func_name = func.__name__
-        self.description = description or func.__doc__ or "No description"
-        self.approval_callback = None
-    
-    def set_approval_callback(self, callback: Callable):
-        """Set the callback function that asks user for approval."""
-        self.approval_callback = callback
-    
-    def __call__(self, *args, **kwargs):
-        """Execute the function with approval check."""
-        # Debug: show what we received
-        print(f"[DEBUG] Wrapper called with args={args}, kwargs={kwargs}")
-        
-        # Handle nested argument structure from agent framework
-        # The framework may pass: kwargs={'args': 'value', 'kwargs': '{}'}
-        if 'args' in kwargs and 'kwargs' in kwargs:
-            # Unwrap nested structure
-            nested_args = kwargs.get('args', '')
-            nested_kwargs_str = kwargs.get('kwargs', '{}')
-            
-            print(f"[DEBUG] Detected nested structure - unwrapping...")
-            print(f"[DEBUG] nested_args={nested_args}, nested_kwargs={nested_kwargs_str}")
-            
-            # Convert nested_kwargs string to dict if needed
-            import json
-            if isinstance(nested_kwargs_str, str) and nested_kwargs_str:
-                try:
-                    nested_kwargs = json.loads(nested_kwargs_str) if nested_kwargs_str.strip() else {}
-                except:
-                    nested_kwargs = {}
-            else:
-                nested_kwargs = nested_kwargs_str if isinstance(nested_kwargs_str, dict) else {}
-            
-            # Map 'args' to the actual parameter name
-            # For delete_file_impl, the parameter is 'filename'
-            import inspect
-            sig = inspect.signature(self.original_func)
-            param_names = list(sig.parameters.keys())
-            
-            if param_names and nested_args:
-                # Use the first parameter name
-                actual_kwargs = {param_names[0]: nested_args}
-                actual_kwargs.update(nested_kwargs)
-            else:
-                actual_kwargs = nested_kwargs
-            
-            print(f"[DEBUG] Unwrapped to: {actual_kwargs}")
-            
-            # Prepare approval request info
-            approval_info = {
-                "function_name": self.func_name,
-                "description": self.description,
-                "arguments": {
-                    "args": (),
-                    "kwargs": actual_kwargs
-                }
-            }
-        else:
-            # Normal call - no unwrapping needed
-            actual_kwargs = kwargs
-            approval_info = {
-                "function_name": self.func_name,
-                "description": self.description,
-                "arguments": {
-                    "args": args,
-                    "kwargs": kwargs
-                }
-            }
-        
-        # Ask for approval
-        if self.approval_callback:
-            approved = self.approval_callback(approval_info)
-        else:
-            # Default: auto-approve if no callback set
-            print(f"⚠️ No approval callback set, auto-approving: {self.func_name}")
-            approved = True
-        
-        if approved:
-            print(f"✅ APPROVED: Executing {self.func_name}")
-            try:
-                if 'args' in kwargs and 'kwargs' in kwargs:
-                    # Use unwrapped arguments
-                    result = self.original_func(**actual_kwargs)
-                else:
-                    # Use original arguments
-                    result = self.original_func(*args, **kwargs)
-                print(f"[DEBUG] Function returned: {result}")
-                return result
-            except Exception as e:
-                import traceback
-                error_msg = f"❌ Error executing {self.func_name}: {e}"
-                print(f"[DEBUG] {error_msg}")
-                print(f"[DEBUG] Traceback: {traceback.format_exc()}")
-                return error_msg
-        else:
-            print(f"❌ REJECTED: Not executing {self.func_name}")
-            return f"⛔ Function '{self.func_name}' was rejected by the user."
+APPROVAL_TIMEOUT_S = float(os.getenv("APPROVAL_TIMEOUT_S", "120"))
+
+approval_queue = ApprovalQueue(db_path=DEMO_DIR / "approvals.db", default_timeout_s=APPROVAL_TIMEOUT_S)
+
+# Policy rules: obvious cases are decided without asking
+approval_queue.add_rule(
+    "delete_file_impl",
+    lambda args: ".." in args["filename"] or "/" in args["filename"] or "\\" in args["filename"],
+    approve=False,
+    reason="only files directly in the demo folder may be deleted",
+)
+approval_queue.add_rule(
+    "delete_file_impl",
+    lambda args: args["filename"].endswith((".tmp", ".bak")),
+    approve=True,
+    reason="temporary files",
+)
 
 
 # ============================================================================
@@ -189,42 +111,116 @@ def delete_file_impl(
 
 
 # ============================================================================
-# Approval Callback
+# Approval Reviewer
 # ============================================================================
 
-def ask_user_approval(approval_info: dict) -> bool:
-    """Ask the user to approve or reject a function call."""
-    print("\n" + "="*70)
-    print("🚨 APPROVAL REQUIRED")
-    print("="*70)
-    print(f"📝 Function: {approval_info['function_name']}")
-    print(f"📊 Arguments:")
-    
-    args = approval_info['arguments']
-    if args['args']:
-        for i, arg in enumerate(args['args']):
-            print(f"   - Arg {i+1}: {arg}")
-    if args['kwargs']:
-        for key, value in args['kwargs'].items():
-            print(f"   - {key}: {value}")
-    
-    print("-" * 70)
-    
+class ConsoleInput:
+    """
+    The single owner of stdin for the reviewer and the chat loop.
+
+    Only one input() thread runs at a time and its line goes to whoever is
+    waiting when it arrives; a line that arrives while nobody is waiting (e.g.
+    the answer to an approval that just expired) is dropped instead of
+    reaching the next reader.
+    """
+
+    def __init__(self):
+        self._waiter: asyncio.Future | None = None
+        self._reading = False
+
+    async def read(self, prompt: str = "") -> str:
+        """input() that can be cancelled; raises EOFError at the end of the input."""
+        if self._waiter is not None:
+            raise RuntimeError("Console input is already being read")
+        loop = asyncio.get_running_loop()
+        if self._reading:
+            # The input() of an abandoned read is still waiting for its line; it serves this read
+            print(prompt, end="", flush=True)
+        else:
+            self._reading = True
+            # Daemon on a terminal so shutdown never waits for Enter; a daemon thread blocked on
+            # piped stdin would abort the interpreter at exit, and piped input ends with EOF anyway
+            threading.Thread(target=self._read, args=(loop, prompt), daemon=sys.stdin.isatty()).start()
+        self._waiter = loop.create_future()
+        try:
+            line = await self._waiter
+        finally:
+            self._waiter = None
+        if isinstance(line, BaseException):
+            raise line
+        return line
+
+    def _read(self, loop: asyncio.AbstractEventLoop, prompt: str):
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            line = e
+        try:
+            loop.call_soon_threadsafe(self._deliver, line)
+        except RuntimeError:
+            pass  # The loop was closed while waiting for input
+
+    def _deliver(self, line):
+        self._reading = False
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(line)
+
+
+console = ConsoleInput()
+
+
+async def console_reviewer(queue: ApprovalQueue, batch_window_s: float = 0.3, poll_s: float = 0.5):
+    """Ask the user about pending approvals in batches, without blocking the event loop."""
+    new_request = asyncio.Event()
+    queue.on_request(lambda request: new_request.set())
+
     while True:
+        await new_request.wait()
+        # Let parallel tool calls of the same turn queue up, then review them together
+        await asyncio.sleep(batch_window_s)
+        new_request.clear()
+        pending = queue.pending()
+        if not pending:
+            continue
+
+        print("\n" + "="*70)
+        print(f"🚨 APPROVAL REQUIRED ({len(pending)} pending)")
+        print("="*70)
+        for number, request in enumerate(pending, start=1):
+            arguments = ", ".join(f"{key}={value!r}" for key, value in request.arguments.items())
+            print(f"  [{number}] 📝 {request.function_name}({arguments})")
+        print("-" * 70)
+        print("  yes / no           - approve or deny all")
+        print("  yes 1 3 / no 2     - approve or deny selected requests")
+
+        # Stop asking once every shown request is decided elsewhere or expired, so the chat gets stdin back
+        read = asyncio.ensure_future(console.read("⚠️ Your decision: "))
         try:
-            response = input("⚠️ Do you want to APPROVE this action? (yes/no): ").strip().lower()
-        except EOFError:
-            print("\n👋 Received EOF - treating as 'no'.")
-            return False
-        except KeyboardInterrupt:
-            print("\n👋 Interrupted - treating as 'no'.")
-            return False
-        if response in ['yes', 'y']:
-            return True
-        elif response in ['no', 'n']:
-            return False
-        else:
-            print("   Please enter 'yes' or 'no'")
+            while not read.done() and any(r.status == "pending" for r in pending):
+                await asyncio.wait({read}, timeout=poll_s)
+        except asyncio.CancelledError:
+            read.cancel()
+            raise
+        if not read.done():
+            read.cancel()
+            print("\n⏰ The pending requests expired or were decided elsewhere - no answer needed.")
+            continue
+        try:
+            response = read.result().strip().lower()
+        except (EOFError, KeyboardInterrupt):
+            print("\n👋 No input - denying pending requests.")
+            queue.deny_all(reason="no reviewer input")
+            continue
+
+        decision, *numbers = response.split() or [""]
+        if decision not in ("yes", "y", "no", "n"):
+            print("   Please answer 'yes' or 'no' (optionally followed by request numbers)")
+            new_request.set()
+            continue
+        selected = [pending[int(n) - 1] for n in numbers if n.isdigit() and 0 < int(n) <= len(pending)] or pending
+        queue.decide([r.request_id for r in selected], approved=decision in ("yes", "y"))
+        if len(selected) < len(pending):
+            new_request.set()  # Ask again about the rest
 
 
 # ============================================================================
@@ -241,9 +237,9 @@ async def main():
     print("   ✅ create_file() - Runs immediately (no approval)")
     print("   🔒 delete_file() - Requires your approval first")
     
-    # Wrap delete_file with approval requirement
-    delete_file_approval = ApprovalRequiredTool(delete_file_impl, "Delete a file from the system")
-    delete_file_approval.set_approval_callback(ask_user_approval)
+    # Wrap delete_file with approval requirement; decisions come from the approval queue
+    delete_file_approval = ApprovalRequiredTool(delete_file_impl, approval_queue, "Delete a file from the system")
+    reviewer = asyncio.create_task(console_reviewer(approval_queue))
     
     # Create agent with both functions
     # create_file runs immediately, delete_file asks for approval
@@ -263,7 +259,7 @@ Rules:
 3. Do NOT ask for confirmation in the chat - the system will handle approvals automatically
 4. Just call the function and report the result""",
         name="FileBot",
-        tools=[create_file, delete_file_approval]
+        tools=[create_file, delete_file_approval.as_tool()]
     )
     
     print(f"\n✅ Agent created with 2 functions")
@@ -277,11 +273,12 @@ Rules:
     print("   • Delete test.txt")
     print("   • Create file notes.txt saying 'Hello World'")
     print("   • Delete notes.txt")
+    print("   • Delete old.tmp (auto-approved by policy)")
     
     # Chat loop
     while True:
         try:
-            user_input = input("\nYou: ").strip()
+            user_input = (await console.read("\nYou: ")).strip()
         except EOFError:
             print("\n👋 Received EOF - exiting.")
             break
@@ -304,6 +301,8 @@ Rules:
         
         print()  # New line after response
 
+    reviewer.cancel()
+
 
 if __name__ == "__main__":
     try:
@@ -8,6 +8,8 @@ import requests
 
 from agent_framework.azure import AzureOpenAIChatClient
 
+from utils.safe_calculator import ExpressionError, SafeCalculator
+
 # Load environment variables
 load_dotenv()
 
@@ -31,17 +33,18 @@ def get_weather(
     return weather_data.get(location.lower(), f"Weather data not available for {location}")
 
 
-# Tool 2: Calculator
+# Tool 2: Calculator (sandboxed, no eval)
+calculator = SafeCalculator()
+
+
 def calculate(
     expression: Annotated[str, Field(description="Math expression")]
 ) -> str:
     """Calculate a mathematical expression."""
     try:
-        result = eval(expression, {"__builtins__": {}}, {
-            "abs": abs, "round": round, "min": min, "max": max, "pow": pow
-        })
+        result = calculator.evaluate(expression)
         return f"Result: {result}"
-    except:
+    except ExpressionError:
         return f"Cannot calculate '{expression}'"
 
 
@@ -0,0 +1,225 @@
+"""
+OpenAPI Tools Benchmark
+
+Generates async tools from an OpenAPI document (utils/openapi_tools.py) and
+measures concurrent `get_todo_by_id` calls - as issued when a model asks for
+several todos in one turn - against a local mock of the DummyJSON Todos API:
+
+1. sequential calls (one request after another)
+2. concurrent calls (one request each, on the pooled client)
+3. concurrent calls coalesced into `GET /todos?ids=...` batch requests
+
+The mock adds a fixed latency per request and, like most rate-limited APIs,
+serves only a few requests at a time.
+
+No Azure resources needed:
+    python agentfw_openapi_tools_benchmark.py
+"""
+
+import asyncio
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.http_client import HttpToolClient
+from utils.openapi_tools import generate_tools
+
+MOCK_LATENCY_S = 0.05
+MOCK_MAX_CONCURRENT = 4
+CALL_COUNT = 40
+TODO_COUNT = 200
+
+TODOS = {i: {"id": i, "todo": f"Task number {i}", "completed": i % 3 == 0, "userId": i % 20 + 1}
+         for i in range(1, TODO_COUNT + 1)}
+
+
+def todos_spec(server_url: str) -> dict:
+    todo_schema = {"$ref": "#/components/schemas/Todo"}
+    return {
+        "openapi": "3.0.4",
+        "info": {"title": "DummyJSON-Todos (mock)", "version": "1.0.0"},
+        "servers": [{"url": server_url}],
+        "paths": {
+            "/todos": {
+                "get": {
+                    "operationId": "getAllTodos",
+                    "summary": "Get all todos with optional pagination or a list of ids",
+                    "parameters": [
+                        {"name": "limit", "in": "query", "schema": {"type": "integer", "default": 30},
+                         "description": "Number of todos to return"},
+                        {"name": "skip", "in": "query", "schema": {"type": "integer", "default": 0},
+                         "description": "Number of todos to skip"},
+                        {"name": "ids", "in": "query", "schema": {"type": "string"},
+                         "description": "Comma separated todo ids"},
+                    ],
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
+            "/todos/{id}": {
+                "get": {
+                    "operationId": "getTodoById",
+                    "summary": "Get a specific todo by its ID",
+                    "parameters": [
+                        {"name": "id", "in": "path", "required": True, "schema": {"type": "integer"},
+                         "description": "The ID of the todo item to get"},
+                    ],
+                    "x-batch": {"path": "/todos", "param": "ids", "itemsKey": "todos", "idField": "id"},
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": todo_schema}}}},
+                }
+            },
+            "/todos/user/{userId}": {
+                "get": {
+                    "operationId": "getTodosByUser",
+                    "summary": "Get all todos for a specific user",
+                    "parameters": [
+                        {"name": "userId", "in": "path", "required": True, "schema": {"type": "integer"},
+                         "description": "The user ID to get todos for"},
+                    ],
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
+            "/todos/add": {
+                "post": {
+                    "operationId": "addTodo",
+                    "summary": "Add a new todo (simulated - not persisted)",
+                    "requestBody": {"required": True, "content": {"application/json": {
+                        "schema": {"$ref": "#/components/schemas/TodoInput"}}}},
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
+        },
+        "components": {
+            "schemas": {
+                "TodoInput": {
+                    "type": "object",
+                    "properties": {
+                        "todo": {"type": "string", "description": "Task description"},
+                        "completed": {"type": "boolean", "description": "Whether the task is done"},
+                        "userId": {"type": "integer", "description": "Owner of the task"},
+                    },
+                    "required": ["todo", "completed", "userId"],
+                },
+                "Todo": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "todo": {"type": "string"},
+                        "completed": {"type": "boolean"},
+                        "userId": {"type": "integer"},
+                    },
+                },
+            }
+        },
+    }
+
+
+class MockTodosHandler(BaseHTTPRequestHandler):
+    """Minimal DummyJSON-like todos API with latency and a concurrency limit."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    slots = threading.BoundedSemaphore(MOCK_MAX_CONCURRENT)
+    request_count = 0
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        with self.slots:
+            MockTodosHandler.request_count += 1
+            time.sleep(MOCK_LATENCY_S)
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if method == "POST" and url.path == "/todos/add":
+                data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                return self._send_json(200, {"id": TODO_COUNT + 1, **data})
+            if url.path == "/todos":
+                if "ids" in query:
+                    ids = [int(i) for i in query["ids"][0].split(",") if i.isdigit()]
+                    todos = [TODOS[i] for i in ids if i in TODOS]
+                else:
+                    skip, limit = int(query.get("skip", [0])[0]), int(query.get("limit", [30])[0])
+                    todos = list(TODOS.values())[skip:skip + limit]
+                return self._send_json(200, {"todos": todos, "total": len(TODOS)})
+            match = re.fullmatch(r"/todos/(\d+)", url.path)
+            if match:
+                todo = TODOS.get(int(match.group(1)))
+                return self._send_json(200, todo) if todo else self._send_json(404, {"message": "not found"})
+            match = re.fullmatch(r"/todos/user/(\d+)", url.path)
+            if match:
+                todos = [t for t in TODOS.values() if t["userId"] == int(match.group(1))]
+                return self._send_json(200, {"todos": todos, "total": len(todos)})
+            self._send_json(404, {"message": "not found"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def timed(label: str, run) -> list:
+    MockTodosHandler.request_count = 0
+    start = time.perf_counter()
+    results = await run()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"   {label:<34} {elapsed_ms:>8.1f} ms   {MockTodosHandler.request_count:>3} requests")
+    return results
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTodosHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server_url = f"http://127.0.0.1:{server.server_port}"
+    spec = todos_spec(server_url)
+
+    client = HttpToolClient(server_url)
+    plain = generate_tools(spec, client=client, coalesce=False)
+    coalesced = generate_tools(spec, client=client, coalesce=True)
+
+    print("\n" + "=" * 75)
+    print(f"OPENAPI TOOLS BENCHMARK - {CALL_COUNT} get_todo_by_id calls, "
+          f"{MOCK_LATENCY_S * 1000:.0f} ms latency, {MOCK_MAX_CONCURRENT} concurrent requests max")
+    print("=" * 75)
+
+    print("\n🔧 Generated tools:")
+    for name, tool in plain.items():
+        params = ", ".join(inspect.signature(tool).parameters)
+        print(f"   {name}({params}) - {tool.__doc__}")
+
+    ids = random.Random(42).sample(range(1, TODO_COUNT + 1), CALL_COUNT)
+    get_plain, get_coalesced = plain["get_todo_by_id"], coalesced["get_todo_by_id"]
+
+    async def sequential():
+        return [await get_plain(id=i) for i in ids]
+
+    print("\n📊 Results:")
+    baseline = await timed("sequential", sequential)
+    concurrent = await timed("concurrent", lambda: asyncio.gather(*(get_plain(id=i) for i in ids)))
+    batched = await timed("concurrent + coalesced", lambda: asyncio.gather(*(get_coalesced(id=i) for i in ids)))
+
+    decoded = [[json.loads(r) for r in results] for results in (baseline, concurrent, batched)]
+    assert decoded[0] == decoded[1] == decoded[2], "coalesced results differ from single requests"
+    print(f"\n   ✅ All strategies returned the same {len(ids)} todos")
+    print(f"   Coalescer: {get_coalesced.coalescer.stats}")
+
+    await client.aclose()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,9 @@ REST API Tool Demo - DummyJSON Todos API
 This demo shows how to create custom tools that call external REST APIs.
 We'll use the DummyJSON Todos API to demonstrate querying and managing todo items.
 
+The tools are async and share one pooled HTTP client (utils/http_client.py),
+so connections are reused and the event loop never blocks on a request.
+
 API: https://dummyjson.com/docs/todos
 """
 
@@ -12,10 +15,13 @@ import os
 from typing import Annotated, Optional
 from pydantic import Field
 from dotenv import load_dotenv
-import requests
+import httpx
 
 from agent_framework.azure import AzureOpenAIChatClient
 
+from utils.http_client import HttpToolClient
+from utils.tool_cache import ToolCache
+
 # Load environment variables
 load_dotenv()
 
@@ -27,21 +33,26 @@ API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-07-01-preview")
 # DummyJSON API base URL from environment
 REST_API_BASE = os.getenv("REST_URL", "https://dummyjson.com")
 
+# One pooled client for all tools: keep-alive, HTTP/2 when available, ETag/Cache-Control aware
+todos_api = HttpToolClient(REST_API_BASE, timeout=10)
+
+
+# Todos change rarely: reuse identical lookups for a minute, but never cache errors
+tool_cache = ToolCache()
+cache_todos = tool_cache.cacheable(ttl=60, should_cache=lambda result: not str(result).startswith("Error"))
+
 
 # Define REST API tools
-def get_todos(
+@cache_todos
+async def get_todos(
     limit: Annotated[Optional[int], Field(description="Number of todos to retrieve (default 10)")] = 10,
     skip: Annotated[Optional[int], Field(description="Number of todos to skip for pagination")] = 0
 ) -> str:
     """Get all todos with optional pagination."""
     try:
-        params = {'limit': limit, 'skip': skip}
+        params = {k: v for k, v in {'limit': limit, 'skip': skip}.items() if v is not None}
         
-        response = requests.get(
-            f"{REST_API_BASE}/todos",
-            params=params,
-            timeout=10
-        )
+        response = await todos_api.get("/todos", params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -62,21 +73,19 @@ def get_todos(
             return result
         else:
             return f"Error: API returned status {response.status_code}"
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return "Error: Request timed out. The API might be unavailable."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return f"Error: Could not connect to DummyJSON API - {str(e)}"
 
 
-def get_todo_by_id(
+@cache_todos
+async def get_todo_by_id(
     todo_id: Annotated[int, Field(description="The ID of the todo item to get")]
 ) -> str:
     """Get a specific todo by its ID."""
     try:
-        response = requests.get(
-            f"{REST_API_BASE}/todos/{todo_id}",
-            timeout=10
-        )
+        response = await todos_api.get(f"/todos/{todo_id}")
         
         if response.status_code == 200:
             todo = response.json()
@@ -91,21 +100,19 @@ def get_todo_by_id(
             return f"Todo with ID {todo_id} not found."
         else:
             return f"Error: API returned status {response.status_code}"
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return "Error: Request timed out. The API might be unavailable."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return f"Error: Could not connect to DummyJSON API - {str(e)}"
 
 
-def get_todos_by_user(
+@cache_todos
+async def get_todos_by_user(
     user_id: Annotated[int, Field(description="The user ID to get todos for")]
 ) -> str:
     """Get all todos for a specific user."""
     try:
-        response = requests.get(
-            f"{REST_API_BASE}/todos/user/{user_id}",
-            timeout=10
-        )
+        response = await todos_api.get(f"/todos/user/{user_id}")
         
         if response.status_code == 200:
             data = response.json()
@@ -124,9 +131,9 @@ def get_todos_by_user(
             return result
         else:
             return f"Error: API returned status {response.status_code}"
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return "Error: Request timed out. The API might be unavailable."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return f"Error: Could not connect to DummyJSON API - {str(e)}"
 
 
@@ -168,7 +175,8 @@ Example queries:
             "If the API is unavailable, inform the user politely and suggest trying again later."
         ),
         name="TodoBot",
-        tools=[get_todos, get_todo_by_id, get_todos_by_user]
+        tools=[get_todos, get_todo_by_id, get_todos_by_user],
+        middleware=[tool_cache.function_middleware]
     )
     
     print("\n✅ Agent created with REST API tools")
@@ -200,6 +208,8 @@ Example queries:
                 print(chunk.text, end="", flush=True)
         print("\n")
 
+    await todos_api.aclose()
+
 
 if __name__ == "__main__":
     try:
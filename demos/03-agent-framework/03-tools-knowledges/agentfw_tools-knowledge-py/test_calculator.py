@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 from agent_framework.azure import AzureOpenAIChatClient
 
+from utils.safe_calculator import ExpressionError, SafeCalculator
+
 # Load environment variables
 load_dotenv()
 
@@ -15,28 +17,20 @@ API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-07-01-preview")
 
 
+# Sandboxed expression engine: AST whitelist, bounded exponents and time, cached compilation
+calculator = SafeCalculator()
+
+
 # Define calculator function
 def calculate(
     expression: Annotated[str, Field(description="Mathematical expression to evaluate, e.g. '2 + 2' or '10 * 5'")]
 ) -> str:
     """Evaluate a mathematical expression."""
     try:
-        # Safe evaluation with limited namespace
-        result = eval(
-            expression,
-            {"__builtins__": {}},
-            {
-                "abs": abs,
-                "round": round,
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "pow": pow,
-            }
-        )
+        result = calculator.evaluate(expression)
         return f"Result: {result}"
-    except Exception as e:
-        return f"Error: Could not calculate '{expression}'"
+    except ExpressionError as e:
+        return f"Error: Could not calculate '{expression}' ({e})"
 
 
 async def test_calculation():
@@ -0,0 +1,291 @@
+"""
+Approval Queue
+
+Async human-in-the-loop approvals for dangerous tool calls.
+
+A tool call that needs approval is queued as a pending request and the tool
+coroutine awaits the decision; nothing blocks the event loop, so other
+sessions and coroutines keep running while approvals are outstanding.
+
+- Policy rules decide some calls up front (e.g. always allow deleting *.tmp,
+  never allow paths containing "..") without asking anyone.
+- Reviewers see everything pending (optionally per session) and approve or
+  deny several requests in one batch.
+- Requests that are not decided within their timeout get the default
+  decision (status "expired", i.e. denied, unless configured otherwise).
+- Requests and decisions are persisted in SQLite; requests left pending by
+  a previous process are marked "expired" on startup.
+
+Usage:
+    queue = ApprovalQueue(db_path="output/approvals.db", default_timeout_s=120)
+    queue.add_rule("delete_file", lambda args: args["filename"].endswith(".tmp"), approve=True,
+                   reason="temporary files")
+    delete_file = ApprovalRequiredTool(delete_file_impl, queue).as_tool()
+
+    # somewhere else (UI, console task, web handler)
+    for request in queue.pending():
+        ...
+    queue.decide([r.request_id for r in queue.pending()], approved=True)
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Session the current tool call belongs to; set it per conversation/request
+current_session: ContextVar[str] = ContextVar("approval_session", default="default")
+
+
+@dataclass
+class ApprovalRequest:
+    """One tool call waiting for (or decided by) a human or a policy."""
+    request_id: str
+    session_id: str
+    function_name: str
+    description: str
+    arguments: Dict[str, Any]
+    created_at: float
+    deadline: float
+    status: str = "pending"  # pending, approved, denied, expired
+    decided_by: Optional[str] = None  # user, policy, timeout, cancelled, restart
+    reason: str = ""
+
+    @property
+    def approved(self) -> bool:
+        return self.status == "approved"
+
+
+@dataclass
+class ApprovalRule:
+    """Decides matching calls automatically."""
+    function_name: str  # "*" matches every function
+    predicate: Callable[[Dict[str, Any]], bool]
+    approve: bool
+    reason: str = ""
+
+    def matches(self, function_name: str, arguments: Dict[str, Any]) -> bool:
+        if self.function_name not in ("*", function_name):
+            return False
+        try:
+            return bool(self.predicate(arguments))
+        except Exception:
+            return False
+
+
+class ApprovalQueue:
+    """Pending approvals shared by all sessions of one process."""
+
+    def __init__(self, db_path: Optional[str | Path] = None, default_timeout_s: float = 120,
+                 default_decision: bool = False):
+        self.default_timeout_s = default_timeout_s
+        self.default_decision = default_decision
+        self.rules: List[ApprovalRule] = []
+        self._requests: Dict[str, ApprovalRequest] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._listeners: List[Callable[[ApprovalRequest], None]] = []
+        self._lock = threading.RLock()
+        self._db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS approvals ("
+                "request_id TEXT PRIMARY KEY, session_id TEXT, function_name TEXT, description TEXT, "
+                "arguments TEXT, created_at REAL, deadline REAL, status TEXT, decided_by TEXT, reason TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_approvals_status ON approvals (status, session_id)")
+            # Nobody is waiting for requests a previous process left behind
+            self._db.execute(
+                "UPDATE approvals SET status = 'expired', decided_by = 'restart' WHERE status = 'pending'"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Policy
+    # ------------------------------------------------------------------
+
+    def add_rule(self, function_name: str, predicate: Callable[[Dict[str, Any]], bool], approve: bool,
+                 reason: str = ""):
+        """Auto-approve or auto-deny calls matching the predicate. The first matching rule wins."""
+        self.rules.append(ApprovalRule(function_name, predicate, approve, reason))
+
+    def on_request(self, listener: Callable[[ApprovalRequest], None]):
+        """Register a callback invoked (on the event loop) for every new pending request."""
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    async def request(self, function_name: str, arguments: Dict[str, Any], description: str = "",
+                      session_id: Optional[str] = None, timeout_s: Optional[float] = None) -> ApprovalRequest:
+        """Queue a tool call for approval and wait for the decision."""
+        now = time.time()
+        timeout_s = self.default_timeout_s if timeout_s is None else timeout_s
+        request = ApprovalRequest(
+            request_id=uuid.uuid4().hex[:8],
+            session_id=session_id or current_session.get(),
+            function_name=function_name,
+            description=description,
+            arguments=arguments,
+            created_at=now,
+            deadline=now + timeout_s,
+        )
+
+        rule = next((r for r in self.rules if r.matches(function_name, arguments)), None)
+        if rule is not None:
+            self._finish(request, "approved" if rule.approve else "denied", "policy", rule.reason)
+            self._persist(request)
+            return request
+
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._requests[request.request_id] = request
+            self._futures[request.request_id] = future
+        self._persist(request)
+        for listener in self._listeners:
+            listener(request)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout_s)
+        except asyncio.TimeoutError:
+            self._decide_one(request.request_id, "approved" if self.default_decision else "expired",
+                             "timeout", f"No decision within {timeout_s:g}s")
+        except asyncio.CancelledError:
+            self._decide_one(request.request_id, "expired", "cancelled", "Tool call cancelled")
+            raise
+        return request
+
+    def pending(self, session_id: Optional[str] = None) -> List[ApprovalRequest]:
+        """Outstanding requests, oldest first."""
+        with self._lock:
+            requests = [r for r in self._requests.values() if r.status == "pending"]
+        if session_id is not None:
+            requests = [r for r in requests if r.session_id == session_id]
+        return sorted(requests, key=lambda r: r.created_at)
+
+    def decide(self, request_ids: Iterable[str], approved: bool, reason: str = "") -> int:
+        """Approve or deny several pending requests at once. Safe to call from any thread."""
+        status = "approved" if approved else "denied"
+        return sum(self._decide_one(request_id, status, "user", reason) for request_id in request_ids)
+
+    def approve_all(self, session_id: Optional[str] = None, reason: str = "") -> int:
+        return self.decide([r.request_id for r in self.pending(session_id)], True, reason)
+
+    def deny_all(self, session_id: Optional[str] = None, reason: str = "") -> int:
+        return self.decide([r.request_id for r in self.pending(session_id)], False, reason)
+
+    def history(self, limit: int = 50) -> List[dict]:
+        """Most recent persisted requests and their decisions."""
+        if self._db is None:
+            return []
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM approvals ORDER BY created_at DESC LIMIT ?", (limit,))
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row["arguments"] = json.loads(row["arguments"])
+        return rows
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _decide_one(self, request_id: str, status: str, decided_by: str, reason: str) -> bool:
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None or request.status != "pending":
+                return False
+            self._finish(request, status, decided_by, reason)
+            del self._requests[request_id]
+            future = self._futures.pop(request_id, None)
+            self._persist(request)
+        if future is not None and not future.done():
+            loop = future.get_loop()
+            if _in_loop(loop):
+                _resolve(future, request.approved)
+            else:
+                loop.call_soon_threadsafe(_resolve, future, request.approved)
+        return True
+
+    @staticmethod
+    def _finish(request: ApprovalRequest, status: str, decided_by: str, reason: str):
+        request.status = status
+        request.decided_by = decided_by
+        request.reason = reason
+
+    def _persist(self, request: ApprovalRequest):
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO approvals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (request.request_id, request.session_id, request.function_name, request.description,
+                 json.dumps(request.arguments, default=str), request.created_at, request.deadline,
+                 request.status, request.decided_by, request.reason),
+            )
+            self._db.commit()
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _resolve(future: asyncio.Future, approved: bool):
+    if not future.done():
+        future.set_result(approved)
+
+
+class ApprovalRequiredTool:
+    """Wraps a function tool so each call waits for approval from the queue."""
+
+    def __init__(self, func: Callable, queue: ApprovalQueue, description: Optional[str] = None,
+                 timeout_s: Optional[float] = None):
+        self.original_func = func
+        self.func_name = func.__name__
+        self.description = description or func.__doc__ or "No description"
+        self.queue = queue
+        self.timeout_s = timeout_s
+
+    def _bind_arguments(self, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        """Map positional and keyword arguments to parameter names."""
+        bound = inspect.signature(self.original_func).bind_partial(*args, **kwargs)
+        return dict(bound.arguments)
+
+    async def __call__(self, *args, **kwargs):
+        arguments = self._bind_arguments(args, kwargs)
+        request = await self.queue.request(self.func_name, arguments, self.description, timeout_s=self.timeout_s)
+
+        if not request.approved:
+            detail = f" ({request.reason})" if request.reason else ""
+            print(f"❌ {request.status.upper()}: Not executing {self.func_name}{detail}")
+            return f"⛔ Function '{self.func_name}' was not approved: {request.status}{detail}."
+
+        print(f"✅ APPROVED ({request.decided_by}): Executing {self.func_name}")
+        try:
+            if inspect.iscoroutinefunction(self.original_func):
+                return await self.original_func(**arguments)
+            return await asyncio.to_thread(self.original_func, **arguments)
+        except Exception as e:
+            return f"❌ Error executing {self.func_name}: {e}"
+
+    def as_tool(self) -> Callable:
+        """An async function with the original name, docstring and signature, for `tools=[...]`."""
+        @functools.wraps(self.original_func)
+        async def tool(*args, **kwargs):
+            return await self(*args, **kwargs)
+
+        tool.__doc__ = self.description
+        return tool
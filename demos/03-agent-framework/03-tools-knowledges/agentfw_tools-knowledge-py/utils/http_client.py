@@ -0,0 +1,182 @@
+"""
+HTTP Tool Client
+
+Shared async HTTP layer for REST-calling tools.
+
+- One pooled `httpx.AsyncClient` per base URL: keep-alive connections are
+  reused across tool calls, HTTP/2 is used when the `h2` package is installed
+  (pip install "httpx[http2]").
+- Tools await the requests, so the event loop running the agent never blocks.
+- GET responses are cached according to the server's caching headers:
+  `Cache-Control: max-age` keeps a response fresh, `ETag`/`Last-Modified`
+  are used to revalidate stale entries (a 304 reuses the cached body), and
+  `no-store` responses are never kept.
+
+Usage:
+    todos_api = HttpToolClient("https://dummyjson.com")
+
+    async def get_todo_by_id(todo_id: int) -> str:
+        response = await todos_api.get(f"/todos/{todo_id}")
+        if response.status_code == 200:
+            return response.json()["todo"]
+
+    await todos_api.aclose()
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Optional HTTP/2 support
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class CachedResponse:
+    """A cached GET response with its freshness and validators."""
+    status_code: int
+    content: bytes
+    headers: httpx.Headers
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(self.status_code, headers=self.headers, content=self.content, request=request)
+
+
+# Describe the encoded wire body, not the decoded content we keep
+_TRANSPORT_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def _cache_control(headers: httpx.Headers) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class HttpToolClient:
+    """Pooled async HTTP client with an ETag/Cache-Control aware GET cache."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = True,
+        cache_max_entries: int = 256,
+        default_max_age: float = 0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.cache_max_entries = cache_max_entries
+        self.default_max_age = default_max_age
+        self.headers = headers or {}
+        self.stats = {"requests": 0, "fresh_hits": 0, "revalidated": 0}
+        self._cache: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the event loop the agent runs on
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers=self.headers,
+            )
+        return self._client
+
+    def _store(self, key: str, response: httpx.Response):
+        directives = _cache_control(response.headers)
+        if response.status_code != 200 or "no-store" in directives or "private" in directives:
+            self._cache.pop(key, None)
+            return
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if "no-cache" in directives:
+            max_age = 0.0
+        else:
+            try:
+                max_age = float(directives.get("max-age") or self.default_max_age)
+            except ValueError:
+                max_age = self.default_max_age
+        if max_age <= 0 and not etag and not last_modified:
+            return  # Nothing to serve fresh and nothing to revalidate with
+
+        headers = httpx.Headers(response.headers)
+        for name in _TRANSPORT_HEADERS:
+            headers.pop(name, None)
+        self._cache[key] = CachedResponse(
+            status_code=response.status_code,
+            content=response.content,
+            headers=headers,
+            expires_at=time.monotonic() + max_age,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """GET a path relative to the base URL, served from cache while fresh."""
+        request = self.client.build_request("GET", path, params=params)
+        key = str(request.url)
+        cached = self._cache.get(key)
+
+        if cached is not None and time.monotonic() < cached.expires_at:
+            self._cache.move_to_end(key)
+            self.stats["fresh_hits"] += 1
+            return cached.to_response(request)
+
+        if cached is not None:
+            if cached.etag:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request.headers["If-Modified-Since"] = cached.last_modified
+
+        self.stats["requests"] += 1
+        response = await self.client.send(request)
+
+        if response.status_code == 304 and cached is not None:
+            self.stats["revalidated"] += 1
+            # Merge refreshed caching headers into the stored response
+            merged = httpx.Headers(cached.headers)
+            merged.update({k: v for k, v in response.headers.items() if k.lower() not in _TRANSPORT_HEADERS})
+            refreshed = httpx.Response(cached.status_code, headers=merged, content=cached.content, request=request)
+            self._store(key, refreshed)
+            return refreshed
+
+        self._store(key, response)
+        return response
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json: Any = None) -> httpx.Response:
+        """Send any request on the pooled client; only GETs go through the cache."""
+        if method.upper() == "GET" and json is None:
+            return await self.get(path, params=params)
+        self.stats["requests"] += 1
+        return await self.client.request(method, path, params=params, json=json)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,317 @@
+"""
+OpenAPI Tools
+
+Generates locally executed async tool functions from an OpenAPI 3 document.
+
+Every operation with an `operationId` becomes an async function:
+- named after the operationId in snake_case (`getTodoById` -> `get_todo_by_id`)
+- typed keyword parameters for path/query parameters and for the properties
+  of a JSON object request body, each annotated with its description
+- docstring taken from the operation summary/description
+- returns the JSON response text, or an "Error: ..." string
+
+Agent Framework builds the tool schema from the signature, so the generated
+functions can be passed straight to `tools=[...]`. Requests go through the
+pooled HttpToolClient (utils/http_client.py).
+
+Request coalescing: an operation fetching one item can declare how the API
+fetches several at once with an `x-batch` extension:
+
+    "/todos/{id}": {"get": {
+        "operationId": "getTodoById",
+        "x-batch": {"path": "/todos", "param": "ids", "itemsKey": "todos", "idField": "id"},
+        ...
+    }}
+
+Concurrent calls (e.g. several tool calls in one model turn) that arrive
+within `batch_window_ms` are then sent as one `GET /todos?ids=1,2,3` request
+and each caller receives its own item.
+
+Usage:
+    tools = generate_tools(openapi_spec)
+    agent = client.create_agent(..., tools=list(tools.values()))
+"""
+
+import asyncio
+import inspect
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Callable, Dict, List, Optional
+
+import httpx
+from pydantic import Field
+
+from utils.http_client import HttpToolClient
+
+_JSON_TYPES = {
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "string": str,
+    "array": list,
+    "object": dict,
+}
+
+_HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def snake_case(name: str) -> str:
+    name = re.sub(r"[^0-9a-zA-Z]+", "_", name)
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name)
+    return name.strip("_").lower()
+
+
+def _resolve(spec: dict, schema: Optional[dict]) -> dict:
+    """Follow a local `$ref` (e.g. #/components/schemas/Todo)."""
+    while schema and "$ref" in schema:
+        node = spec
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            node = node[part]
+        schema = node
+    return schema or {}
+
+
+@dataclass
+class ToolParameter:
+    name: str
+    location: str  # path, query or body
+    python_type: type
+    required: bool
+    default: Any = None
+    description: str = ""
+
+    @property
+    def identifier(self) -> str:
+        return snake_case(self.name)
+
+
+@dataclass
+class BatchSpec:
+    """How several single-item requests can be answered by one list request."""
+    path: str
+    param: str
+    items_key: Optional[str] = None
+    id_field: str = "id"
+    separator: str = ","
+
+
+@dataclass
+class Operation:
+    operation_id: str
+    method: str
+    path: str
+    description: str
+    parameters: List[ToolParameter] = field(default_factory=list)
+    batch: Optional[BatchSpec] = None
+
+    @property
+    def tool_name(self) -> str:
+        return snake_case(self.operation_id)
+
+
+def parse_operations(spec: dict) -> List[Operation]:
+    """Extract the operations (with parameters) from an OpenAPI document."""
+    operations = []
+    for path, path_item in spec.get("paths", {}).items():
+        shared_parameters = path_item.get("parameters", [])
+        for method in _HTTP_METHODS:
+            op = path_item.get(method)
+            if not op or not op.get("operationId"):
+                continue
+
+            parameters = []
+            for raw in shared_parameters + op.get("parameters", []):
+                raw = _resolve(spec, raw)
+                if raw.get("in") not in ("path", "query"):
+                    continue
+                schema = _resolve(spec, raw.get("schema"))
+                parameters.append(ToolParameter(
+                    name=raw["name"],
+                    location=raw["in"],
+                    python_type=_JSON_TYPES.get(schema.get("type"), str),
+                    required=raw.get("required", False) or raw["in"] == "path",
+                    default=schema.get("default"),
+                    description=raw.get("description") or schema.get("description", ""),
+                ))
+
+            body = op.get("requestBody", {}).get("content", {}).get("application/json", {})
+            body_schema = _resolve(spec, body.get("schema"))
+            required_props = set(body_schema.get("required", []))
+            for prop, prop_schema in body_schema.get("properties", {}).items():
+                prop_schema = _resolve(spec, prop_schema)
+                parameters.append(ToolParameter(
+                    name=prop,
+                    location="body",
+                    python_type=_JSON_TYPES.get(prop_schema.get("type"), str),
+                    required=prop in required_props,
+                    default=prop_schema.get("default"),
+                    description=prop_schema.get("description", ""),
+                ))
+
+            batch = op.get("x-batch")
+            operations.append(Operation(
+                operation_id=op["operationId"],
+                method=method.upper(),
+                path=path,
+                description=op.get("summary") or op.get("description") or op["operationId"],
+                parameters=parameters,
+                batch=BatchSpec(
+                    path=batch["path"],
+                    param=batch["param"],
+                    items_key=batch.get("itemsKey"),
+                    id_field=batch.get("idField", "id"),
+                    separator=batch.get("separator", ","),
+                ) if batch else None,
+            ))
+    return operations
+
+
+def _format_response(response: httpx.Response) -> str:
+    if response.status_code >= 400:
+        return f"Error: API returned status {response.status_code}"
+    try:
+        return json.dumps(response.json(), ensure_ascii=False)
+    except ValueError:
+        return response.text
+
+
+class RequestCoalescer:
+    """Collects concurrent single-item calls of one operation and answers them with one batch request."""
+
+    def __init__(self, client: HttpToolClient, operation: Operation, window_ms: float, max_batch: int):
+        self.client = client
+        self.operation = operation
+        self.batch = operation.batch
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = {"calls": 0, "batches": 0}
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def fetch(self, item_id) -> str:
+        self.stats["calls"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(str(item_id), []).append(future)
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.get_running_loop().create_task(self._flush(pending))
+            self._tasks.add(task)  # Keep a reference until the batch is answered
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, pending: Dict[str, List[asyncio.Future]]):
+        try:
+            results = await self._request(list(pending))
+        except Exception as e:
+            results = {item_id: f"Error: Could not reach the API - {e}" for item_id in pending}
+        for item_id, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results[item_id])
+
+    async def _request(self, item_ids: List[str]) -> Dict[str, str]:
+        self.stats["batches"] += 1
+        if len(item_ids) == 1:
+            path_param = next(p.name for p in self.operation.parameters if p.location == "path")
+            path = self.operation.path.replace("{" + path_param + "}", item_ids[0])
+            return {item_ids[0]: _format_response(await self.client.get(path))}
+
+        response = await self.client.get(self.batch.path, params={self.batch.param: self.batch.separator.join(item_ids)})
+        if response.status_code >= 400:
+            return {item_id: _format_response(response) for item_id in item_ids}
+        data = response.json()
+        items = data.get(self.batch.items_key, []) if self.batch.items_key else data
+        by_id = {str(item.get(self.batch.id_field)): item for item in items}
+        return {
+            item_id: json.dumps(by_id[item_id], ensure_ascii=False) if item_id in by_id
+            else "Error: API returned status 404"
+            for item_id in item_ids
+        }
+
+
+def _build_tool(operation: Operation, client: HttpToolClient,
+                coalescer: Optional[RequestCoalescer]) -> Callable:
+    by_identifier = {p.identifier: p for p in operation.parameters}
+
+    async def tool(**kwargs) -> str:
+        path = operation.path
+        query, body = {}, {}
+        for identifier, value in kwargs.items():
+            param = by_identifier[identifier]
+            if value is None:
+                continue
+            if param.location == "path":
+                path = path.replace("{" + param.name + "}", str(value))
+            elif param.location == "query":
+                query[param.name] = value
+            else:
+                body[param.name] = value
+
+        if coalescer is not None:
+            path_values = [kwargs[p.identifier] for p in operation.parameters if p.location == "path"]
+            if len(path_values) == 1 and not query and not body:
+                return await coalescer.fetch(path_values[0])
+
+        try:
+            response = await client.request(operation.method, path, params=query or None,
+                                            json=body if operation.method != "GET" else None)
+        except httpx.TimeoutException:
+            return "Error: Request timed out. The API might be unavailable."
+        except httpx.HTTPError as e:
+            return f"Error: Could not reach the API - {e}"
+        return _format_response(response)
+
+    # Required parameters first so the signature is valid Python
+    ordered = sorted(operation.parameters, key=lambda p: not p.required)
+    signature_parameters = [
+        inspect.Parameter(
+            p.identifier,
+            inspect.Parameter.KEYWORD_ONLY,
+            annotation=Annotated[p.python_type if p.required else Optional[p.python_type],
+                                 Field(description=p.description or p.name)],
+            default=inspect.Parameter.empty if p.required else p.default,
+        )
+        for p in ordered
+    ]
+    tool.__signature__ = inspect.Signature(signature_parameters, return_annotation=str)
+    tool.__annotations__ = {p.name: p.annotation for p in signature_parameters} | {"return": str}
+    tool.__name__ = tool.__qualname__ = operation.tool_name
+    tool.__doc__ = operation.description
+    return tool
+
+
+def generate_tools(
+    spec: dict,
+    client: Optional[HttpToolClient] = None,
+    coalesce: bool = True,
+    batch_window_ms: float = 5,
+    max_batch: int = 50,
+) -> Dict[str, Callable]:
+    """Generate one async tool function per operation, keyed by tool name.
+
+    `client` defaults to a pooled HttpToolClient for the first server URL.
+    Operations declaring `x-batch` coalesce concurrent calls when `coalesce` is on.
+    """
+    if client is None:
+        client = HttpToolClient(spec["servers"][0]["url"])
+    tools = {}
+    for operation in parse_operations(spec):
+        coalescer = None
+        if coalesce and operation.batch is not None and operation.method == "GET":
+            coalescer = RequestCoalescer(client, operation, batch_window_ms, max_batch)
+        tool = _build_tool(operation, client, coalescer)
+        tool.coalescer = coalescer
+        tools[operation.tool_name] = tool
+    return tools
@@ -0,0 +1,293 @@
+"""
+Safe Calculator
+
+Sandboxed arithmetic expression engine for calculator tools, replacing
+`eval()` with emptied builtins.
+
+- Expressions are parsed with `ast` and only a whitelist of nodes is
+  accepted: numbers, + - * / // % **, unary +/-, a few math functions and
+  constants. No names, attributes, subscripts, strings or comprehensions, so
+  tricks like `().__class__.__bases__` are rejected before anything runs.
+- Work is bounded: expression length, exponent size and the size of integer
+  results are capped (so `9**9**9` fails immediately instead of pinning a
+  CPU), and evaluation stops once a time budget is used up.
+- Compiled expressions are cached. Constants are lifted out of the syntax
+  tree, so `2 * 3 + 1` and `5 * 7 + 1` share one compiled function; a list
+  of similar expressions (`evaluate_many`) compiles each shape once.
+
+Usage:
+    calculator = SafeCalculator()
+    calculator.evaluate("2 ** 10 + sqrt(16)")        # -> 1028.0
+    calculator.evaluate_many(["1 + 1", "2 + 2"])      # -> [2, 4]
+"""
+
+import ast
+import math
+import operator
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+Number = int | float | complex
+
+
+class ExpressionError(ValueError):
+    """The expression is not allowed or exceeded a limit."""
+
+
+@dataclass
+class _Budget:
+    deadline: float
+
+
+CompiledExpression = Callable[[Sequence[Number], _Budget], Any]
+
+_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+# Allowed argument counts of the wrapped functions, checked before evaluation so
+# errors never expose the internal method signatures
+_ARITY = {"pow": (2, 3), "round": (1, 2), "factorial": (1, 1)}
+
+
+class SafeCalculator:
+    """Evaluates arithmetic expressions from untrusted input within fixed limits."""
+
+    def __init__(
+        self,
+        max_length: int = 500,
+        max_exponent: int = 10_000,
+        max_int_bits: int = 4096,
+        max_factorial: int = 500,
+        timeout_s: float = 0.5,
+        cache_size: int = 1024,
+    ):
+        self.max_length = max_length
+        self.max_exponent = max_exponent
+        self.max_int_bits = max_int_bits
+        self.max_factorial = max_factorial
+        self.timeout_s = timeout_s
+        self.cache_size = cache_size
+        self._parsed: "OrderedDict[str, Tuple[str, Tuple[Number, ...]]]" = OrderedDict()
+        self._compiled: "OrderedDict[str, CompiledExpression]" = OrderedDict()
+        self.stats = {"parsed": 0, "compiled": 0, "evaluated": 0}
+
+        self.functions: Dict[str, Callable] = {
+            "abs": abs,
+            "round": self._round,
+            "min": min,
+            "max": max,
+            "sum": sum,
+            "pow": self._pow,
+            "sqrt": math.sqrt,
+            "exp": math.exp,
+            "log": math.log,
+            "log10": math.log10,
+            "log2": math.log2,
+            "sin": math.sin,
+            "cos": math.cos,
+            "tan": math.tan,
+            "floor": math.floor,
+            "ceil": math.ceil,
+            "factorial": self._factorial,
+        }
+        self._binary_ops: Dict[type, Callable] = {
+            ast.Add: operator.add,
+            ast.Sub: operator.sub,
+            ast.Mult: self._mul,
+            ast.Div: operator.truediv,
+            ast.FloorDiv: operator.floordiv,
+            ast.Mod: operator.mod,
+            ast.Pow: self._pow,
+        }
+
+    # ------------------------------------------------------------------
+    # Bounded operations
+    # ------------------------------------------------------------------
+
+    def _check_int(self, value):
+        if isinstance(value, int) and value.bit_length() > self.max_int_bits:
+            raise ExpressionError(f"Result exceeds {self.max_int_bits} bits")
+        return value
+
+    def _mul(self, a, b):
+        if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > self.max_int_bits + 1:
+            raise ExpressionError(f"Result exceeds {self.max_int_bits} bits")
+        return a * b
+
+    def _pow(self, base, exponent, modulus=None):
+        if modulus is not None:
+            # Modular pow never grows past the modulus, so only the operand sizes are bounded
+            if not all(isinstance(v, int) for v in (base, exponent, modulus)):
+                raise ExpressionError("pow() with a modulus needs integer arguments")
+            if max(abs(base).bit_length(), exponent.bit_length(), modulus.bit_length()) > self.max_int_bits:
+                raise ExpressionError(f"pow() arguments exceed {self.max_int_bits} bits")
+            return pow(base, exponent, modulus)
+        if isinstance(exponent, (int, float)) and abs(exponent) > self.max_exponent:
+            raise ExpressionError(f"Exponent larger than {self.max_exponent}")
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+            if exponent * (abs(base).bit_length() - 1) > self.max_int_bits:
+                raise ExpressionError(f"Result exceeds {self.max_int_bits} bits")
+        return self._check_int(base ** exponent)
+
+    def _round(self, number, ndigits=None):
+        # round(5, -10**6) would build 10**1000000 internally
+        if ndigits is not None and (not isinstance(ndigits, int) or abs(ndigits) > 100):
+            raise ExpressionError("round() digits must be an integer between -100 and 100")
+        return round(number, ndigits)
+
+    def _factorial(self, n):
+        if not isinstance(n, int) or n > self.max_factorial:
+            raise ExpressionError(f"factorial() is limited to integers up to {self.max_factorial}")
+        return math.factorial(n)
+
+    # ------------------------------------------------------------------
+    # Parsing and compilation
+    # ------------------------------------------------------------------
+
+    def _parse(self, expression: str) -> Tuple[str, Tuple[Number, ...]]:
+        """Validate an expression and split it into a shape key and its constants."""
+        cached = self._parsed.get(expression)
+        if cached is not None:
+            self._parsed.move_to_end(expression)
+            return cached
+
+        if len(expression) > self.max_length:
+            raise ExpressionError(f"Expression longer than {self.max_length} characters")
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            raise ExpressionError("Invalid expression")
+
+        constants: List[Number] = []
+        shape = self._shape(tree.body, constants, in_call=False)
+        self._remember(self._parsed, expression, (shape, tuple(constants)))
+        self.stats["parsed"] += 1
+        return shape, tuple(constants)
+
+    def _shape(self, node: ast.AST, constants: List[Number], in_call: bool) -> str:
+        """Whitelist check + structural key with constants replaced by slots."""
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float, complex)):
+                raise ExpressionError("Only numbers are allowed")
+            constants.append(node.value)
+            return "#"
+        if isinstance(node, ast.Name):
+            if node.id not in _CONSTANTS:
+                raise ExpressionError(f"Unknown name: {node.id}")
+            return node.id
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return f"({type(node.op).__name__} {self._shape(node.operand, constants, False)})"
+        if isinstance(node, ast.BinOp) and type(node.op) in self._binary_ops:
+            left = self._shape(node.left, constants, False)
+            right = self._shape(node.right, constants, False)
+            return f"({type(node.op).__name__} {left} {right})"
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in self.functions or node.keywords:
+                raise ExpressionError("Function not allowed")
+            arity = _ARITY.get(node.func.id)
+            if arity and not arity[0] <= len(node.args) <= arity[1]:
+                expected = f"{arity[0]} argument" if arity[0] == arity[1] else f"{arity[0]} or {arity[1]} arguments"
+                raise ExpressionError(f"{node.func.id}() takes {expected}")
+            args = " ".join(self._shape(arg, constants, True) for arg in node.args)
+            return f"({node.func.id} {args})"
+        if isinstance(node, (ast.List, ast.Tuple)) and in_call:
+            # Lists only as function arguments, e.g. sum([1, 2, 3]); never as operands (no [0] * 10**9)
+            return "[" + " ".join(self._shape(elt, constants, False) for elt in node.elts) + "]"
+        raise ExpressionError(f"{type(node).__name__} is not allowed")
+
+    def _compile(self, node: ast.AST, slots: List[int]) -> CompiledExpression:
+        """Turn a validated tree into nested closures reading constants from slots."""
+        if isinstance(node, ast.Constant):
+            index = slots[0]
+            slots[0] += 1
+            return lambda values, budget: values[index]
+        if isinstance(node, ast.Name):
+            value = _CONSTANTS[node.id]
+            return lambda values, budget: value
+        if isinstance(node, ast.UnaryOp):
+            op, operand = _UNARY_OPS[type(node.op)], self._compile(node.operand, slots)
+            return lambda values, budget: op(operand(values, budget))
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [self._compile(elt, slots) for elt in node.elts]
+            return lambda values, budget: [item(values, budget) for item in items]
+
+        if isinstance(node, ast.BinOp):
+            op = self._binary_ops[type(node.op)]
+            left, right = self._compile(node.left, slots), self._compile(node.right, slots)
+
+            def binary(values, budget):
+                a, b = left(values, budget), right(values, budget)
+                if time.perf_counter() > budget.deadline:
+                    raise ExpressionError("Evaluation took too long")
+                return op(a, b)
+
+            return binary
+
+        func = self.functions[node.func.id]
+        args = [self._compile(arg, slots) for arg in node.args]
+
+        def call(values, budget):
+            evaluated = [arg(values, budget) for arg in args]
+            if time.perf_counter() > budget.deadline:
+                raise ExpressionError("Evaluation took too long")
+            return func(*evaluated)
+
+        return call
+
+    def _compiled_for(self, expression: str) -> Tuple[CompiledExpression, Tuple[Number, ...]]:
+        shape, constants = self._parse(expression)
+        compiled = self._compiled.get(shape)
+        if compiled is None:
+            tree = ast.parse(expression.strip(), mode="eval")
+            compiled = self._compile(tree.body, [0])
+            self._remember(self._compiled, shape, compiled)
+            self.stats["compiled"] += 1
+        else:
+            self._compiled.move_to_end(shape)
+        return compiled, constants
+
+    def _remember(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def evaluate(self, expression: str) -> Number:
+        """Evaluate one expression. Raises ExpressionError when it is not allowed or too expensive."""
+        compiled, constants = self._compiled_for(expression)
+        budget = _Budget(time.perf_counter() + self.timeout_s)
+        try:
+            result = compiled(constants, budget)
+        except ExpressionError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise ExpressionError(str(e) or type(e).__name__)
+        self.stats["evaluated"] += 1
+        return self._check_int(result)
+
+    def evaluate_many(self, expressions: Sequence[str]) -> List[Number | ExpressionError]:
+        """Evaluate a list of expressions; each position holds a result or its ExpressionError.
+
+        Expressions of the same shape share one compiled function. The time
+        budget applies to the whole list.
+        """
+        deadline = time.perf_counter() + self.timeout_s
+        results: List[Number | ExpressionError] = []
+        for expression in expressions:
+            try:
+                if time.perf_counter() > deadline:
+                    raise ExpressionError("Evaluation took too long")
+                compiled, constants = self._compiled_for(expression)
+                results.append(self._check_int(compiled(constants, _Budget(deadline))))
+                self.stats["evaluated"] += 1
+            except ExpressionError as e:
+                results.append(e)
+            except (ArithmeticError, ValueError, TypeError) as e:
+                results.append(ExpressionError(str(e) or type(e).__name__))
+        return results
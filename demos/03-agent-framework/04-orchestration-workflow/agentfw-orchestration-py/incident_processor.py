@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncContextManager, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+__all__ = ["TokenRateLimiter", "IncidentResult", "IncidentProcessor", "is_rate_limit_error"]
+
+AgentT = TypeVar("AgentT")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True when an exception looks like a 429 / rate limit response."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "ratelimit" in message
+
+
+class TokenRateLimiter:
+    """
+    Token bucket shared by all workers, replacing fixed sleeps between agent runs.
+
+    Each run reserves the expected number of tokens before it starts (a moving
+    average of earlier runs) and the reservation is corrected with the real
+    usage afterwards. When the bucket is empty, callers wait until enough
+    tokens have been refilled; a rate limit error from the service pauses
+    everyone for a while.
+    """
+
+    def __init__(self, tokens_per_minute: int = 50000, initial_estimate: int = 2000):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            tokens_per_minute: Token budget of the model deployment
+            initial_estimate: Tokens reserved per run until real usage is known
+        """
+        self.capacity = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60.0
+        self.estimate = float(initial_estimate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"runs": 0, "tokens": 0, "waited_s": 0.0, "rate_limited": 0}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    async def acquire(self) -> int:
+        """Wait until the next run fits into the budget and reserve tokens for it."""
+        reserved = int(min(self.estimate, self.capacity))
+        start = time.monotonic()
+        # Holding the lock while waiting keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                delay = self._paused_until - time.monotonic()
+                if delay <= 0 and self._tokens >= reserved:
+                    self._tokens -= reserved
+                    break
+                if delay <= 0:
+                    delay = (reserved - self._tokens) / self.refill_per_second
+                await asyncio.sleep(delay)
+        self.stats["waited_s"] += time.monotonic() - start
+        return reserved
+
+    def record(self, reserved: int, used: int) -> None:
+        """Correct a reservation with the tokens the run actually used (0 = unknown, keep the reservation)."""
+        self.stats["runs"] += 1
+        if used <= 0:
+            return
+        self._refill()
+        self._tokens -= used - reserved
+        self.stats["tokens"] += used
+        self.estimate = 0.8 * self.estimate + 0.2 * used
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for a while, e.g. after a 429 response."""
+        self.stats["rate_limited"] += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+@dataclass
+class IncidentResult:
+    """Outcome of one log file; each file gets its own instance."""
+    log_file: Path
+    status: str = "Pending"
+    iterations: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    final_response: str = ""
+    duration_s: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        return self.log_file.name
+
+    @property
+    def total_tokens(self) -> int:
+        return self.tokens_in + self.tokens_out
+
+
+class IncidentProcessor:
+    """
+    Processes incident log files concurrently with a fixed number of workers.
+
+    Every worker opens its own agent (so no agent or thread is shared between
+    concurrent runs) and takes log files from a queue; all workers share one
+    TokenRateLimiter. A failure in one file is recorded in its result and does
+    not stop the others.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], AsyncContextManager[AgentT]],
+        handler: Callable[[AgentT, Path, TokenRateLimiter], Awaitable[IncidentResult]],
+        rate_limiter: TokenRateLimiter,
+        workers: int = 4,
+    ):
+        """
+        Initialize the processor.
+
+        Args:
+            agent_factory: Returns an async context manager yielding an agent for one worker
+            handler: Resolves one log file with the given agent and returns its result
+            rate_limiter: Token budget shared by all workers
+            workers: Number of log files processed at the same time
+        """
+        self.agent_factory = agent_factory
+        self.handler = handler
+        self.rate_limiter = rate_limiter
+        self.workers = max(1, workers)
+
+    async def _worker(self, queue: "asyncio.Queue[Path]", results: List[IncidentResult]) -> None:
+        async with self.agent_factory() as agent:
+            while True:
+                try:
+                    log_file = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    result = await self.handler(agent, log_file, self.rate_limiter)
+                except Exception as e:
+                    logging.error(f"Processing {log_file.name} failed: {e}")
+                    result = IncidentResult(log_file=log_file, status="Failed", error=str(e))
+                result.duration_s = time.perf_counter() - start
+                results.append(result)
+
+    async def process_all(self, log_files: Iterable[Path]) -> List[IncidentResult]:
+        """Process all log files and return their results in input order."""
+        log_files = list(log_files)
+        queue: "asyncio.Queue[Path]" = asyncio.Queue()
+        for log_file in log_files:
+            queue.put_nowait(log_file)
+
+        results: List[IncidentResult] = []
+        worker_count = min(self.workers, len(log_files))
+        await asyncio.gather(*(self._worker(queue, results) for _ in range(worker_count)))
+
+        order = {log_file: index for index, log_file in enumerate(log_files)}
+        return sorted(results, key=lambda r: order[r.log_file])
+
+    @staticmethod
+    def format_summary(results: List[IncidentResult], elapsed_s: float) -> str:
+        """Build the consolidated summary of all processed log files."""
+        lines = [
+            "Incident Resolution Summary (all files)",
+            f"Files: {len(results)}   Elapsed: {elapsed_s:.1f}s",
+            "",
+            f"{'Log File':<30} {'Status':<24} {'Iter':>4} {'Tokens':>8} {'Time':>8}",
+            "-" * 78,
+        ]
+        for r in results:
+            lines.append(f"{r.filename:<30} {r.status:<24} {r.iterations:>4} {r.total_tokens:>8} {r.duration_s:>7.1f}s")
+        lines.append("-" * 78)
+
+        counts = {}
+        for r in results:
+            counts[r.status] = counts.get(r.status, 0) + 1
+        lines.append("Totals: " + ", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+        lines.append(f"Total Token Usage: Input={sum(r.tokens_in for r in results)}, "
+                     f"Output={sum(r.tokens_out for r in results)}, Total={sum(r.total_tokens for r in results)}")
+
+        failed = [r for r in results if r.error]
+        if failed:
+            lines.append("")
+            lines.append("Errors:")
+            lines.extend(f"- {r.filename}: {r.error}" for r in failed)
+        return "\n".join(lines) + "\n"
@@ -1,24 +1,40 @@
 """Plugins for incident resolution orchestration."""
 
-from .log_plugin import log_functions, read_log_file, print_log_summary, write_outcome
+from .log_plugin import log_functions, read_log_file, print_log_summary, write_outcome, reset_log_reader, query_log_errors, mine_log_templates
+from .log_index import LogIndexer
+from .log_templates import DrainParser, TemplateMiner
+from .log_reader import LogTailReader
 from .devops_plugin import (
     devops_functions,
     restart_service,
     rollback_transaction,
     redeploy_resource,
     increase_quota,
-    escalate_issue
+    escalate_issue,
+    get_action_history,
+    action_journal
 )
+from .action_journal import ActionJournal
 
 __all__ = [
     "log_functions",
     "read_log_file",
     "print_log_summary",
     "write_outcome",
+    "reset_log_reader",
+    "LogTailReader",
+    "query_log_errors",
+    "LogIndexer",
+    "mine_log_templates",
+    "DrainParser",
+    "TemplateMiner",
     "devops_functions",
     "restart_service",
     "rollback_transaction",
     "redeploy_resource",
     "increase_quota",
     "escalate_issue",
+    "get_action_history",
+    "action_journal",
+    "ActionJournal",
 ]
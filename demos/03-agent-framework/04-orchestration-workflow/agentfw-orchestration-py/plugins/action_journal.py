@@ -0,0 +1,179 @@
+import atexit
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+__all__ = ["ActionJournal"]
+
+
+class ActionJournal:
+    """
+    Buffered journal of the remediation actions taken per incident log.
+
+    Every action is kept as a structured record and written by a background
+    thread in batches, so tools never open files themselves:
+    - `<log>-actions.jsonl` - one JSON record per action (for queries and tooling)
+    - `<log>-progress.log`  - the human readable entries read back by read_log_file()
+
+    Actions carry an idempotency key (by default incident + action + target);
+    repeating the same action within `dedupe_window_s` - e.g. a retried tool
+    call - returns the earlier record instead of acting and writing again.
+    Call flush() before reading the files; reads through query() are always
+    up to date. Records of a failed write stay buffered and are written by
+    the next flush.
+    """
+
+    def __init__(self, directory: Callable[[], str | Path], dedupe_window_s: float = 30,
+                 flush_interval_s: float = 0.2, batch_size: int = 100):
+        """
+        Initialize the journal.
+
+        Args:
+            directory: Returns the directory the journal files are written to
+            dedupe_window_s: Repeats of an idempotency key within this window are ignored
+            flush_interval_s: Longest time a record waits in the buffer
+            batch_size: Number of buffered records that triggers an immediate write
+        """
+        self.directory = directory
+        self.dedupe_window_s = dedupe_window_s
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+
+        self._records: Dict[str, List[dict]] = {}
+        self._last_by_key: Dict[str, Tuple[float, dict]] = {}
+        self._pending: List[Tuple[Path, dict]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self.stats = {"recorded": 0, "duplicates": 0, "batches": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="action-journal-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def incident_name(logfile: str | Path) -> str:
+        return Path(logfile).name
+
+    def paths(self, logfile: str | Path) -> Tuple[Path, Path]:
+        """(JSONL journal, progress log) of one incident log."""
+        directory = Path(self.directory())
+        stem = self.incident_name(logfile).replace(".log", "")
+        return directory / f"{stem}-actions.jsonl", directory / f"{stem}-progress.log"
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, logfile: str | Path, action: str, entries: List[str], result: str,
+               target: Optional[str] = None, idempotency_key: Optional[str] = None) -> Tuple[dict, bool]:
+        """
+        Buffer one action for the incident and return (record, duplicate).
+
+        A duplicate is the earlier record with the same idempotency key; nothing is written for it.
+        """
+        incident = self.incident_name(logfile)
+        key = idempotency_key or f"{incident}:{action}:{target or ''}"
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Action journal is closed")
+            previous = self._last_by_key.get(key)
+            if previous is not None and now - previous[0] < self.dedupe_window_s:
+                self.stats["duplicates"] += 1
+                return previous[1], True
+
+            record = {
+                "id": uuid.uuid4().hex,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "incident": incident,
+                "action": action,
+                "target": target,
+                "idempotency_key": key,
+                "result": result,
+                "entries": entries,
+            }
+            self._last_by_key[key] = (now, record)
+            self._records.setdefault(incident, []).append(record)
+            self._pending.append((Path(logfile), record))
+            self.stats["recorded"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.notify()
+        return record, False
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self, logfile: Optional[str | Path] = None, action: Optional[str] = None,
+              target: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Recorded actions of this process, oldest first, optionally filtered."""
+        with self._lock:
+            if logfile is not None:
+                records = list(self._records.get(self.incident_name(logfile), []))
+            else:
+                records = sorted((r for rs in self._records.values() for r in rs), key=lambda r: r["timestamp"])
+        records = [r for r in records
+                   if (action is None or r["action"] == action) and (target is None or r["target"] == target)]
+        return records[-limit:] if limit else records
+
+    def count(self, logfile: str | Path, action: Optional[str] = None) -> int:
+        return len(self.query(logfile, action=action))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> None:
+        """Write all buffered records, one append per file."""
+        # Take the batch under the write lock, so a read after flush() sees every earlier record
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            by_file: Dict[Tuple[Path, Path], List[Tuple[Path, dict]]] = {}
+            for logfile, record in batch:
+                by_file.setdefault(self.paths(logfile), []).append((logfile, record))
+            written: List[Tuple[Path, Path]] = []
+            try:
+                for (journal_path, progress_path), items in by_file.items():
+                    records = [record for _, record in items]
+                    journal_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(journal_path, "a", encoding="utf-8") as file:
+                        file.writelines(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+                    with open(progress_path, "a", encoding="utf-8") as file:
+                        file.writelines("\n" + "\n".join(r["entries"]).strip() for r in records)
+                    written.append((journal_path, progress_path))
+            except Exception:
+                # Put the records of the files not written back in front of the buffer for the next flush
+                retry = [item for paths, items in by_file.items() if paths not in written for item in items]
+                with self._lock:
+                    self._pending[:0] = retry
+                raise
+            self.stats["batches"] += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._wakeup.wait(self.flush_interval_s)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Action journal: failed to write batch, will retry - {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join(timeout=5)
+        self.flush()
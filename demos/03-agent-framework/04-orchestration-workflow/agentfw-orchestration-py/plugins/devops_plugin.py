@@ -1,22 +1,21 @@
 from datetime import datetime
-from typing import Annotated, Any, Callable, Set
-from pathlib import Path
+from typing import Annotated, Any, Callable, List, Optional, Set
 from pydantic import Field
 
+from .action_journal import ActionJournal
+
 # Global variable to store outcome directory
 OUTCOME_DIRECTORY = "data/outcome"
 
-def append_to_log_file(filepath: str, content: str) -> None:
-    """Helper function to append content to a progress log file in the outcome directory."""
-    # Write to progress log file in outcome directory to track actions as they happen
-    filename = Path(filepath).name
-    progress_log_path = Path(OUTCOME_DIRECTORY) / filename.replace(".log", "-progress.log")
-    
-    # Ensure outcome directory exists
-    Path(OUTCOME_DIRECTORY).mkdir(parents=True, exist_ok=True)
-    
-    with open(progress_log_path, 'a', encoding='utf-8') as file:
-        file.write('\n' + content.strip())
+# Buffered JSONL + progress log journal of all actions, shared by concurrent incidents
+action_journal = ActionJournal(directory=lambda: OUTCOME_DIRECTORY)
+
+def record_action(logfile: str, action: str, log_entries: List[str], result: str, target: Optional[str] = None) -> str:
+    """Helper function to journal an action; a repeat of the same action within the dedupe window is not performed again."""
+    record, duplicate = action_journal.record(logfile, action, log_entries, result, target=target)
+    if duplicate:
+        return f"{record['result']} (duplicate request ignored: {action} was already performed at {record['timestamp']})"
+    return result
 
 def restart_service(
     service_name: Annotated[str, Field(description="The name of the service to restart")],
@@ -29,10 +28,7 @@ def restart_service(
         f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] INFO  {service_name}: Service restarted successfully.",
     ]
 
-    log_message = "\n".join(log_entries)
-    append_to_log_file(logfile, log_message)
-    
-    return f"Service {service_name} restarted successfully."
+    return record_action(logfile, "restart_service", log_entries, f"Service {service_name} restarted successfully.", target=service_name)
 
 def rollback_transaction(
     logfile: Annotated[str, Field(description="The path to the log file")]
@@ -44,10 +40,7 @@ def rollback_transaction(
         f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] INFO   Transaction rollback completed successfully.",
     ]
 
-    log_message = "\n".join(log_entries)
-    append_to_log_file(logfile, log_message)
-    
-    return "Transaction rolled back successfully."
+    return record_action(logfile, "rollback_transaction", log_entries, "Transaction rolled back successfully.")
 
 def redeploy_resource(
     resource_name: Annotated[str, Field(description="The name of the resource to redeploy")],
@@ -60,10 +53,7 @@ def redeploy_resource(
         f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] INFO   DeploymentManager: Service successfully redeployed, resource '{resource_name}' created successfully.",
     ]
 
-    log_message = "\n".join(log_entries)
-    append_to_log_file(logfile, log_message)
-    
-    return f"Resource '{resource_name}' redeployed successfully."
+    return record_action(logfile, "redeploy_resource", log_entries, f"Resource '{resource_name}' redeployed successfully.", target=resource_name)
 
 def increase_quota(
     logfile: Annotated[str, Field(description="The path to the log file")]
@@ -75,10 +65,7 @@ def increase_quota(
         f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] INFO   APIManager: Quota successfully increased to 150% of previous limit.",
     ]
 
-    log_message = "\n".join(log_entries)
-    append_to_log_file(logfile, log_message)
-
-    return "Successfully increased quota."
+    return record_action(logfile, "increase_quota", log_entries, "Successfully increased quota.")
 
 def escalate_issue(
     logfile: Annotated[str, Field(description="The path to the log file")]
@@ -89,16 +76,26 @@ def escalate_issue(
         f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ALERT  DevopsAssistant: Requesting escalation.",
     ]
     
-    log_message = "\n".join(log_entries)
-    append_to_log_file(logfile, log_message)
-    
-    return "Submitted escalation request."
+    return record_action(logfile, "escalate_issue", log_entries, "Submitted escalation request.")
 
 # Define the set of devops functions
+def get_action_history(
+    logfile: Annotated[str, Field(description="The path to the log file")]
+) -> str:
+    """A function that lists the devops actions already taken for the log file, oldest first."""
+    records = action_journal.query(logfile)
+    if not records:
+        return "No actions taken yet."
+    return "\n".join(
+        f"{r['timestamp']} {r['action']}" + (f" ({r['target']})" if r['target'] else "") + f": {r['result']}"
+        for r in records
+    )
+
 devops_functions: Set[Callable[..., Any]] = {
     restart_service,
     rollback_transaction,
     redeploy_resource,
     increase_quota,
-    escalate_issue
+    escalate_issue,
+    get_action_history
 }
\ No newline at end of file
@@ -0,0 +1,107 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+__all__ = ["SEVERITIES", "LogIndex", "LogIndexer", "line_severities"]
+
+SEVERITIES = ("ERROR", "WARNING", "ALERT", "CRITICAL")
+
+_SEVERITY_PATTERN = re.compile(r" (ERROR|WARNING|ALERT|CRITICAL) ")
+_TIMESTAMP_PATTERN = re.compile(r"^\[([^\]]+)\]|^(\d{4}-\d{2}-\d{2}[ T][\d:.,]+)")
+
+
+def line_severities(line: str) -> set:
+    """Severities mentioned in a log line, e.g. {"ERROR"} for '[...] ERROR svc: failed'."""
+    return set(_SEVERITY_PATTERN.findall(line))
+
+
+def _timestamp(line: str) -> Optional[str]:
+    match = _TIMESTAMP_PATTERN.match(line)
+    return (match.group(1) or match.group(2)) if match else None
+
+
+@dataclass
+class LogIndex:
+    """Per-severity counts, line positions and first occurrences of one log file version."""
+    path: str
+    mtime_ns: int
+    size: int
+    line_count: int = 0
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(SEVERITIES, 0))
+    # (line number, byte offset) of every line per severity
+    positions: Dict[str, List[Tuple[int, int]]] = field(default_factory=lambda: {s: [] for s in SEVERITIES})
+    first_seen: Dict[str, Optional[str]] = field(default_factory=lambda: dict.fromkeys(SEVERITIES))
+
+
+class LogIndexer:
+    """
+    Builds severity indexes of log files in a single streaming pass.
+
+    Indexes are cached by path and rebuilt only when the file's mtime or size
+    changes, so the log summary, the diagram and the query tool share one scan
+    per file version. Matching lines are read back by seeking to their offsets.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, LogIndex] = {}
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "hits": 0}
+
+    def index(self, filepath: str | Path) -> LogIndex:
+        """Return the index of a file, building it if the file changed since the last call."""
+        key = str(Path(filepath).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                self.stats["hits"] += 1
+                return cached
+
+        index = self._build(key, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._cache[key] = index
+            self.stats["builds"] += 1
+        return index
+
+    @staticmethod
+    def _build(path: str, mtime_ns: int, size: int) -> LogIndex:
+        index = LogIndex(path=path, mtime_ns=mtime_ns, size=size)
+        offset = 0
+        with open(path, "rb") as file:
+            for line_number, raw in enumerate(file, start=1):
+                if offset >= size:
+                    break  # Appended after stat(); belongs to the next version
+                line = raw.decode("utf-8", errors="replace")
+                for severity in line_severities(line):
+                    index.counts[severity] += 1
+                    index.positions[severity].append((line_number, offset))
+                    if index.first_seen[severity] is None:
+                        index.first_seen[severity] = _timestamp(line)
+                index.line_count = line_number
+                offset += len(raw)
+        return index
+
+    def lines(self, filepath: str | Path, severities: Iterable[str] = ("ERROR", "CRITICAL"),
+              limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Return (line number, text) of the lines with any of the given severities, in file order."""
+        index = self.index(filepath)
+        positions = sorted({p for severity in severities for p in index.positions.get(severity.upper(), [])})
+        if limit is not None:
+            positions = positions[:limit]
+
+        result = []
+        with open(index.path, "rb") as file:
+            for line_number, offset in positions:
+                file.seek(offset)
+                result.append((line_number, file.readline().decode("utf-8", errors="replace").rstrip("\r\n")))
+        return result
+
+    def forget(self, filepath: Optional[str | Path] = None) -> None:
+        with self._lock:
+            if filepath is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(str(Path(filepath).resolve()), None)
@@ -3,40 +3,91 @@ from typing import Annotated, Any, Callable, Set
 from pathlib import Path
 from pydantic import Field
 
+from .log_index import SEVERITIES, LogIndexer
+from .log_reader import LogTailReader
+from .log_templates import TemplateMiner
+from .devops_plugin import action_journal
+
 # Global variable to store outcome directory
 OUTCOME_DIRECTORY = "data/outcome"
 
+# Remembers how far each log has been read, so repeated reads only return new lines
+log_reader = LogTailReader()
+
+# Severity index per log file version, shared by the summary, the diagram and query_log_errors()
+log_indexer = LogIndexer()
+
+# Drain-style templates per log file version, so the agent sees patterns instead of raw lines
+template_miner = TemplateMiner()
+
+def progress_log_path(filepath: str) -> Path:
+    """Path of the progress log that the devops functions append actions to."""
+    return Path(OUTCOME_DIRECTORY) / Path(filepath).name.replace(".log", "-progress.log")
+
+def reset_log_reader(filepath: str) -> None:
+    """Make the next read_log_file() call return the log and its progress log from the start."""
+    log_reader.forget(filepath)
+    log_reader.forget(progress_log_path(filepath))
+
 def read_log_file(filepath: Annotated[str, Field(description="The path to the log file to read")]) -> str:
-    """Accesses the given file path string and returns the file contents as a string.
+    """Accesses the given file path string and returns what is new in the log since the previous read.
+    The first read returns the whole log (summarized if it is large), later reads only new lines.
     Includes both the original log and any progress log entries from actions taken."""
-    # Read the original log file
-    with open(filepath, 'r', encoding='utf-8') as file:
-        original_log = file.read()
-    
-    # Look for progress log in outcome directory
-    filename = Path(filepath).name
-    progress_log_path = Path(OUTCOME_DIRECTORY) / filename.replace(".log", "-progress.log")
-    
-    # Check if progress log exists and append it
-    if progress_log_path.exists():
-        with open(progress_log_path, 'r', encoding='utf-8') as file:
-            progress_log = file.read()
-        return f"{original_log}\n\n--- ACTIONS IN PROGRESS ---\n{progress_log}"
-    
-    return original_log
+    if not Path(filepath).is_file():
+        return f"Error: log file '{filepath}' not found"
+    action_journal.flush()  # Make buffered actions visible in the progress log
+    original_log = log_reader.read_new(filepath)
+    progress_log = log_reader.read_new(progress_log_path(filepath))
+
+    if not original_log and not progress_log:
+        return "(no new log entries since the previous read)"
+    if not progress_log:
+        return original_log
+    return f"{original_log or '(no new log entries)'}\n\n--- ACTIONS IN PROGRESS ---\n{progress_log}"
+
+def mine_log_templates(
+    filepath: Annotated[str, Field(description="The path to the log file to analyze")],
+    top: Annotated[int, Field(description="Maximum number of templates to return")] = 30
+) -> str:
+    """Clusters the log lines into templates (variable parts shown as <*>) and returns each template
+    with its severity, line count and an example line, most severe first. Use this instead of
+    reading a whole log; read_log_file() afterwards only returns entries added since."""
+    if not Path(filepath).is_file():
+        return f"Error: log file '{filepath}' not found"
+    # The templates cover the log as it is now; later reads only need what is appended
+    log_reader.mark_read(filepath, template_miner.mine(filepath).size)
+    return template_miner.summary(filepath, top=top)
+
+def query_log_errors(
+    filepath: Annotated[str, Field(description="The path to the log file to query")],
+    severity: Annotated[str, Field(description="Comma separated severities to return: ERROR, CRITICAL, WARNING or ALERT")] = "ERROR,CRITICAL",
+    limit: Annotated[int, Field(description="Maximum number of lines to return")] = 20
+) -> str:
+    """Returns severity counts, first occurrence times and the matching lines (with line numbers) of a log file,
+    without reading the whole file."""
+    if not Path(filepath).is_file():
+        return f"Error: log file '{filepath}' not found"
+    severities = [s.strip().upper() for s in severity.split(",") if s.strip().upper() in SEVERITIES]
+    if not severities:
+        return f"Error: unknown severity '{severity}', use one of {', '.join(SEVERITIES)}"
+
+    index = log_indexer.index(filepath)
+    lines = log_indexer.lines(filepath, severities, limit=max(1, limit))
+    matching = sum(index.counts[s] for s in severities)
+    result = [
+        f"{Path(filepath).name}: {index.line_count} lines, "
+        + ", ".join(f"{s.lower()}={index.counts[s]}" for s in SEVERITIES),
+        "First occurrence: " + ", ".join(f"{s}={index.first_seen[s]}" for s in severities if index.counts[s]),
+        f"{', '.join(severities)} lines ({len(lines)} of {matching}):",
+    ]
+    result.extend(f"{line_number}: {text}" for line_number, text in lines)
+    return "\n".join(result)
 
 def print_log_summary(filepath: str) -> None:
     """Print a summary of log severities (errors, warnings, alerts, critical)."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        
-        error_count = sum(1 for line in lines if " ERROR " in line)
-        warning_count = sum(1 for line in lines if " WARNING " in line)
-        alert_count = sum(1 for line in lines if " ALERT " in line)
-        critical_count = sum(1 for line in lines if " CRITICAL " in line)
-        
-        print(f"\033[93mSummary: errors={error_count}, warnings={warning_count}, alerts={alert_count}, critical={critical_count}\033[0m")
+        counts = log_indexer.index(filepath).counts
+        print(f"\033[93mSummary ({Path(filepath).name}): errors={counts['ERROR']}, warnings={counts['WARNING']}, alerts={counts['ALERT']}, critical={counts['CRITICAL']}\033[0m")
     except Exception as e:
         print(f"\033[93mSummary unavailable: {e}\033[0m")
 
@@ -51,5 +102,7 @@ def write_outcome(original_log_path: str, outcome_text: str) -> None:
 
 # Define the set of log file functions
 log_functions: Set[Callable[..., Any]] = {
-    read_log_file
+    read_log_file,
+    mine_log_templates,
+    query_log_errors
 }
@@ -0,0 +1,131 @@
+import mmap
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from .log_index import SEVERITIES, line_severities
+
+__all__ = ["LogTailReader"]
+
+
+class LogTailReader:
+    """
+    Incremental log reader that remembers a byte offset per file.
+
+    Every read returns only what was appended since the previous read of the
+    same file. New content larger than `max_chars` is replaced by a bounded
+    summary (severity counts, the first error lines and the last lines), so
+    the size of a tool result does not grow with the log. Regions of at least
+    `mmap_threshold` bytes are scanned through mmap instead of being read
+    into memory.
+    """
+
+    def __init__(self, max_chars: int = 8000, tail_lines: int = 40, max_error_lines: int = 20,
+                 mmap_threshold: int = 1 << 20):
+        """
+        Initialize the reader.
+
+        Args:
+            max_chars: Largest amount of new content returned verbatim
+            tail_lines: Number of last lines included in a summary
+            max_error_lines: Number of ERROR/CRITICAL lines included in a summary
+            mmap_threshold: Regions of at least this many bytes are scanned with mmap
+        """
+        self.max_chars = max_chars
+        self.tail_lines = tail_lines
+        self.max_error_lines = max_error_lines
+        self.mmap_threshold = mmap_threshold
+        self._offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(filepath: str | Path) -> str:
+        return str(Path(filepath).resolve())
+
+    def forget(self, filepath: Optional[str | Path] = None) -> None:
+        """Start reading a file (or all files) from the beginning again."""
+        with self._lock:
+            if filepath is None:
+                self._offsets.clear()
+            else:
+                self._offsets.pop(self._key(filepath), None)
+
+    def mark_read(self, filepath: str | Path, offset: int) -> None:
+        """Treat a file as read up to `offset`, e.g. after it was summarized another way."""
+        with self._lock:
+            key = self._key(filepath)
+            self._offsets[key] = max(self._offsets.get(key, 0), offset)
+
+    def offset(self, filepath: str | Path) -> int:
+        with self._lock:
+            return self._offsets.get(self._key(filepath), 0)
+
+    def read_new(self, filepath: str | Path) -> str:
+        """
+        Return the content appended to a file since the previous call.
+
+        Returns:
+            The new content, a bounded summary of it, or "" when nothing changed
+        """
+        key = self._key(filepath)
+        try:
+            size = os.path.getsize(filepath)
+        except FileNotFoundError:
+            return ""
+
+        with self._lock:
+            start = self._offsets.get(key, 0)
+            if size < start:
+                start = 0  # Truncated or replaced: read it again from the start
+            self._offsets[key] = size
+        if size == start:
+            return ""
+
+        with open(filepath, "rb") as file:
+            if size - start <= self.max_chars:
+                file.seek(start)
+                return file.read(size - start).decode("utf-8", errors="replace").strip("\n")
+            return self._summarize(file, start, size)
+
+    def _lines(self, file: BinaryIO, start: int, end: int) -> Iterator[str]:
+        """Yield the lines between two byte offsets without loading the region."""
+        if end - start >= self.mmap_threshold:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mm.seek(start)
+                while mm.tell() < end:
+                    yield mm.readline().decode("utf-8", errors="replace").rstrip("\r\n")
+            return
+        file.seek(start)
+        position = start
+        for raw in file:
+            if position >= end:
+                break
+            position += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def _summarize(self, file: BinaryIO, start: int, end: int) -> str:
+        counts = dict.fromkeys(SEVERITIES, 0)
+        errors = []
+        tail = deque(maxlen=self.tail_lines)
+        line_count = 0
+        for line in self._lines(file, start, end):
+            line_count += 1
+            severities = line_severities(line)
+            for severity in severities:
+                counts[severity] += 1
+            if len(errors) < self.max_error_lines and severities & {"ERROR", "CRITICAL"}:
+                errors.append(line)
+            tail.append(line)
+
+        parts = [
+            f"[{line_count} new lines, {end - start} bytes - summarized]",
+            "Severity counts: " + ", ".join(f"{severity.lower()}={count}" for severity, count in counts.items()),
+        ]
+        if errors:
+            parts.append(f"First {len(errors)} ERROR/CRITICAL lines:")
+            parts.extend(errors)
+        parts.append(f"Last {len(tail)} lines:")
+        parts.extend(tail)
+        return "\n".join(parts)
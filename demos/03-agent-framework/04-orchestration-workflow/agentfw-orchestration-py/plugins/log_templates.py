@@ -0,0 +1,191 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .log_index import SEVERITIES, line_severities
+
+__all__ = ["LogCluster", "DrainParser", "TemplateMiner", "WILDCARD"]
+
+WILDCARD = "<*>"
+
+# Variable parts replaced before clustering; order matters (timestamps before plain numbers)
+_MASKS = [
+    re.compile(r"^\[[^\]]*\]\s*"),  # leading [timestamp]
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?Z?"),
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),
+    re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"),
+    re.compile(r"(?<![A-Za-z])-?\d+(?:\.\d+)?(?:ms|s|%|KB|MB|GB)?\b"),
+]
+
+
+def _mask(line: str) -> str:
+    line = _MASKS[0].sub("", line, count=1)
+    for pattern in _MASKS[1:]:
+        line = pattern.sub(WILDCARD, line)
+    return line
+
+
+@dataclass
+class LogCluster:
+    """One log template with the number of lines it covers and a few example lines."""
+    template: List[str]
+    count: int = 0
+    severities: Dict[str, int] = field(default_factory=dict)
+    exemplars: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.template)
+
+    @property
+    def severity(self) -> str:
+        """Most severe level seen in the cluster, or INFO."""
+        for level in ("CRITICAL", "ERROR", "ALERT", "WARNING"):
+            if self.severities.get(level):
+                return level
+        return "INFO"
+
+
+class DrainParser:
+    """
+    Drain-style online template miner.
+
+    Lines are masked (timestamps, ids, numbers), split into tokens and routed
+    through a fixed-depth tree keyed by token count and the first tokens; in
+    the leaf, a line joins the most similar cluster if at least
+    `similarity_threshold` of its tokens match (a masked value matches a
+    wildcard), and the template's differing positions become wildcards.
+    Otherwise it starts a new cluster.
+    """
+
+    def __init__(self, depth: int = 4, similarity_threshold: float = 0.5, max_children: int = 100,
+                 max_exemplars: int = 2):
+        """
+        Initialize the parser.
+
+        Args:
+            depth: Depth of the parse tree (token count level + depth - 2 token levels)
+            similarity_threshold: Share of matching tokens needed to join a cluster
+            max_children: Children per tree node before further tokens share a wildcard branch
+            max_exemplars: Example lines kept per cluster
+        """
+        self.prefix_tokens = max(1, depth - 2)
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_exemplars = max_exemplars
+        self.clusters: List[LogCluster] = []
+        self.line_count = 0
+        self.size = 0  # Bytes of the file that were mined
+        self._tree: Dict = {}
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_tokens]:
+            key = WILDCARD if any(c.isdigit() for c in token) else token
+            if key not in node and len(node) >= self.max_children:
+                key = WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault(None, [])
+
+    def _similarity(self, template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        """(share of matching tokens, matching wildcards); masked values match a wildcard in the template."""
+        same = sum(1 for a, b in zip(template, tokens) if a == b)
+        params = sum(1 for a, b in zip(template, tokens) if a == b == WILDCARD)
+        return (same / len(tokens) if tokens else 1.0), params
+
+    def add(self, line: str, line_number: Optional[int] = None) -> LogCluster:
+        """Assign one raw log line to a cluster and return it."""
+        self.line_count += 1
+        tokens = _mask(line).split()
+        leaf = self._leaf(tokens)
+
+        # Most similar cluster; on a tie, the one whose wildcards line up with more masked values
+        best, best_similarity = None, (-1.0, -1)
+        for cluster in leaf:
+            similarity = self._similarity(cluster.template, tokens)
+            if similarity > best_similarity:
+                best, best_similarity = cluster, similarity
+
+        if best is None or best_similarity[0] < self.similarity_threshold:
+            best = LogCluster(template=list(tokens))
+            leaf.append(best)
+            self.clusters.append(best)
+        else:
+            best.template = [a if a == b else WILDCARD for a, b in zip(best.template, tokens)]
+
+        best.count += 1
+        for severity in line_severities(line):
+            best.severities[severity] = best.severities.get(severity, 0) + 1
+        if len(best.exemplars) < self.max_exemplars:
+            best.exemplars.append((line_number or self.line_count, line.strip()))
+        return best
+
+    def ranked(self) -> List[LogCluster]:
+        """Clusters with errors first, then by number of lines."""
+        order = {level: rank for rank, level in enumerate(("CRITICAL", "ERROR", "ALERT", "WARNING", "INFO"))}
+        return sorted(self.clusters, key=lambda c: (order[c.severity], -c.count))
+
+
+@dataclass
+class _MinedLog:
+    mtime_ns: int
+    size: int
+    parser: DrainParser
+
+
+class TemplateMiner:
+    """Mines log files once per file version (mtime and size) and caches the clusters."""
+
+    def __init__(self, **parser_options):
+        self.parser_options = parser_options
+        self._cache: Dict[str, _MinedLog] = {}
+        self._lock = threading.Lock()
+
+    def mine(self, filepath: str | Path) -> DrainParser:
+        key = str(Path(filepath).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                return cached.parser
+
+        parser = DrainParser(**self.parser_options)
+        offset = 0
+        with open(key, "rb") as file:
+            for line_number, raw in enumerate(file, start=1):
+                if offset >= stat.st_size:
+                    break
+                offset += len(raw)
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if line.strip():
+                    parser.add(line, line_number)
+        parser.size = offset
+
+        with self._lock:
+            self._cache[key] = _MinedLog(stat.st_mtime_ns, stat.st_size, parser)
+        return parser
+
+    def summary(self, filepath: str | Path, top: int = 30) -> str:
+        """Templates of a log file as text: severity, line count, template and an example line."""
+        parser = self.mine(filepath)
+        clusters = parser.ranked()
+        shown = clusters[:max(1, top)]
+        ratio = parser.line_count / len(clusters) if clusters else 0
+        lines = [
+            f"{Path(filepath).name}: {parser.line_count} lines -> {len(clusters)} templates ({ratio:.0f} lines per template)",
+            "Severities: " + ", ".join(
+                f"{s.lower()}={sum(c.severities.get(s, 0) for c in clusters)}" for s in SEVERITIES),
+            "",
+        ]
+        for cluster in shown:
+            lines.append(f"[{cluster.severity}] x{cluster.count}: {cluster.text}")
+            line_number, exemplar = cluster.exemplars[0]
+            lines.append(f"    e.g. line {line_number}: {exemplar}")
+        hidden = clusters[len(shown):]
+        if hidden:
+            lines.append(f"... {len(hidden)} more templates covering {sum(c.count for c in hidden)} lines")
+        return "\n".join(lines)
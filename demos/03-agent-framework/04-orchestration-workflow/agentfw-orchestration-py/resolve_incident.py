@@ -1,6 +1,8 @@
 import asyncio
 import os
 import logging
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -18,6 +20,9 @@ from log_util import LogUtil, vdebug
 # Import diagram generator
 from diagram_generator import MermaidDiagramGenerator
 
+# Import concurrent incident processing
+from incident_processor import IncidentProcessor, IncidentResult, TokenRateLimiter, is_rate_limit_error
+
 # Load environment variables early
 load_dotenv()
 
@@ -27,6 +32,11 @@ create_mermaid_diagram = os.getenv("CREATE_MERMAID_DIAGRAM", "false") == "true"
 log_directory = os.getenv("LOG_DIRECTORY", "data/logs")
 outcome_directory = os.getenv("OUTCOME_DIRECTORY", "data/outcome")
 ticket_folder = outcome_directory  # Write tickets to outcome directory
+incident_workers = int(os.getenv("INCIDENT_WORKERS", "4"))
+tokens_per_minute = int(os.getenv("TOKENS_PER_MINUTE", "50000"))
+max_iterations = int(os.getenv("MAX_ITERATIONS", "5"))
+rate_limit_backoff_seconds = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", "20"))
+error_backoff_seconds = float(os.getenv("ERROR_BACKOFF_SECONDS", "2"))
 
 # Set outcome directory for plugins
 log_plugin.OUTCOME_DIRECTORY = outcome_directory
@@ -36,6 +46,177 @@ devops_plugin.OUTCOME_DIRECTORY = outcome_directory
 logging_config = LogUtil()
 logging_config.setup_logging(verbose=verbose_output)
 
+ORCHESTRATOR_INSTRUCTIONS = """You are an orchestrator that coordinates incident resolution.
+
+CRITICAL: You have access to these functions that you MUST use:
+- mine_log_templates(filepath) - summarizes the whole log as templates with counts and example lines
+- read_log_file(filepath) - reads the log file and shows current state including any actions taken.
+  It only returns what is new since your previous read; earlier entries are in this conversation.
+- query_log_errors(filepath, severity, limit) - returns severity counts and the ERROR/CRITICAL (or other) lines of a log
+- restart_service(service_name, logfile) - restarts a failing service
+- rollback_transaction(logfile) - rollbacks a failed transaction  
+- redeploy_resource(resource_name, logfile) - redeploys a resource
+- increase_quota(logfile) - increases resource quota
+- escalate_issue(logfile) - escalates when unable to resolve
+- get_action_history(logfile) - lists the actions already taken for the log
+
+Your workflow on EVERY iteration:
+1. On the first turn for a log, call mine_log_templates(filepath) FIRST instead of reading the raw log;
+   on later turns call read_log_file(filepath) FIRST to see the new entries and actions taken
+2. Look for ERROR or CRITICAL entries in the log
+3. Check the "ACTIONS IN PROGRESS" sections (this and earlier reads) to see what was already attempted
+4. If NO errors exist OR errors have been resolved by previous actions, respond with "No action needed"
+5. If errors still exist, call ONE devops function to fix the issue (avoid repeating actions that failed)
+6. If same action tried multiple times without success, call escalate_issue()
+
+RULES:
+- MUST call mine_log_templates() (first turn) or read_log_file() (later turns) at the start of every turn
+- Use query_log_errors() only when you need the exact error lines behind a template
+- Only take ONE action per iteration
+- Check what actions were already attempted before taking new action
+- Be concise in your responses
+- Focus on resolving the issue efficiently"""
+
+
+def create_orchestrator(credential, project_endpoint: str, model_deployment: str) -> ChatAgent:
+    """Create an orchestrator agent; each worker gets its own so concurrent runs share no state."""
+    return ChatAgent(
+        chat_client=AzureAIAgentClient(
+            project_endpoint=project_endpoint,
+            model_deployment_name=model_deployment,
+            async_credential=credential
+        ),
+        instructions=ORCHESTRATOR_INSTRUCTIONS,
+        name="incident_orchestrator",
+        tools=list(log_functions) + list(devops_functions)
+    )
+
+
+async def resolve_log_file(agent: ChatAgent, log_file: Path, rate_limiter: TokenRateLimiter) -> IncidentResult:
+    """Run the orchestrator on one log file until the issue is resolved, escalated or out of iterations."""
+    filename = log_file.name
+    logfile_path = str(log_file)
+    result = IncidentResult(log_file=log_file)
+
+    logging.info(f"Processing log file: {filename}")
+    print(f"\n[{filename}] Processing log file")
+
+    # Print log summary before analysis
+    log_plugin.print_log_summary(logfile_path)
+
+    # One conversation per file: the agent sees the log as templates first, then read_log_file() only returns new entries
+    log_plugin.reset_log_reader(logfile_path)
+    thread = agent.get_new_thread()
+
+    resolved = False
+    escalated = False
+    while result.iterations < max_iterations and not resolved and not escalated:
+        result.iterations += 1
+        iteration = result.iterations
+        logging.info(f"[{filename}] Iteration {iteration}/{max_iterations}")
+
+        # Create the prompt for this iteration
+        if iteration == 1:
+            prompt = f"Analyze the log file '{logfile_path}' using mine_log_templates(). Then take appropriate corrective action if needed."
+        else:
+            prompt = f"Read the new entries of the log file '{logfile_path}' using read_log_file() to check if the previous issue has been resolved. If resolved, respond with 'No action needed'. If not, take further action."
+
+        logging.debug(f"[{filename}] Prompt: {prompt}")
+
+        # Wait for room in the shared token budget instead of sleeping a fixed time
+        reserved = await rate_limiter.acquire()
+        try:
+            logging.info(f"[{filename}] Running orchestrator agent...")
+            run_result = await agent.run(prompt, thread=thread)
+        except Exception as e:
+            rate_limiter.record(reserved, 0)
+            if is_rate_limit_error(e):
+                logging.warning(f"[{filename}] Rate limited, pausing all workers for {rate_limit_backoff_seconds:.0f}s")
+                rate_limiter.pause(rate_limit_backoff_seconds)
+            error_msg = f"[{filename}] Error during iteration {iteration}: {e}"
+            logging.error(error_msg)
+            print(f"{error_msg}\n")
+            result.error = str(e)
+            if not is_rate_limit_error(e):
+                # Rate limits wait in rate_limiter.acquire(); back off briefly before retrying other errors
+                await asyncio.sleep(error_backoff_seconds)
+            continue
+
+        response_content = run_result.text
+        result.final_response = response_content
+        result.error = None
+        logging.info(f"[{filename}] Agent response: {response_content}")
+        print(f"[{filename}] Iteration {iteration}: {response_content}\n")
+
+        # Track token usage
+        token_usage_in = token_usage_out = 0
+        if hasattr(run_result, 'usage') and run_result.usage:
+            token_usage_in = getattr(run_result.usage, 'input_tokens', 0) or 0
+            token_usage_out = getattr(run_result.usage, 'output_tokens', 0) or 0
+            result.tokens_in += token_usage_in
+            result.tokens_out += token_usage_out
+            logging.debug(f"[{filename}] Token usage - Input: {token_usage_in}, Output: {token_usage_out}")
+        rate_limiter.record(reserved, token_usage_in + token_usage_out)
+
+        # Check if resolved
+        if "no action needed" in response_content.lower():
+            resolved = True
+            outcome_msg = f"Issue in {filename} resolved after {iteration} iteration(s)."
+            logging.info(outcome_msg)
+            print(f"\n{outcome_msg}\n")
+        elif "escalate" in response_content.lower():
+            escalated = True
+            outcome_msg = f"Issue in {filename} escalated after {iteration} iteration(s)."
+            logging.warning(outcome_msg)
+            print(f"\n{outcome_msg}\n")
+
+    result.status = "Resolved" if resolved else "Escalated" if escalated else "Max iterations reached"
+
+    # Write outcome file
+    outcome_text = f"""Incident Resolution Summary
+Log File: {filename}
+Status: {result.status}
+Iterations: {result.iterations}
+Total Token Usage: Input={result.tokens_in}, Output={result.tokens_out}, Total={result.total_tokens}
+
+Final Response:
+{result.final_response}
+"""
+    log_plugin.write_outcome(logfile_path, outcome_text)
+    logging.info(f"Outcome written to {outcome_directory}/{filename.replace('.log', '-outcome.log')}")
+
+    # Generate diagram if enabled
+    if create_mermaid_diagram:
+        write_diagram(result, outcome_text)
+
+    return result
+
+
+def write_diagram(result: IncidentResult, outcome_text: str) -> None:
+    """Save the Mermaid diagram for one processed log file."""
+    logging.info(f"[{result.filename}] Generating Mermaid diagram...")
+    # Compose original issue summary from the log (first ERROR/CRITICAL lines, from the shared severity index)
+    try:
+        error_lines = [text.strip() for _, text in log_plugin.log_indexer.lines(result.log_file, ("ERROR", "CRITICAL"), limit=5)]
+        # Take up to first 5 error lines and join into a single summary
+        original_issue = ' | '.join(error_lines[:5]) if error_lines else '(no error lines found)'
+    except Exception:
+        original_issue = '(unable to read original log)'
+
+    diagram_generator = MermaidDiagramGenerator(ticket_folder_path=ticket_folder)
+    diagram_generator.save_diagram_file(
+        log_filename=result.filename,
+        resolution=result.status,
+        iterations=result.iterations,
+        token_usage_in=result.tokens_in,
+        token_usage_out=result.tokens_out,
+        original_issue=original_issue,
+        # resolution_summary: include the outcome_text we just wrote
+        resolution_summary=outcome_text,
+        final_response=result.final_response,
+    )
+
+
 async def main():
     logging.info("Starting incident resolution process...")
 
@@ -65,166 +246,49 @@ async def main():
     logging.info(f"Using project endpoint: {project_endpoint}")
     logging.info(f"Using model deployment: {model_deployment}")
 
-    # Create the orchestrator agent using Microsoft Agent Framework
-    logging.info("Initializing Orchestrator Agent with Agent Framework...")
-    async with (
-        DefaultAzureCredential(
-            exclude_environment_credential=True,
-            exclude_managed_identity_credential=True) as credential,
-        ChatAgent(
-            chat_client=AzureAIAgentClient(
-                project_endpoint=project_endpoint,
-                model_deployment_name=model_deployment,
-                async_credential=credential
-            ),
-            instructions="""You are an orchestrator that coordinates incident resolution.
+    log_files = sorted(log_path.glob("*.log"))
+    if not log_files:
+        logging.info("No log files to process.")
+        return
 
-CRITICAL: You have access to these functions that you MUST use:
-- read_log_file(filepath) - reads the log file and shows current state including any actions taken
-- restart_service(service_name, logfile) - restarts a failing service
-- rollback_transaction(logfile) - rollbacks a failed transaction  
-- redeploy_resource(resource_name, logfile) - redeploys a resource
-- increase_quota(logfile) - increases resource quota
-- escalate_issue(logfile) - escalates when unable to resolve
+    logging.info(
+        f"Processing {len(log_files)} log file(s) with {incident_workers} worker(s), "
+        f"{tokens_per_minute} tokens/minute budget..."
+    )
+    async with DefaultAzureCredential(
+        exclude_environment_credential=True,
+        exclude_managed_identity_credential=True) as credential:
 
-Your workflow on EVERY iteration:
-1. ALWAYS call read_log_file(filepath) FIRST to see the current state
-2. Look for ERROR or CRITICAL entries in the log
-3. Check the "ACTIONS IN PROGRESS" section to see what was already attempted
-4. If NO errors exist OR errors have been resolved by previous actions, respond with "No action needed"
-5. If errors still exist, call ONE devops function to fix the issue (avoid repeating actions that failed)
-6. If same action tried multiple times without success, call escalate_issue()
+        @asynccontextmanager
+        async def orchestrator_for_worker():
+            # Create the orchestrator agent using Microsoft Agent Framework
+            async with create_orchestrator(credential, project_endpoint, model_deployment) as agent:
+                logging.info("Orchestrator agent created successfully.")
+                yield agent
 
-RULES:
-- MUST call read_log_file() at the start of every turn
-- Only take ONE action per iteration
-- Check what actions were already attempted before taking new action
-- Be concise in your responses
-- Focus on resolving the issue efficiently""",
-            name="incident_orchestrator",
-            tools=list(log_functions) + list(devops_functions)
-        ) as agent,
-    ):
-        logging.info("Orchestrator agent created successfully.")
-        
-        # Process each log file
-        for log_file in log_path.glob("*.log"):
-            filename = log_file.name
-            logfile_path = str(log_file)
-            
-            logging.info(f"\n{'='*60}")
-            logging.info(f"Processing log file: {filename}")
-            logging.info(f"{'='*60}")
-            print(f"\n{'='*60}")
-            print(f"Processing log file: {filename}")
-            print(f"{'='*60}\n")
-            
-            # Print log summary before analysis
-            log_plugin.print_log_summary(logfile_path)
-            
-            max_iterations = 5
-            iteration = 0
-            resolved = False
-            total_tokens_in = 0
-            total_tokens_out = 0
-            
-            while iteration < max_iterations and not resolved:
-                iteration += 1
-                logging.info(f"Iteration {iteration}/{max_iterations}")
-                
-                # Create the prompt for this iteration
-                if iteration == 1:
-                    prompt = f"Read the log file '{logfile_path}' using read_log_file() and analyze it. Then take appropriate corrective action if needed."
-                else:
-                    prompt = f"Read the log file '{logfile_path}' using read_log_file() to check if the previous issue has been resolved. If resolved, respond with 'No action needed'. If not, take further action."
-                
-                logging.debug(f"Prompt: {prompt}")
-                
-                try:
-                    # Run the agent
-                    logging.info("Running orchestrator agent...")
-                    result = await agent.run(prompt)
-                    
-                    response_content = result.text
-                    logging.info(f"Agent response: {response_content}")
-                    print(f"Iteration {iteration}: {response_content}\n")
-                    
-                    # Track token usage
-                    if hasattr(result, 'usage') and result.usage:
-                        token_usage_in = getattr(result.usage, 'input_tokens', 0)
-                        token_usage_out = getattr(result.usage, 'output_tokens', 0)
-                        total_tokens_in += token_usage_in
-                        total_tokens_out += token_usage_out
-                        logging.debug(f"Token usage - Input: {token_usage_in}, Output: {token_usage_out}")
-                    
-                    # Check if resolved
-                    if "no action needed" in response_content.lower():
-                        resolved = True
-                        outcome_msg = f"Issue in {filename} resolved after {iteration} iteration(s)."
-                        logging.info(outcome_msg)
-                        print(f"\n{outcome_msg}\n")
-                    elif "escalate" in response_content.lower():
-                        outcome_msg = f"Issue in {filename} escalated after {iteration} iteration(s)."
-                        logging.warning(outcome_msg)
-                        print(f"\n{outcome_msg}\n")
-                        break
-                    
-                except Exception as e:
-                    error_msg = f"Error during iteration {iteration}: {e}"
-                    logging.error(error_msg)
-                    print(f"{error_msg}\n")
-                    # Don't break, try next iteration unless it's the last one
-                    if iteration >= max_iterations:
-                        break
-                
-                # Small delay between iterations to avoid rate limits
-                if iteration < max_iterations and not resolved:
-                    await asyncio.sleep(2)
-            
-            # Write outcome file
-            final_resolution = "Resolved" if resolved else "Escalated" if "escalate" in response_content.lower() else "Max iterations reached"
-            outcome_text = f"""Incident Resolution Summary
-Log File: {filename}
-Status: {final_resolution}
-Iterations: {iteration}
-Total Token Usage: Input={total_tokens_in}, Output={total_tokens_out}, Total={total_tokens_in + total_tokens_out}
+        rate_limiter = TokenRateLimiter(tokens_per_minute=tokens_per_minute)
+        processor = IncidentProcessor(
+            agent_factory=orchestrator_for_worker,
+            handler=resolve_log_file,
+            rate_limiter=rate_limiter,
+            workers=incident_workers,
+        )
+        start = time.perf_counter()
+        results = await processor.process_all(log_files)
+        elapsed = time.perf_counter() - start
 
-Final Response:
-{response_content}
-"""
-            log_plugin.write_outcome(logfile_path, outcome_text)
-            logging.info(f"Outcome written to {outcome_directory}/{filename.replace('.log', '-outcome.log')}")
-            
-            # Generate diagram if enabled
-            if create_mermaid_diagram:
-                logging.info("Generating Mermaid diagram...")
-                # Compose original issue summary from the log (first ERROR/CRITICAL lines)
-                try:
-                    with open(logfile_path, 'r', encoding='utf-8') as lf:
-                        log_lines = lf.readlines()
-                    error_lines = [l.strip() for l in log_lines if (' ERROR ' in l) or (' CRITICAL ' in l) or ('Error' in l) or ('CRITICAL' in l)]
-                    # Take up to first 5 error lines and join into a single summary
-                    original_issue = ' | '.join(error_lines[:5]) if error_lines else '(no error lines found)'
-                except Exception:
-                    original_issue = '(unable to read original log)'
-
-                # resolution_summary: include the outcome_text we just wrote
-                resolution_summary = outcome_text
-
-                diagram_generator = MermaidDiagramGenerator(ticket_folder_path=ticket_folder)
-                diagram_generator.save_diagram_file(
-                    log_filename=filename,
-                    resolution=final_resolution,
-                    iterations=iteration,
-                    token_usage_in=total_tokens_in,
-                    token_usage_out=total_tokens_out,
-                    original_issue=original_issue,
-                    resolution_summary=resolution_summary,
-                    final_response=response_content,
-                )
+    # Write buffered action journal entries before summarizing
+    devops_plugin.action_journal.flush()
+
+    # Write consolidated summary of all files
+    summary = IncidentProcessor.format_summary(results, elapsed)
+    summary_path = outcome_path / "incident-summary.log"
+    summary_path.write_text(summary, encoding="utf-8")
+    print("\n" + summary)
+    logging.debug(f"Rate limiter: {rate_limiter.stats}")
 
     logging.info("\n" + "="*60)
-    logging.info("Incident resolution process completed.")
+    logging.info(f"Incident resolution process completed. Summary written to {summary_path}")
     logging.info("="*60)
 
 
@@ -0,0 +1,23 @@
+from plugins.log_templates import WILDCARD, DrainParser
+
+
+def test_numeric_lines_share_one_template():
+    parser = DrainParser()
+    for i in range(200):
+        parser.add(f"[2024-01-01 10:00:{i % 60:02d}] INFO metrics {i} {i + 1} {i + 2} {i + 3} ok")
+
+    assert len(parser.clusters) == 1
+    cluster = parser.clusters[0]
+    assert cluster.count == 200
+    assert cluster.template == ["INFO", "metrics", WILDCARD, WILDCARD, WILDCARD, WILDCARD, "ok"]
+
+
+def test_tie_prefers_cluster_with_matching_wildcards():
+    parser = DrainParser(similarity_threshold=0.8)
+    literal = parser.add("INFO job z x w")
+    numbered = parser.add("INFO job 7 x y")
+    assert literal is not numbered
+
+    # 4 of 5 tokens match either template; "numbered" also matches the masked value
+    assert parser.add("INFO job 8 x w") is numbered
+    assert literal.count == 1 and numbered.count == 2
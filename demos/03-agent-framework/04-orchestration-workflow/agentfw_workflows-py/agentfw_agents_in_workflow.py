@@ -20,6 +20,7 @@ from utils.invoice_utils import (
     save_invoice_file, log_action, ensure_directories,
     print_step
 )
+from utils.agent_registry import AgentRegistry
 
 # Load environment
 load_dotenv('.env')
@@ -34,6 +35,21 @@ LOGS_DIR = OUTPUT_DIR / "logs"
 PROJECT_ENDPOINT = os.getenv("AZURE_AI_PROJECT_ENDPOINT")
 MODEL_DEPLOYMENT = os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME")
 
+# Agent definitions are hashed and cached locally, so warm runs reuse the service agents
+agent_registry = AgentRegistry(cache_path=OUTPUT_DIR / "agent_registry.json")
+
+
+async def ensure_registered_agent(name: str, instructions: str):
+    """Get an agent with this definition from the registry (reuse, update or create)."""
+    async with AzureCliCredential() as credential:
+        async with AIProjectClient(endpoint=PROJECT_ENDPOINT, credential=credential) as project_client:
+            return await agent_registry.ensure_agent(
+                project_client.agents,
+                name=name,
+                model=MODEL_DEPLOYMENT,
+                instructions=instructions
+            )
+
 
 # ============================================================================
 # AGENT-BASED WORKFLOW EXECUTORS
@@ -51,28 +67,10 @@ class InvoiceAnalyzerAgent(Executor):
         if self.agent is not None:
             return
 
-        async with AzureCliCredential() as credential:
-            async with AIProjectClient(
-                endpoint=PROJECT_ENDPOINT,
-                credential=credential
-            ) as project_client:
-                
-                # Try to find existing agent first
-                try:
-                    agents = await project_client.agents.list_agents()
-                    existing_agent = next((a for a in agents if a.name == "InvoiceAnalyzer"), None)
-                    if existing_agent:
-                        print(f"   🔄 Reusing existing agent: {existing_agent.id}")
-                        self.agent = existing_agent
-                        return
-                except Exception:
-                    pass  # Continue to create new agent
-                
-                # Create new agent if none exists
-                self.agent = await project_client.agents.create_agent(
-                    model=MODEL_DEPLOYMENT,
-                    name="InvoiceAnalyzer",
-                    instructions="""You are an expert financial analyst specializing in invoice analysis.
+        # Reused as long as the definition is unchanged, otherwise updated or created
+        self.agent = await ensure_registered_agent(
+            name="InvoiceAnalyzer",
+            instructions="""You are an expert financial analyst specializing in invoice analysis.
                     Analyze invoice data and provide:
                     1. Business insights about the client and transaction
                     2. Risk assessment (low/medium/high)
@@ -80,8 +78,8 @@ class InvoiceAnalyzerAgent(Executor):
                     4. Any unusual patterns or concerns
 
                     Be concise but thorough. Format your response as structured analysis."""
-                )
-                print(f"   ✅ Created new agent: {self.agent.id}")
+        )
+        print(f"   ✅ Agent ready: {self.agent.id}")
 
     @handler
     async def analyze_invoice(self, invoice: InvoiceData, ctx: WorkflowContext[tuple[InvoiceData, dict]]) -> None:
@@ -169,28 +167,10 @@ class CommunicationAgent(Executor):
         if self.agent is not None:
             return
 
-        async with AzureCliCredential() as credential:
-            async with AIProjectClient(
-                endpoint=PROJECT_ENDPOINT,
-                credential=credential
-            ) as project_client:
-                
-                # Try to find existing agent first
-                try:
-                    agents = await project_client.agents.list_agents()
-                    existing_agent = next((a for a in agents if a.name == "ClientCommunicator"), None)
-                    if existing_agent:
-                        print(f"   🔄 Reusing existing agent: {existing_agent.id}")
-                        self.agent = existing_agent
-                        return
-                except Exception:
-                    pass  # Continue to create new agent
-                
-                # Create new agent if none exists
-                self.agent = await project_client.agents.create_agent(
-                    model=MODEL_DEPLOYMENT,
-                    name="ClientCommunicator",
-                    instructions="""You are a professional client communication specialist.
+        # Reused as long as the definition is unchanged, otherwise updated or created
+        self.agent = await ensure_registered_agent(
+            name="ClientCommunicator",
+            instructions="""You are a professional client communication specialist.
                     Generate personalized, professional communications for clients including:
                     1. Invoice acknowledgments
                     2. Payment reminders
@@ -198,8 +178,8 @@ class CommunicationAgent(Executor):
                     4. Special offers for preferred clients
 
                     Be friendly, professional, and concise. Tailor the tone to the client relationship."""
-                )
-                print(f"   ✅ Created new agent: {self.agent.id}")
+        )
+        print(f"   ✅ Agent ready: {self.agent.id}")
 
     @handler
     async def generate_communication(self, data: tuple[InvoiceData, dict, str],
@@ -273,28 +253,10 @@ class DecisionAgent(Executor):
         if self.agent is not None:
             return
 
-        async with AzureCliCredential() as credential:
-            async with AIProjectClient(
-                endpoint=PROJECT_ENDPOINT,
-                credential=credential
-            ) as project_client:
-                
-                # Try to find existing agent first
-                try:
-                    agents = await project_client.agents.list_agents()
-                    existing_agent = next((a for a in agents if a.name == "BusinessDecisionMaker"), None)
-                    if existing_agent:
-                        print(f"   🔄 Reusing existing agent: {existing_agent.id}")
-                        self.agent = existing_agent
-                        return
-                except Exception:
-                    pass  # Continue to create new agent
-                
-                # Create new agent if none exists
-                self.agent = await project_client.agents.create_agent(
-                    model=MODEL_DEPLOYMENT,
-                    name="BusinessDecisionMaker",
-                    instructions="""You are a senior business decision maker for invoice processing.
+        # Reused as long as the definition is unchanged, otherwise updated or created
+        self.agent = await ensure_registered_agent(
+            name="BusinessDecisionMaker",
+            instructions="""You are a senior business decision maker for invoice processing.
                     Based on invoice data and analysis, decide on processing actions:
 
                     Available Actions:
@@ -305,8 +267,8 @@ class DecisionAgent(Executor):
 
                     Consider: client status, amount, risk level, business rules.
                     Provide clear reasoning for your decision."""
-                )
-                print(f"   ✅ Created new agent: {self.agent.id}")
+        )
+        print(f"   ✅ Agent ready: {self.agent.id}")
 
     @handler
     async def make_decision(self, data: tuple[InvoiceData, dict],
@@ -384,28 +346,10 @@ class SummaryAgent(Executor):
         if self.agent is not None:
             return
 
-        async with AzureCliCredential() as credential:
-            async with AIProjectClient(
-                endpoint=PROJECT_ENDPOINT,
-                credential=credential
-            ) as project_client:
-                
-                # Try to find existing agent first
-                try:
-                    agents = await project_client.agents.list_agents()
-                    existing_agent = next((a for a in agents if a.name == "ExecutiveSummarizer"), None)
-                    if existing_agent:
-                        print(f"   🔄 Reusing existing agent: {existing_agent.id}")
-                        self.agent = existing_agent
-                        return
-                except Exception:
-                    pass  # Continue to create new agent
-                
-                # Create new agent if none exists
-                self.agent = await project_client.agents.create_agent(
-                    model=MODEL_DEPLOYMENT,
-                    name="ExecutiveSummarizer",
-                    instructions="""You are an executive assistant creating summaries for business processing.
+        # Reused as long as the definition is unchanged, otherwise updated or created
+        self.agent = await ensure_registered_agent(
+            name="ExecutiveSummarizer",
+            instructions="""You are an executive assistant creating summaries for business processing.
                     Create concise executive summaries that include:
                     1. Key transaction details
                     2. Business decisions made
@@ -413,8 +357,8 @@ class SummaryAgent(Executor):
                     4. Next steps or recommendations
 
                     Keep summaries professional and actionable."""
-                )
-                print(f"   ✅ Created new agent: {self.agent.id}")
+        )
+        print(f"   ✅ Agent ready: {self.agent.id}")
 
     @handler
     async def create_summary(self, data: tuple[InvoiceData, dict, str, str],
@@ -535,16 +479,20 @@ class InvoiceSelector(Executor):
 # ============================================================================
 
 async def cleanup_agents(analyzer, decider, communicator, summarizer):
-    """Clean up temporary agents created during the workflow."""
-    print("\n🧹 Cleaning up temporary agents...")
+    """Clean up the workflow agents; by default they are kept for reuse by the next run."""
+    if os.getenv("DELETE_AGENTS_ON_EXIT", "false") != "true":
+        print(f"\n♻️ Keeping agents for the next run (registry: {agent_registry.stats})")
+        return
+
+    print("\n🧹 Cleaning up agents...")
     try:
         async with AzureCliCredential() as credential:
             async with AIProjectClient(endpoint=PROJECT_ENDPOINT, credential=credential) as project_client:
                 executors = [analyzer, decider, communicator, summarizer]
                 for executor in executors:
-                    if getattr(executor, "agent", None) and getattr(executor.agent, "id", None):
+                    if getattr(executor, "agent", None) and getattr(executor.agent, "name", None):
                         try:
-                            await project_client.agents.delete_agent(executor.agent.id)
+                            await agent_registry.delete(project_client.agents, executor.agent.name)
                             print(f"   ✅ Deleted agent: {executor.agent.id}")
                         except Exception:
                             pass  # Keep it simple for the lab
@@ -22,6 +22,8 @@ from agent_framework import (
 from agent_framework.azure import AzureOpenAIChatClient
 from agent_framework_devui import register_cleanup
 
+from .content_filter import ContentFilter
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,48 +35,50 @@ def cleanup_resources():
     logger.info("=" * 60)
 
 
+# Compiled once at import; substring matching so "passwords", "password123" or "tokens" are blocked too
+blocked_terms = ContentFilter(["password", "secret", "api_key", "token"], whole_words=False)
+
+
 @chat_middleware
 async def security_filter_middleware(
     context: ChatContext,
     next: Callable[[ChatContext], Awaitable[None]],
 ) -> None:
     """Chat middleware that blocks requests containing sensitive information."""
-    blocked_terms = ["password", "secret", "api_key", "token"]
-
     # Check only the last message (most recent user input)
     last_message = context.messages[-1] if context.messages else None
     if last_message and last_message.role == Role.USER and last_message.text:
-        message_lower = last_message.text.lower()
-        for term in blocked_terms:
-            if term in message_lower:
-                error_message = (
-                    "I cannot process requests containing sensitive information. "
-                    "Please rephrase your question without including passwords, secrets, "
-                    "or other sensitive data."
-                )
+        term = blocked_terms.first_match(last_message.text)
+        if term:
+            logger.info(f"Blocked request containing '{term}'")
+            error_message = (
+                "I cannot process requests containing sensitive information. "
+                "Please rephrase your question without including passwords, secrets, "
+                "or other sensitive data."
+            )
+
+            if context.is_streaming:
+                # Streaming mode: return async generator
+                async def blocked_stream() -> AsyncIterable[ChatResponseUpdate]:
+                    yield ChatResponseUpdate(
+                        contents=[TextContent(text=error_message)],
+                        role=Role.ASSISTANT,
+                    )
 
-                if context.is_streaming:
-                    # Streaming mode: return async generator
-                    async def blocked_stream() -> AsyncIterable[ChatResponseUpdate]:
-                        yield ChatResponseUpdate(
-                            contents=[TextContent(text=error_message)],
+                context.result = blocked_stream()
+            else:
+                # Non-streaming mode: return complete response
+                context.result = ChatResponse(
+                    messages=[
+                        ChatMessage(
                             role=Role.ASSISTANT,
+                            text=error_message,
                         )
+                    ]
+                )
 
-                    context.result = blocked_stream()
-                else:
-                    # Non-streaming mode: return complete response
-                    context.result = ChatResponse(
-                        messages=[
-                            ChatMessage(
-                                role=Role.ASSISTANT,
-                                text=error_message,
-                            )
-                        ]
-                    )
-
-                context.terminate = True
-                return
+            context.terminate = True
+            return
 
     await next(context)
 
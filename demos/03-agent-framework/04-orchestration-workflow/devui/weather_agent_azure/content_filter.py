@@ -0,0 +1,168 @@
+"""
+Content Filter
+
+Compiled multi-pattern matcher for blocking sensitive keywords.
+
+Instead of lowercasing the text and running one `in` check per keyword, the
+blocklist is compiled once:
+
+- "regex" backend (default, stdlib only): the terms are merged into a trie
+  and emitted as a single alternation regex, e.g. `pass(?:word|phrase)`, so
+  the C regex engine walks each position once instead of once per keyword.
+- "aho-corasick" backend: uses `pyahocorasick` when installed
+  (pip install pyahocorasick).
+
+Both backends support whole-word matching (`hack` does not match `hackathon`)
+and incremental scanning of streamed chunks via `ContentFilter.stream()`,
+which also catches terms split across chunk boundaries.
+
+Usage:
+    blocklist = ContentFilter(["password", "secret", "api_key"])
+    blocklist.first_match("what is my Password?")   # -> "password"
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+# Optional Aho-Corasick backend
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+_END = ""  # Trie terminal marker
+
+
+@dataclass(frozen=True)
+class FilterMatch:
+    """A blocked term found in a text."""
+    term: str
+    start: int
+    end: int
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """Build a single regex alternation from a trie of the terms."""
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+
+    def emit(node: dict) -> Optional[str]:
+        branches, single_chars = [], []
+        for ch in sorted(k for k in node if k != _END):
+            sub = emit(node[ch])
+            if sub is None:
+                single_chars.append(re.escape(ch))
+            else:
+                branches.append(re.escape(ch) + sub)
+        if not branches and not single_chars:
+            return None
+        if single_chars:
+            branches.append(single_chars[0] if len(single_chars) == 1 else "[" + "".join(single_chars) + "]")
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{pattern})?" if _END in node else pattern
+
+    return emit(trie) or ""
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class ContentFilter:
+    """Blocklist compiled once and reused for every message or streamed chunk."""
+
+    def __init__(self, terms: Iterable[str], whole_words: bool = True, case_sensitive: bool = False,
+                 backend: str = "regex"):
+        normalize = (lambda t: t) if case_sensitive else str.lower
+        self.terms = sorted({normalize(t.strip()) for t in terms if t and t.strip()})
+        self.whole_words = whole_words
+        self.case_sensitive = case_sensitive
+        self.max_term_length = max((len(t) for t in self.terms), default=0)
+
+        if backend == "aho-corasick" and not AHOCORASICK_AVAILABLE:
+            raise ImportError("The aho-corasick backend requires pyahocorasick. Install with: pip install pyahocorasick")
+        if backend not in ("regex", "aho-corasick"):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+
+        if backend == "regex":
+            body = _trie_regex(self.terms)
+            if whole_words:
+                body = rf"(?<!\w)(?:{body})(?!\w)"
+            # Terms are already lowercased; lowering the text once is much cheaper than re.IGNORECASE
+            self._pattern = re.compile(body) if self.terms else None
+        else:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            self._automaton.make_automaton()
+
+    def _iter_matches(self, text: str, pos: int = 0) -> Iterator[FilterMatch]:
+        if not self.terms:
+            return
+        haystack = text if self.case_sensitive else text.lower()
+        if self.backend == "regex":
+            for match in self._pattern.finditer(haystack, pos):
+                yield FilterMatch(match.group(0), match.start(), match.end())
+            return
+
+        for end_index, term in self._automaton.iter(haystack, pos):
+            start, end = end_index - len(term) + 1, end_index + 1
+            if self.whole_words and ((start > 0 and _is_word_char(haystack[start - 1]))
+                                     or (end < len(haystack) and _is_word_char(haystack[end]))):
+                continue
+            yield FilterMatch(term, start, end)
+
+    def find_all(self, text: str) -> List[FilterMatch]:
+        """Return every blocked term occurrence in the text."""
+        return list(self._iter_matches(text))
+
+    def first_match(self, text: str) -> Optional[str]:
+        """Return the first blocked term found, or None."""
+        return next((m.term for m in self._iter_matches(text)), None)
+
+    def stream(self) -> "StreamScanner":
+        """Create an incremental scanner for streamed chunks."""
+        return StreamScanner(self)
+
+
+class StreamScanner:
+    """Scans streamed chunks incrementally, keeping only a short tail between chunks.
+
+    A match that ends exactly at the end of the received text is held back
+    (the next chunk could extend the word) and decided on the next `feed()` or
+    on `close()`.
+    """
+
+    def __init__(self, content_filter: ContentFilter):
+        self._filter = content_filter
+        self._tail = ""
+        self.matched: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Scan the next chunk. Returns the blocked term as soon as one is confirmed."""
+        if self.matched or not chunk:
+            return self.matched
+        buffer = self._tail + chunk
+        # Earlier positions were fully decided by previous feeds; one extra char of context for the boundary check
+        start = max(0, len(self._tail) - self._filter.max_term_length)
+        for match in self._filter._iter_matches(buffer, start):
+            if self._filter.whole_words and match.end == len(buffer):
+                continue
+            self.matched = match.term
+            return self.matched
+        self._tail = buffer[-(self._filter.max_term_length + 1):]
+        return None
+
+    def close(self) -> Optional[str]:
+        """Finish the stream and decide any match held back at the very end."""
+        if not self.matched and self._tail:
+            start = max(0, len(self._tail) - self._filter.max_term_length)
+            self.matched = next((m.term for m in self._filter._iter_matches(self._tail, start)), None)
+        return self.matched
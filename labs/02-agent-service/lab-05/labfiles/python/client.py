@@ -1,6 +1,7 @@
 """ Client code that connects to the routing agent """
 
 import os
+import json
 import asyncio
 import requests
 from dotenv import load_dotenv
@@ -10,6 +11,9 @@ load_dotenv()
 server = os.environ["SERVER_URL"]
 port = os.environ["ROUTING_AGENT_PORT"]
 
+# Render the answer while it is generated (set CLIENT_STREAMING=false to wait for the full answer)
+streaming = os.getenv("CLIENT_STREAMING", "true") == "true"
+
 def send_prompt(prompt: str):
     url = f"http://{server}:{port}/message"
     payload = {"message": prompt}
@@ -22,6 +26,41 @@ def send_prompt(prompt: str):
     except Exception as e:
         return f"Request failed: {e}"
 
+def stream_prompt(prompt: str):
+    # Yield the events the routing agent streams back (server-sent events, one JSON object per event)
+    url = f"http://{server}:{port}/message/stream"
+    payload = {"message": prompt}
+    try:
+        with requests.post(url, json=payload, stream=True) as response:
+            if response.status_code != 200:
+                yield {"type": "error", "text": f"Error {response.status_code}: {response.text}"}
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data:"):
+                    yield json.loads(line[len("data:"):].strip())
+    except Exception as e:
+        yield {"type": "error", "text": f"Request failed: {e}"}
+
+def print_streamed_response(prompt: str):
+    # Remote agent output is shown as it arrives, followed by the routing agent's answer
+    current = None
+    for event in stream_prompt(prompt):
+        if event["type"] == "agent":
+            if current != event["agent"]:
+                current = event["agent"]
+                print(f"\n  [{current}] ", end="", flush=True)
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "delta":
+            if current != "answer":
+                current = "answer"
+                print("\nAgent: ", end="", flush=True)
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "error":
+            print(f"\nAgent: {event['text']}", end="", flush=True)
+        elif event["type"] == "done":
+            break
+    print()
+
 async def main():
     print("Enter a prompt for the agent. Type 'quit' to exit.")
     while True:
@@ -29,8 +68,11 @@ async def main():
         if user_input.lower() == "quit":
             print("Goodbye!")
             break
-        response = send_prompt(user_input)
-        print(f"Agent: {response}")
+        if streaming:
+            print_streamed_response(user_input)
+        else:
+            response = send_prompt(user_input)
+            print(f"Agent: {response}")
 
 if __name__ == "__main__":
     asyncio.run(main())
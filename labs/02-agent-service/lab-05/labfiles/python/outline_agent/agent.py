@@ -1,11 +1,17 @@
 """ Azure AI Foundry Agent that generates an outline """
 
+import asyncio
 import os
+from collections import OrderedDict
+from collections.abc import AsyncIterator
 
 from azure.ai.agents import AgentsClient
-from azure.ai.agents.models import Agent, MessageRole, ListSortOrder
+from azure.ai.agents.models import Agent, AgentStreamEvent, MessageDeltaChunk, MessageRole, ListSortOrder, ThreadRun
 from azure.identity import DefaultAzureCredential
 
+# Conversation threads kept per A2A context id; the least recently used ones are deleted beyond this
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "100"))
+
 class OutlineAgent:
 
     def __init__(self):
@@ -21,6 +27,9 @@ class OutlineAgent:
 
         self.agent: Agent | None = None
 
+        # A2A context id -> (thread id, lock); a thread only allows one active run at a time
+        self._threads: OrderedDict[str, tuple[str, asyncio.Lock]] = OrderedDict()
+
     async def create_agent(self) -> Agent:
         if self.agent:
             return self.agent
@@ -66,6 +75,67 @@ class OutlineAgent:
 
         return responses if responses else ['No response received']
 
+    async def _get_thread(self, context_id: str) -> tuple[str, asyncio.Lock]:
+        # Reuse the conversation thread of an A2A context instead of creating one per request
+        if context_id in self._threads:
+            self._threads.move_to_end(context_id)
+            return self._threads[context_id]
+
+        thread = await asyncio.to_thread(self.client.threads.create)
+        entry = self._threads.setdefault(context_id, (thread.id, asyncio.Lock()))
+        if entry[0] != thread.id:
+            # A concurrent first request of the same context stored its thread already
+            asyncio.get_running_loop().run_in_executor(None, self._delete_thread, thread.id)
+
+        # Evict the least recently used threads that are not running
+        for old_context in list(self._threads):
+            if len(self._threads) <= THREAD_POOL_SIZE:
+                break
+            old_thread_id, old_lock = self._threads[old_context]
+            if old_context != context_id and not old_lock.locked():
+                del self._threads[old_context]
+                asyncio.get_running_loop().run_in_executor(None, self._delete_thread, old_thread_id)
+        return entry
+
+    def _delete_thread(self, thread_id: str) -> None:
+        try:
+            self.client.threads.delete(thread_id)
+        except Exception as e:
+            print(f'Outline Agent: Failed to delete thread {thread_id} - {e}')
+
+    def _stream_run(self, thread_id: str, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+        # Blocking: runs the agent with streaming and hands each text delta to the event loop
+        try:
+            with self.client.runs.stream(thread_id=thread_id, agent_id=self.agent.id) as stream:
+                for event_type, event_data, _ in stream:
+                    if isinstance(event_data, MessageDeltaChunk) and event_data.text:
+                        loop.call_soon_threadsafe(queue.put_nowait, event_data.text)
+                    elif isinstance(event_data, ThreadRun) and event_data.status == 'failed':
+                        raise RuntimeError(f'Run failed - {event_data.last_error}')
+                    elif event_type == AgentStreamEvent.ERROR:
+                        raise RuntimeError(f'Stream error - {event_data}')
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def run_conversation_stream(self, user_message: str, context_id: str) -> AsyncIterator[str]:
+        # Yield the response text as the model generates it, in the pooled thread of the A2A context
+
+        if not self.agent:
+            await self.create_agent()
+
+        thread_id, lock = await self._get_thread(context_id)
+        async with lock:
+            await asyncio.to_thread(
+                self.client.messages.create, thread_id=thread_id, role=MessageRole.USER, content=user_message
+            )
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            run = loop.run_in_executor(None, self._stream_run, thread_id, loop, queue)
+            while (delta := await queue.get()) is not None:
+                yield delta
+            await run  # Raises the error of a failed run
+
 async def create_foundry_outline_agent() -> OutlineAgent:
     agent = OutlineAgent()
     await agent.create_agent()
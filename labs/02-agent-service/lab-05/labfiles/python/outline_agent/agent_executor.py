@@ -1,10 +1,12 @@
 """ Azure AI Foundry Agent that generates an outline """
 
+import uuid
+
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.tasks import TaskUpdater
-from a2a.types import AgentCard, Part, TaskState
+from a2a.types import AgentCard, Part, TaskState, TextPart
 from a2a.utils.message import new_agent_text_message
 from outline_agent.agent import OutlineAgent, create_foundry_outline_agent
 
@@ -36,18 +38,11 @@ class OutlineAgentExecutor(AgentExecutor):
                 message=new_agent_text_message('Outline Agent is processing your request...', context_id=context_id)
             )
 
-            # Run the conversation
-            responses = await agent.run_conversation(user_message)
-
-            # Update the task with responses
-            for response in responses:
-                await task_updater.update_status(
-                    TaskState.working,
-                    message=new_agent_text_message( response, context_id=context_id)
-                )
+            # Run the conversation, streaming the response to the caller as it is generated
+            response = await self._stream_response(agent, user_message, context_id, task_updater)
 
             # Mark the task as complete
-            final_message = responses[-1] if responses else 'Task completed.'
+            final_message = response or 'Task completed.'
             await task_updater.complete(
                 message=new_agent_text_message(final_message, context_id=context_id)
             )
@@ -58,6 +53,25 @@ class OutlineAgentExecutor(AgentExecutor):
                 context_id=context_id)
             )
 
+    async def _stream_response(self, agent: OutlineAgent, user_message: str, context_id: str,
+                               task_updater: TaskUpdater) -> str:
+        # Send the response as artifact chunks while the model generates it and return the full text
+        artifact_id = str(uuid.uuid4())
+        chunks: list[str] = []
+        async for delta in agent.run_conversation_stream(user_message, context_id):
+            await task_updater.add_artifact(
+                [Part(root=TextPart(text=delta))],
+                artifact_id=artifact_id,
+                name='outline',
+                append=bool(chunks),
+                last_chunk=False,
+            )
+            chunks.append(delta)
+        await task_updater.add_artifact(
+            [Part(root=TextPart(text=''))], artifact_id=artifact_id, name='outline', append=True, last_chunk=True
+        )
+        return ''.join(chunks)
+
     async def execute(self, context: RequestContext, event_queue: EventQueue):
         
         # Create task updater
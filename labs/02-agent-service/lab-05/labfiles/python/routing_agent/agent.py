@@ -1,47 +1,98 @@
 import asyncio
 import json
 import os
-import time
 import uuid
-import httpx
 
 from typing import Any, Callable
 from azure.ai.agents import AgentsClient
 from azure.identity import DefaultAzureCredential
-from azure.ai.agents.models import ListSortOrder, FunctionTool, MessageRole
-from collections.abc import Callable
+from azure.ai.agents.models import (
+    AgentEventHandler,
+    FunctionTool,
+    ListSortOrder,
+    MessageDeltaChunk,
+    MessageRole,
+    SubmitToolOutputsAction,
+    ThreadRun,
+)
+from collections.abc import AsyncIterator, Callable
 from dotenv import load_dotenv
-from a2a.client import A2ACardResolver, A2AClient
 from a2a.types import (
     AgentCard,
+    Message,
     MessageSendParams,
+    Part,
+    Role,
     SendMessageRequest,
     SendMessageResponse,
     SendMessageSuccessResponse,
+    SendStreamingMessageRequest,
+    SendStreamingMessageSuccessResponse,
     Task,
     TaskArtifactUpdateEvent,
     TaskStatusUpdateEvent,
+    TextPart,
 )
 
+from routing_agent.agent_pool import A2AClientPool, RemoteAgentConnections
+
 load_dotenv()
 
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
 TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 
+# Receives the events of a streamed answer: {"type": "delta" | "agent" | "error", "text": ..., "agent": ...}
+StreamEventSink = Callable[[dict[str, str]], None]
+
+# Maximum time (seconds) a single remote agent call may take
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "120"))
+
+# Maximum time (seconds) for all remote agents of one send_messages call together
+SEND_MESSAGES_TIMEOUT = float(os.getenv("SEND_MESSAGES_TIMEOUT", str(TOOL_CALL_TIMEOUT)))
+
+# Run status polling: first delay, growth factor and longest delay (seconds)
+RUN_POLL_INITIAL = float(os.getenv("RUN_POLL_INITIAL", "0.2"))
+RUN_POLL_BACKOFF = 1.5
+RUN_POLL_MAX = float(os.getenv("RUN_POLL_MAX", "2"))
+
+
+def _to_json_value(result) -> Any:
+    # Tool output value of a remote agent result (A2A Task, merged dict or anything else)
+    if hasattr(result, 'model_dump'):
+        return result.model_dump(mode="json")
+    return result if isinstance(result, dict) else str(result)
 
-class RemoteAgentConnections:
-    """A class to hold the connections to the remote agents."""
 
-    def __init__(self, agent_card: AgentCard, agent_url: str):
-        self._httpx_client = httpx.AsyncClient(timeout=30)
-        self.agent_client = A2AClient(self._httpx_client, agent_card, url=agent_url)
-        self.card = agent_card
+def _text_of(parts: list[Part] | None) -> str:
+    return "".join(part.root.text for part in parts or [] if isinstance(part.root, TextPart))
 
-    def get_agent(self) -> AgentCard:
-        return self.card
 
-    async def send_message(self, message_request: SendMessageRequest) -> SendMessageResponse:
-        return await self.agent_client.send_message(message_request)
+class _RunStreamHandler(AgentEventHandler):
+    # Called in the worker thread that iterates the run stream: forwards text deltas to the
+    # event loop and runs requested tool calls there, then continues with the tool output stream
+
+    def __init__(self, routing_agent: 'RoutingAgent', loop: asyncio.AbstractEventLoop, emit: StreamEventSink):
+        super().__init__()
+        self.routing_agent = routing_agent
+        self.loop = loop
+        self.emit = emit
+
+    def on_message_delta(self, delta: MessageDeltaChunk) -> None:
+        if delta.text:
+            self.emit({"type": "delta", "text": delta.text})
+
+    def on_thread_run(self, run: ThreadRun) -> None:
+        if run.status == "failed":
+            self.emit({"type": "error", "text": f"Run error: {run.last_error}"})
+        elif run.status == "requires_action" and isinstance(run.required_action, SubmitToolOutputsAction):
+            tool_calls = run.required_action.submit_tool_outputs.tool_calls
+            tool_outputs = asyncio.run_coroutine_threadsafe(
+                self.routing_agent._run_tool_calls(tool_calls, self.emit), self.loop
+            ).result()
+            self.routing_agent.agents_client.runs.submit_tool_outputs_stream(
+                thread_id=run.thread_id, run_id=run.id, tool_outputs=tool_outputs, event_handler=self
+            )
+
 
 class RoutingAgent:
 
@@ -51,6 +102,9 @@ class RoutingAgent:
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
         self.agents: str = ''
+
+        # Shared HTTP client, agent cards and replica health for all remote agents
+        self.client_pool = A2AClientPool()
         
         # Initialize Azure AI Agents client
         self.agents_client = AgentsClient(
@@ -64,6 +118,10 @@ class RoutingAgent:
         self.azure_agent = None
         self.current_thread = None
 
+        # One conversation thread per session; a thread only allows one active run at a time
+        self.session_threads: dict[str, Any] = {}
+        self._thread_locks: dict[str, asyncio.Lock] = {}
+
 
     @classmethod
     async def create(cls, remote_agent_addresses: list[str], task_callback: TaskUpdateCallback | None = None) -> 'RoutingAgent':
@@ -87,22 +145,10 @@ class RoutingAgent:
     async def _async_init_components(self, remote_agent_addresses: list[str]) -> None:
         """Asynchronous part of initialization."""
 
-        # Use a single httpx.AsyncClient for all card resolutions for efficiency
-        async with httpx.AsyncClient(timeout=30) as client:
-            for address in remote_agent_addresses:
-                card_resolver = A2ACardResolver(client, address)
-                try:
-                    card = await card_resolver.get_agent_card()
-
-                    remote_connection = RemoteAgentConnections(agent_card=card, agent_url=address)
-                    self.remote_agent_connections[card.name] = remote_connection
-                    self.cards[card.name] = card
-
-                except httpx.ConnectError as e:
-                    print( f'ERROR: Failed to get agent card from {address}: {e}')
-                except Exception as e:  # Catch other potential errors
-                    print(f'ERROR: Failed to initialize connection for {address}: {e}')
-            print(f"Found remote agents: {self.list_remote_agents()}")
+        # Resolve all agent cards concurrently; addresses serving the same card become replicas of one agent
+        self.remote_agent_connections = await self.client_pool.connect(remote_agent_addresses)
+        self.cards = {name: connection.get_agent() for name, connection in self.remote_agent_connections.items()}
+        print(f"Found remote agents: {self.list_remote_agents()}")
 
     
     async def send_message(self, agent_name: str, task: str):
@@ -138,13 +184,96 @@ class RoutingAgent:
 
         return send_response.root.result
 
+    async def send_messages(self, agent_names: list[str], task: str) -> dict[str, Any]:
+        """
+        Sends the same task to several remote agents at once and returns all their results.
+
+        :param agent_names: Names of the remote agents that should handle the task.
+        :param task: The task to send to every agent.
+        :return: The result of each agent by agent name.
+        """
+        return await self._send_messages(agent_names, task)
+
+    async def _send_messages(self, agent_names: list[str], task: str, emit: StreamEventSink | None = None) -> dict[str, Any]:
+        agent_names = list(dict.fromkeys(agent_names))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SEND_MESSAGES_TIMEOUT
+        pending = {asyncio.create_task(self._dispatch(name, task, emit)): name for name in agent_names}
+        results: dict[str, Any] = {}
+
+        try:
+            # Collect the results as they complete, until all are done or the combined timeout expires
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for finished in done:
+                    name = pending.pop(finished)
+                    try:
+                        result = finished.result()
+                    except Exception as e:
+                        results[name] = {"error": str(e)}
+                        continue
+                    results[name] = _to_json_value(result)
+                    self._report_partial_result(name, result)
+        finally:
+            for unfinished, name in pending.items():
+                unfinished.cancel()
+                results[name] = {"error": f"No result within {SEND_MESSAGES_TIMEOUT}s"}
+
+        return {name: results[name] for name in agent_names}
+
+    def _report_partial_result(self, agent_name: str, result) -> None:
+        # Pass one agent's result on while the other agents of a send_messages call are still working
+        print(f"Received result from {agent_name}")
+        if self.task_callback and isinstance(result, Task) and agent_name in self.cards:
+            self.task_callback(result, self.cards[agent_name])
+
+    async def _dispatch(self, agent_name: str, task: str, emit: StreamEventSink | None = None):
+        # Stream from agents that support it when the caller wants partial output, else send_message
+        connection = self.remote_agent_connections.get(agent_name)
+        if emit is not None and connection is not None and connection.get_agent().capabilities.streaming:
+            return await self._stream_send_message(agent_name, task, emit)
+        return await self.send_message(agent_name, task)
+
+    async def _stream_send_message(self, agent_name: str, task: str, emit: StreamEventSink) -> dict[str, Any]:
+        # Sends a task over A2A streaming, forwarding the remote agent's text chunks as they arrive
+
+        message_id = str(uuid.uuid4())
+        message_request = SendStreamingMessageRequest(
+            id=message_id,
+            params=MessageSendParams(
+                message=Message(role=Role.user, parts=[Part(root=TextPart(text=task))], message_id=message_id)
+            ),
+        )
+
+        chunks: list[str] = []
+        state, final_message = None, ""
+        async for response in self.remote_agent_connections[agent_name].send_message_streaming(message_request):
+            if not isinstance(response.root, SendStreamingMessageSuccessResponse):
+                raise RuntimeError(f"{agent_name} returned an error: {response.root.error}")
+            event = response.root.result
+            if isinstance(event, TaskArtifactUpdateEvent):
+                text = _text_of(event.artifact.parts)
+                if text:
+                    chunks.append(text)
+                    emit({"type": "agent", "agent": agent_name, "text": text})
+            elif isinstance(event, (Task, TaskStatusUpdateEvent)):
+                state = event.status.state
+                if event.status.message:
+                    final_message = _text_of(event.status.message.parts)
+
+        return {"state": getattr(state, "value", state), "result": "".join(chunks) or final_message}
+
 
     def create_agent(self):
         # Create an Azure AI Agent instance
         
         try:
-            # Create Azure AI Agent with the send_message function
-            functions = FunctionTool({self.send_message})
+            # Create Azure AI Agent with the send_message and send_messages functions
+            functions = FunctionTool({self.send_message, self.send_messages})
             self.azure_agent = self.agents_client.create_agent(
                 model=os.environ["MODEL_DEPLOYMENT_NAME"],
                 name="routing-agent",
@@ -157,6 +286,9 @@ class RoutingAgent:
 
                 Available Agents: {self.list_remote_agents()}
 
+                When a request needs more than one agent, call send_messages once with all of
+                those agents instead of calling send_message for each of them.
+
                 Always be helpful and route requests to the most appropriate agent.""",
                 tools=functions.definitions
             )
@@ -170,7 +302,80 @@ class RoutingAgent:
             print(f"Error creating Azure AI agent: {e}")
             raise
 
-    async def process_user_message(self, user_message: str) -> str:
+    async def _run_tool_call(self, tool_call, emit: StreamEventSink | None = None) -> str:
+        # Execute one tool call requested by the routing agent and return its JSON output
+
+        function_name = tool_call.function.name
+        if function_name not in ("send_message", "send_messages"):
+            return json.dumps({"error": f"Unknown function: {function_name}"})
+
+        try:
+            function_args = json.loads(tool_call.function.arguments)
+            if function_name == "send_messages":
+                # Has its own combined timeout and always returns a (partial) merged result
+                results = await self._send_messages(function_args["agent_names"], function_args["task"], emit)
+                return json.dumps(results)
+
+            result = await asyncio.wait_for(
+                self._dispatch(function_args["agent_name"], function_args["task"], emit),
+                timeout=TOOL_CALL_TIMEOUT,
+            )
+            return json.dumps(_to_json_value(result))
+
+        except asyncio.TimeoutError:
+            return json.dumps({"error": f"send_message timed out after {TOOL_CALL_TIMEOUT}s"})
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    async def _get_thread(self, session_id: str | None):
+        # The default conversation uses the thread created with the agent; other sessions get their own
+        if session_id is None:
+            return self.current_thread
+        if session_id not in self.session_threads:
+            thread = await asyncio.to_thread(self.agents_client.threads.create)
+            # A concurrent first request of the same session may have stored its thread already
+            self.session_threads.setdefault(session_id, thread)
+        return self.session_threads[session_id]
+
+    async def _run_tool_calls(self, tool_calls, emit: StreamEventSink | None = None) -> list[dict[str, str]]:
+        # Run all tool calls of this turn concurrently; outputs keep the tool call order
+        outputs = await asyncio.gather(*(self._run_tool_call(tool_call, emit) for tool_call in tool_calls))
+        return [
+            {"tool_call_id": tool_call.id, "output": output}
+            for tool_call, output in zip(tool_calls, outputs)
+        ]
+
+    async def _wait_for_run(self, thread_id: str, run):
+        # Poll the run without blocking the event loop, submitting tool outputs as soon as they are requested.
+        # The delay starts short and grows while the run is busy; it resets after tool outputs are submitted.
+        delay = RUN_POLL_INITIAL
+        while run.status in ["queued", "in_progress", "requires_action"]:
+            if run.status == "requires_action":
+                tool_outputs = await self._run_tool_calls(run.required_action.submit_tool_outputs.tool_calls)
+
+                # Submit the tool outputs
+                run = await asyncio.to_thread(
+                    self.agents_client.runs.submit_tool_outputs,
+                    thread_id=thread_id, run_id=run.id, tool_outputs=tool_outputs
+                )
+                delay = RUN_POLL_INITIAL
+                continue
+
+            await asyncio.sleep(delay)
+            delay = min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX)
+            run = await asyncio.to_thread(self.agents_client.runs.get, thread_id=thread_id, run_id=run.id)
+        return run
+
+    def _last_agent_text(self, thread_id: str) -> str | None:
+        # Newest agent message of the thread (blocking, pages are fetched lazily)
+        messages = self.agents_client.messages.list(thread_id=thread_id, order=ListSortOrder.DESCENDING)
+        for msg in messages:
+            if msg.role == MessageRole.AGENT and msg.text_messages:
+                last_text = msg.text_messages[-1]
+                return last_text.text.value
+        return None
+
+    async def process_user_message(self, user_message: str, session_id: str | None = None) -> str:
 
         if not hasattr(self, 'azure_agent') or not self.azure_agent:
             return "Azure AI Agent not initialized. Please ensure the agent is properly created."
@@ -179,68 +384,86 @@ class RoutingAgent:
             return "Azure AI Thread not initialized. Please ensure the agent is properly created."
         
         try:
-            # Create message in the thread
-            self.agents_client.messages.create(
-                thread_id=self.current_thread.id, 
-                role=MessageRole.User, 
-                content=user_message
-            )
-
-            # Create and run the agent
-            run = self.agents_client.runs.create(
-                thread_id=self.current_thread.id, 
-                agent_id=self.azure_agent.id
-            )
-            
-            # Need to await send_message function
-            while run.status in ["queued", "in_progress", "requires_action"]:
-                time.sleep(1)
-                run = self.agents_client.runs.get(thread_id=self.current_thread.id, run_id=run.id)
-
-                if run.status == "requires_action":
-                    tool_calls = run.required_action.submit_tool_outputs.tool_calls
-                    tool_outputs = []
-                    
-                    for tool_call in tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
-                        
-                        if function_name == "send_message":
-                            try:
-                                result = await self.send_message(agent_name=function_args["agent_name"], task=function_args["task"])
-                                output = json.dumps(result.model_dump() if hasattr(result, 'model_dump') else str(result))
-
-                            except Exception as e:
-                                output = json.dumps({"error": str(e)})
-                        else:
-                            output = json.dumps({"error": f"Unknown function: {function_name}"})
-                        
-                        tool_outputs.append({"tool_call_id": tool_call.id,  "output": output})
-                
-                    # Submit the tool outputs
-                    self.agents_client.runs.submit_tool_outputs(
-                        thread_id=self.current_thread.id, run_id=run.id, tool_outputs=tool_outputs
-                    )
-
-            if run.status == "failed":
-                error_info = f"Run error: {run.last_error}"
-                print(error_info)
-                return f"Error processing request: {error_info}"
-
-            # Return the response
-            messages = self.agents_client.messages.list(thread_id=self.current_thread.id, order=ListSortOrder.DESCENDING)
-            for msg in messages:
-                if msg.role == MessageRole.AGENT and msg.text_messages:
-                    last_text = msg.text_messages[-1]
-                    return last_text.text.value
-            
-            return "No response received from agent."
+            thread = await self._get_thread(session_id)
+
+            # Messages of one conversation are handled in order; other sessions run concurrently
+            async with self._thread_locks.setdefault(thread.id, asyncio.Lock()):
+                # Create message in the thread
+                await asyncio.to_thread(
+                    self.agents_client.messages.create,
+                    thread_id=thread.id,
+                    role=MessageRole.User,
+                    content=user_message
+                )
+
+                # Create and run the agent
+                run = await asyncio.to_thread(
+                    self.agents_client.runs.create,
+                    thread_id=thread.id,
+                    agent_id=self.azure_agent.id
+                )
+
+                # Need to await send_message function
+                run = await self._wait_for_run(thread.id, run)
+
+                if run.status == "failed":
+                    error_info = f"Run error: {run.last_error}"
+                    print(error_info)
+                    return f"Error processing request: {error_info}"
+
+                # Return the response
+                response = await asyncio.to_thread(self._last_agent_text, thread.id)
+
+            return response or "No response received from agent."
             
         except Exception as e:
             error_msg = f"Error in process_user_message: {e}"
             print(error_msg)
             return f"An error occurred while processing your message."
 
+    def _stream_run(self, thread_id: str, handler: _RunStreamHandler, emit: StreamEventSink) -> None:
+        # Blocking: iterate the run stream (including tool output streams) until the run is done
+        try:
+            with self.agents_client.runs.stream(
+                thread_id=thread_id, agent_id=self.azure_agent.id, event_handler=handler
+            ) as stream:
+                stream.until_done()
+        except Exception as e:
+            emit({"type": "error", "text": f"Error in stream_user_message: {e}"})
+        finally:
+            emit(None)
+
+    async def stream_user_message(self, user_message: str, session_id: str | None = None) -> AsyncIterator[dict[str, str]]:
+        # Like process_user_message, but yields the answer while it is generated:
+        # "agent" events carry text chunks of the remote agents, "delta" events the routing agent's answer
+
+        if not self.azure_agent or not self.current_thread:
+            yield {"type": "error", "text": "Azure AI Agent not initialized. Please ensure the agent is properly created."}
+            return
+
+        thread = await self._get_thread(session_id)
+        async with self._thread_locks.setdefault(thread.id, asyncio.Lock()):
+            await asyncio.to_thread(
+                self.agents_client.messages.create,
+                thread_id=thread.id,
+                role=MessageRole.User,
+                content=user_message
+            )
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+
+            def emit(event: dict[str, str] | None) -> None:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+
+            run = loop.run_in_executor(None, self._stream_run, thread.id, _RunStreamHandler(self, loop, emit), emit)
+            try:
+                while (event := await queue.get()) is not None:
+                    yield event
+            finally:
+                # If the client disconnects, the run keeps going; hold the thread lock until it is done
+                await run
+
 
 async def _get_initialized_routing_agent_sync() -> RoutingAgent:
 
@@ -0,0 +1,271 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+
+import httpx
+
+from a2a.client import A2ACardResolver, A2AClient, A2AClientHTTPError
+from a2a.types import (
+    AgentCard,
+    SendMessageRequest,
+    SendMessageResponse,
+    SendStreamingMessageRequest,
+    SendStreamingMessageResponse,
+)
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2]); without it the pool uses HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# How long a fetched agent card is used before it is fetched again (seconds)
+CARD_TTL = float(os.getenv("A2A_CARD_TTL", "300"))
+
+# Consecutive failures that open a replica's circuit, and how long it stays open (seconds)
+BREAKER_FAILURES = int(os.getenv("A2A_BREAKER_FAILURES", "3"))
+BREAKER_RESET = float(os.getenv("A2A_BREAKER_RESET", "30"))
+
+# Errors after which the same message is retried on another replica (the request did not get through)
+RETRYABLE_ERRORS = (A2AClientHTTPError, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Stops sending to a failing replica for a while, then lets a single trial request through."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release(self) -> None:
+        # The request ended without a verdict (e.g. the caller cancelled it); let another trial through
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class AgentReplica:
+    """One server address of a remote agent, with its health and latency."""
+
+    # Weight of the newest sample in the latency moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, url: str, card: AgentCard, http_client: httpx.AsyncClient):
+        self.url = url
+        self.client = A2AClient(http_client, card, url=url)
+        self.breaker = CircuitBreaker()
+        self.latency: float | None = None  # seconds, moving average
+        self.in_flight = 0
+
+    def score(self) -> float:
+        # Expected wait: average latency, scaled by the requests already running on this replica
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + self.in_flight)
+
+    def record_latency(self, seconds: float) -> None:
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = self.LATENCY_ALPHA * seconds + (1 - self.LATENCY_ALPHA) * self.latency
+
+
+class RemoteAgentConnections:
+    """The connections to one remote agent, served by one or more replicas sharing the same agent card."""
+
+    def __init__(self, agent_card: AgentCard):
+        self.card = agent_card
+        self.replicas: dict[str, AgentReplica] = {}
+
+    def get_agent(self) -> AgentCard:
+        return self.card
+
+    def _candidates(self) -> list[AgentReplica]:
+        # Replicas in order of preference; untried replicas (no latency yet) come first, the least busy first
+        return sorted(self.replicas.values(), key=lambda r: (r.score(), r.in_flight))
+
+    async def send_message(self, message_request: SendMessageRequest) -> SendMessageResponse:
+        last_error: Exception | None = None
+        for replica in self._candidates():
+            if not replica.breaker.allow():
+                continue
+            replica.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = await replica.client.send_message(message_request)
+            except RETRYABLE_ERRORS as e:
+                replica.breaker.record_failure()
+                print(f"WARNING: {self.card.name} replica {replica.url} failed ({e}), trying the next replica")
+                last_error = e
+                continue
+            except asyncio.CancelledError:
+                # The caller gave up (e.g. TOOL_CALL_TIMEOUT); not a replica failure, but it was at least this slow
+                replica.breaker.release()
+                replica.record_latency(time.perf_counter() - start)
+                raise
+            except Exception:
+                replica.breaker.record_failure()
+                raise
+            finally:
+                replica.in_flight -= 1
+            replica.breaker.record_success()
+            replica.record_latency(time.perf_counter() - start)
+            return response
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"No healthy replica available for {self.card.name}")
+
+    async def send_message_streaming(
+        self, message_request: SendStreamingMessageRequest
+    ) -> AsyncIterator[SendStreamingMessageResponse]:
+        # Like send_message, but yields the events of the task as the replica sends them.
+        # Fails over to another replica only until the first event has arrived.
+        last_error: Exception | None = None
+        for replica in self._candidates():
+            if not replica.breaker.allow():
+                continue
+            replica.in_flight += 1
+            start = time.perf_counter()
+            received = False
+            try:
+                async for event in replica.client.send_message_streaming(message_request):
+                    if not received:
+                        received = True
+                        replica.record_latency(time.perf_counter() - start)  # time to first event
+                    yield event
+            except RETRYABLE_ERRORS as e:
+                replica.breaker.record_failure()
+                if received:
+                    raise
+                print(f"WARNING: {self.card.name} replica {replica.url} failed ({e}), trying the next replica")
+                last_error = e
+                continue
+            except (asyncio.CancelledError, GeneratorExit):
+                # The caller cancelled or stopped reading (e.g. SEND_MESSAGES_TIMEOUT); not a replica failure
+                replica.breaker.release()
+                if not received:
+                    replica.record_latency(time.perf_counter() - start)
+                raise
+            except Exception:
+                replica.breaker.record_failure()
+                raise
+            finally:
+                replica.in_flight -= 1
+            replica.breaker.record_success()
+            return
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"No healthy replica available for {self.card.name}")
+
+
+class A2AClientPool:
+    """
+    Shared A2A client pool for all remote agents.
+
+    All agents use one pooled HTTP client. Agent cards are resolved
+    concurrently and cached for CARD_TTL seconds; addresses that serve the
+    same agent card become replicas of one RemoteAgentConnections, which
+    picks the fastest healthy replica per message.
+    """
+
+    def __init__(self, timeout: float = 30, max_connections: int = 100):
+        self.http_client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 5),
+        )
+        self.connections: dict[str, RemoteAgentConnections] = {}
+        self._cards: dict[str, tuple[float, AgentCard]] = {}  # address -> (fetched at, card)
+        self._addresses: list[str] = []
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get_card(self, address: str, max_age: float = CARD_TTL) -> AgentCard:
+        cached = self._cards.get(address)
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        card = await A2ACardResolver(self.http_client, address).get_agent_card()
+        self._cards[address] = (time.monotonic(), card)
+        return card
+
+    async def connect(self, addresses: list[str]) -> dict[str, RemoteAgentConnections]:
+        """Resolve the agent cards of all addresses concurrently and group the addresses by agent."""
+        self._addresses = list(dict.fromkeys(self._addresses + addresses))
+        await self.refresh(max_age=CARD_TTL)
+        return self.connections
+
+    async def refresh(self, max_age: float = 0) -> None:
+        """Fetch the cards older than max_age again; a replica whose card can be fetched again is healthy."""
+        results = await asyncio.gather(
+            *(self.get_card(address, max_age) for address in self._addresses), return_exceptions=True
+        )
+        for address, result in zip(self._addresses, results):
+            if isinstance(result, Exception):
+                print(f"ERROR: Failed to get agent card from {address}: {result}")
+                self._mark_unhealthy(address)
+                continue
+            self._add_replica(address, result)
+
+    def _add_replica(self, address: str, card: AgentCard) -> None:
+        connection = self.connections.get(card.name)
+        if connection is None:
+            connection = self.connections[card.name] = RemoteAgentConnections(card)
+        connection.card = card
+        replica = connection.replicas.get(address)
+        if replica is None:
+            connection.replicas[address] = AgentReplica(address, card, self.http_client)
+        elif replica.breaker.state != "closed":
+            replica.breaker.record_success()
+
+    def _mark_unhealthy(self, address: str) -> None:
+        for connection in self.connections.values():
+            replica = connection.replicas.get(address)
+            if replica is not None:
+                replica.breaker.record_failure()
+
+    def start_refresh(self, interval: float = CARD_TTL) -> None:
+        """Refresh the cards (and health) of all addresses in the background every interval seconds."""
+        async def refresh_loop() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                await self.refresh()
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.get_running_loop().create_task(refresh_loop())
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        await self.http_client.aclose()
@@ -1,6 +1,8 @@
 import os
+import json
 import asyncio
 from fastapi import FastAPI, Request
+from sse_starlette.sse import EventSourceResponse
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from routing_agent.agent import RoutingAgent  
@@ -16,10 +18,15 @@ async def lifespan(app: FastAPI):
     routing_agent = await RoutingAgent.create([
         f"http://{os.environ["SERVER_URL"]}:{os.environ["TITLE_AGENT_PORT"]}",
         f"http://{os.environ["SERVER_URL"]}:{os.environ["OUTLINE_AGENT_PORT"]}",
+        # Optional extra servers (comma separated); servers with the same agent card act as replicas
+        *[address.strip() for address in os.getenv("A2A_REPLICA_ADDRESSES", "").split(",") if address.strip()],
     ])
     routing_agent.create_agent()
+    # Keep agent cards and replica health up to date while the server runs
+    routing_agent.client_pool.start_refresh()
     print("Routing agent initialized.")
     yield
+    await routing_agent.client_pool.aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -29,18 +36,39 @@ async def handle_message(request: Request):
 
     data = await request.json()
     user_message = data.get("message")
+    session_id = data.get("session_id")
 
     if not user_message:
         return {"error": "No message provided."}
     
     try:
-        response = await routing_agent.process_user_message(user_message)
+        response = await routing_agent.process_user_message(user_message, session_id=session_id)
 
     except Exception as e:
         return {"error": f"Failed to process message: {str(e)}"}
     
     return {"response": response}
 
+@app.post("/message/stream")
+async def handle_message_stream(request: Request):
+    # Server-sent events: one JSON event per text chunk, so the client can render the answer as it is generated
+    data = await request.json()
+    user_message = data.get("message")
+    session_id = data.get("session_id")
+
+    if not user_message:
+        return {"error": "No message provided."}
+
+    async def events():
+        try:
+            async for event in routing_agent.stream_user_message(user_message, session_id=session_id):
+                yield {"data": json.dumps(event)}
+        except Exception as e:
+            yield {"data": json.dumps({"type": "error", "text": f"Failed to process message: {str(e)}"})}
+        yield {"data": json.dumps({"type": "done"})}
+
+    return EventSourceResponse(events())
+
 @app.get("/health")
 async def health_check():
     return {"status": "Routing agent is running!"}
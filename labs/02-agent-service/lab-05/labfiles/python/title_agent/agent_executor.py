@@ -1,11 +1,13 @@
 """ Azure AI Foundry Agent that generates a title """
 
+import uuid
+
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message
-from a2a.types import AgentCard, Part, TaskState
+from a2a.types import AgentCard, Part, TaskState, TextPart
 from title_agent.agent import TitleAgent, create_foundry_title_agent
 
 class FoundryAgentExecutor(AgentExecutor):
@@ -48,6 +50,25 @@ class FoundryAgentExecutor(AgentExecutor):
                 context_id=context_id)
             )
 
+    async def _stream_response(self, agent: TitleAgent, user_message: str, context_id: str,
+                               task_updater: TaskUpdater) -> str:
+        # Send the response as artifact chunks while the model generates it and return the full text
+        artifact_id = str(uuid.uuid4())
+        chunks: list[str] = []
+        async for delta in agent.run_conversation_stream(user_message, context_id):
+            await task_updater.add_artifact(
+                [Part(root=TextPart(text=delta))],
+                artifact_id=artifact_id,
+                name='title',
+                append=bool(chunks),
+                last_chunk=False,
+            )
+            chunks.append(delta)
+        await task_updater.add_artifact(
+            [Part(root=TextPart(text=''))], artifact_id=artifact_id, name='title', append=True, last_chunk=True
+        )
+        return ''.join(chunks)
+
     async def execute(self, context: RequestContext, event_queue: EventQueue,):
        
         # Create task updater